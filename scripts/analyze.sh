@@ -1,5 +1,8 @@
 #!/usr/bin/env bash
 # Mount image read-only using loop device and run Python scanner.
+# As root every partition is loop-mounted read-only and scanned; if one
+# cannot be mounted the image is scanned directly instead.
+# Without root privileges the image is scanned directly (search.py --image).
 # At the end, optionally call encrypt_reports.sh if auto_encrypt is enabled in config.
 # Usage: ./analyze.sh /path/to/image.dd /path/to/case_dir
 set -euo pipefail
@@ -15,49 +18,85 @@ MOUNT_DIR="$CASE_DIR/mount"
 REPORT_DIR="$CASE_DIR/reports"
 mkdir -p "$MOUNT_DIR" "$REPORT_DIR"
 
-# Set up loop device (with partitions if present)
-LOOP=$(losetup --show -fP "$IMAGE")
-trap 'losetup -d "$LOOP" || true' EXIT
-
-echo "Loop device: $LOOP"
-
-# Try to mount first partition if exists, else mount whole loop device read-only
-if [ -b "${LOOP}p1" ]; then
-  echo "Mounting first partition ${LOOP}p1 read-only..."
-  mount -o ro "${LOOP}p1" "$MOUNT_DIR" || { echo "Mount failed"; exit 1; }
-else
-  echo "Mounting whole device $LOOP read-only..."
-  mount -o ro "$LOOP" "$MOUNT_DIR" || { echo "Mount failed"; exit 1; }
+# EWF (.E01) containers cannot be attached with losetup; read them directly
+IS_EWF="no"
+if [ "$(head -c 3 "$IMAGE" 2>/dev/null)" = "EVF" ]; then
+  IS_EWF="yes"
 fi
 
-echo "Mounted at $MOUNT_DIR"
-
-# Optional tools
-if command -v bulk_extractor >/dev/null 2>&1; then
-  echo "Running bulk_extractor (optional)..."
-  bulk_extractor -o "$REPORT_DIR/bulk_extractor" "$IMAGE" || true
+# Without root (or losetup) scan the image directly: every partition,
+# no mount needed, plus free clusters, file slack and unpartitioned space.
+# The yara rules run inside the scanner on every file it reads.
+if [ "$IS_EWF" = "yes" ] || [ "$(id -u)" -ne 0 ] || ! command -v losetup >/dev/null 2>&1; then
+  echo "Scanning image partitions and unallocated space without mounting..."
+  python3 tools/modules/search.py --image "$IMAGE" --carve unallocated --rules yara_rules --outdir "$REPORT_DIR" --case-dir "$CASE_DIR"
 else
-  echo "bulk_extractor not found; skipping."
-fi
+  # Set up loop device (with partitions if present)
+  LOOP=$(losetup --show -fP "$IMAGE")
+  MOUNTED=()
+  cleanup() {
+    for DIR in "${MOUNTED[@]+"${MOUNTED[@]}"}"; do
+      umount "$DIR" || true
+    done
+    losetup -d "$LOOP" || true
+  }
+  trap cleanup EXIT
 
-if command -v yara >/dev/null 2>&1 && [ -d "yara_rules" ]; then
-  echo "Running yara rules..."
-  yara -r yara_rules/wallet_candidates.yar "$MOUNT_DIR" > "$REPORT_DIR/yara_matches.txt" || true
-else
-  echo "yara not found or rules missing; skipping yara."
-fi
+  echo "Loop device: $LOOP"
 
-# Run Python scanner (walks filesystem, produces JSON + CSV)
-python3 tools/modules/search.py --root "$MOUNT_DIR" --outdir "$REPORT_DIR"
+  # Mount every partition read-only below $MOUNT_DIR/p<N> (the whole device
+  # as p0 if it has no partition table), so one scan covers all of them
+  DEVICES=()
+  for DEV in "${LOOP}"p*; do
+    [ -b "$DEV" ] || continue
+    # extended partition containers (1 KiB) hold only the logical partitions' table
+    [ "$(blockdev --getsize64 "$DEV")" -le 1024 ] && continue
+    DEVICES+=("$DEV")
+  done
+  if [ "${#DEVICES[@]}" -eq 0 ]; then
+    DEVICES=("$LOOP")
+  fi
+  UNMOUNTED=0
+  for DEV in "${DEVICES[@]}"; do
+    if [ "$DEV" = "$LOOP" ]; then NAME="p0"; else NAME="p${DEV#"${LOOP}p"}"; fi
+    mkdir -p "$MOUNT_DIR/$NAME"
+    echo "Mounting $DEV read-only at $MOUNT_DIR/$NAME..."
+    if mount -o ro "$DEV" "$MOUNT_DIR/$NAME"; then
+      MOUNTED+=("$MOUNT_DIR/$NAME")
+    else
+      echo "Mount of $DEV failed (unsupported or damaged filesystem)."
+      UNMOUNTED=$((UNMOUNTED + 1))
+    fi
+  done
 
-# Unmount
-umount "$MOUNT_DIR" || true
+  # Optional tools
+  if command -v bulk_extractor >/dev/null 2>&1; then
+    echo "Running bulk_extractor (optional)..."
+    bulk_extractor -o "$REPORT_DIR/bulk_extractor" "$IMAGE" || true
+  else
+    echo "bulk_extractor not found; skipping."
+  fi
+
+  if [ "$UNMOUNTED" -eq 0 ]; then
+    # Run Python scanner (walks all mounted filesystems once, yara rules included; produces JSON + CSV)
+    python3 tools/modules/search.py --root "$MOUNT_DIR" --rules yara_rules --outdir "$REPORT_DIR" --index "$CASE_DIR/scan_index.sqlite" --case-dir "$CASE_DIR" --precount
+  else
+    # A partition could not be mounted: scan the image itself so it is read
+    # raw instead of skipped (every partition, plus unallocated space)
+    echo "Scanning image partitions and unallocated space without mounting..."
+    python3 tools/modules/search.py --image "$IMAGE" --carve unallocated --rules yara_rules --outdir "$REPORT_DIR" --case-dir "$CASE_DIR"
+  fi
+fi
 echo "Analyse abgeschlossen. Reports in $REPORT_DIR"
 
-# Optionally verify integrity if image.sha256 exists next to image
+# Optionally verify integrity if image.sha256 exists next to image;
+# EWF images carry their own MD5/SHA1
 if [ -f "${IMAGE}.sha256" ]; then
   echo "Verifying image integrity..."
   bash scripts/verify_integrity.sh "$IMAGE" "${IMAGE}.sha256" || echo "Warning: integrity check failed"
+elif [ "$IS_EWF" = "yes" ]; then
+  echo "Verifying EWF image integrity..."
+  bash scripts/verify_integrity.sh "$IMAGE" || echo "Warning: integrity check failed"
 fi
 
 # Read config to decide on auto encryption
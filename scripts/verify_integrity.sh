@@ -1,17 +1,35 @@
 #!/usr/bin/env bash
 # Verify sha256 stored in .sha256 file matches actual image file.
+# EWF (.E01) images are additionally checked against their embedded MD5/SHA1;
+# for them the sumfile is optional.
 # Usage: ./verify_integrity.sh /path/to/image.dd /path/to/image.dd.sha256
+#        ./verify_integrity.sh /path/to/image.E01 [/path/to/image.E01.sha256]
 set -euo pipefail
 
-if [ "$#" -ne 2 ]; then
+if [ "$#" -lt 1 ] || [ "$#" -gt 2 ]; then
   echo "Usage: $0 /path/to/image.dd /path/to/image.dd.sha256"
+  echo "       $0 /path/to/image.E01 [/path/to/image.E01.sha256]"
   exit 2
 fi
 
 IMAGE="$1"
-SUMFILE="$2"
+SUMFILE="${2:-}"
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
-if [ ! -f "$IMAGE" ] || [ ! -f "$SUMFILE" ]; then
+if [ ! -f "$IMAGE" ]; then
+  echo "Missing image or sumfile."
+  exit 3
+fi
+
+if [ "$(head -c 3 "$IMAGE")" = "EVF" ]; then
+  python3 "$SCRIPT_DIR/../tools/modules/ewf.py" --verify "$IMAGE" || exit $?
+  if [ -z "$SUMFILE" ]; then
+    echo "OK: integrity verified."
+    exit 0
+  fi
+fi
+
+if [ -z "$SUMFILE" ] || [ ! -f "$SUMFILE" ]; then
   echo "Missing image or sumfile."
   exit 3
 fi
@@ -25,4 +43,4 @@ if [ "$EXPECTED" = "$ACTUAL" ]; then
 else
   echo "MISMATCH: expected $EXPECTED but got $ACTUAL"
   exit 4
-fi
\ No newline at end of file
+fi
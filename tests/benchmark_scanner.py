@@ -1,46 +1,126 @@
 #!/usr/bin/env python3
 """
-Performance benchmark for scanner module.
+Scenario benchmark suite for the scanner.
+
+Every scenario builds a synthetic tree from a fixed seed and scans it in a
+fresh process per iteration, so runs are comparable between checkouts.
+Recorded per scenario: median wall time, files/s and MB/s (from the scan's
+own scan_metrics report), peak RSS and the tracemalloc peak (taken in one
+extra traced run, as tracing slows the scan down); for the corpus
+scenario also recall and precision against its ground truth. --save
+stores the results as a JSON baseline; --compare runs the same scenarios
+against a baseline and exits with status 1 when wall time or memory grew
+by more than --threshold, or recall or precision dropped.
 
 Usage:
-    python3 tests/benchmark_scanner.py [--files N] [--size SIZE] [--iterations N]
+    python3 tests/benchmark_scanner.py [--scenarios NAME,...] [--scale F] [--iterations N]
+                                       [--workers N] [--save PATH] [--compare PATH]
+
+Scenarios:
+    flat          --files identical files of --size bytes in one directory
+    tiny_files    thousands of small text files in a few directories
+    deep_tree     narrow directory chains 40 levels deep
+    huge_files    a few files well above the full-read limit (mmap windows)
+    prose         English prose full of BIP39 words that never forms a mnemonic
+    binary_blobs  incompressible binary files
+    archives      zip and tar.gz archives with text members, one nested
+    hit_dense     files with several wallet artefacts each
+    corpus        realistic tree from create_corpus.py with decoys and planted
+                  artefacts; also records recall and precision
 
 Examples:
-    # Quick benchmark (100 files, 1 iteration)
-    python3 tests/benchmark_scanner.py
+    # Whole suite, three iterations, stored as baseline
+    python3 tests/benchmark_scanner.py --iterations 3 --save benchmark_baseline.json
 
-    # Stress test (10000 files, 10 iterations)
-    python3 tests/benchmark_scanner.py --files 10000 --iterations 10
+    # After a change: compare (exit status 1 on regressions)
+    python3 tests/benchmark_scanner.py --iterations 3 --compare benchmark_baseline.json
 
-    # Large file test (100 files @ 1MB each)
-    python3 tests/benchmark_scanner.py --files 100 --size 1048576
+    # Only the large-file scenarios, at twice the size
+    python3 tests/benchmark_scanner.py --scenarios huge_files,binary_blobs --scale 2
+
+Notes:
+    - Files are freshly written, so all iterations run on a warm page cache.
+    - Peak RSS needs the resource module (Unix); it is null elsewhere.
+    - Compare baselines taken on the same machine, scale and worker count.
 """
 
 import sys
 import os
+import io
+import json
 import time
+import random
+import tarfile
+import zipfile
 import tempfile
-import shutil
 import argparse
+import contextlib
+import platform
 import statistics
+import tracemalloc
+import multiprocessing
+from datetime import datetime
 from pathlib import Path
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 try:
     from tools.modules import search
+    from tools.modules.bip39 import ENGLISH
 except ImportError:
     # Fallback import
     sys.path.insert(0, str(project_root / 'tools' / 'modules'))
     import search
+    from bip39 import ENGLISH
+
+sys.path.insert(0, str(Path(__file__).parent))
+import create_corpus
+
+SEED = 20240101
+THRESHOLD = 0.20        # relative growth reported as a regression
+MIN_WALL_DELTA = 0.05   # seconds; smaller wall time differences are noise
+MIN_MEMORY_DELTA = 4 * 1024 * 1024  # bytes; same for the memory peaks
+MIN_QUALITY_DELTA = 0.001  # recall or precision drop reported as a regression
+MiB = 1024 * 1024
+
+HITS = (
+    b'{"crypto": {"cipher": "aes-128-ctr", "kdf": "scrypt"}}',
+    b'{"address": "742d35cc6634c0532925a3b844bc9e7595f0beb1"}',
+    b'key = 1234567890abcdef1234567890abcdef1234567890abcdef1234567890abcdef',
+    b'abandon ability able about above absent absorb abstract absurd abuse access accident',
+)
+FILLER_WORDS = (b'the', b'of', b'and', b'to', b'in', b'is', b'was', b'for', b'on', b'with',
+                b'memo', b'meeting', b'minutes', b'invoice', b'schedule', b'notes')
+
+
+def _count(n, scale):
+    return max(1, int(n * scale))
+
+
+def _random_bytes(rng, n):
+    return rng.getrandbits(8 * n).to_bytes(n, 'little')
+
 
+def _text(rng, n):
+    """n bytes of filler text without wallet artefacts."""
+    out = []
+    size = 0
+    while size < n:
+        word = rng.choice(FILLER_WORDS)
+        out.append(word)
+        size += len(word) + 1
+    return b' '.join(out)[:n]
 
-def create_benchmark_data(root_dir, num_files=100, file_size=1024):
-    """Create benchmark test files."""
-    print(f"Creating {num_files} test files ({file_size} bytes each)...")
 
+def build_flat(root, rng, opts):
+    """The original benchmark: identical flat files cycling through five contents."""
     patterns = {
         'wallet': b'This is a wallet.dat file with some test data',
         'keystore': b'{"crypto": {"cipher": "aes-128-ctr"}}',
@@ -48,31 +128,270 @@ def create_benchmark_data(root_dir, num_files=100, file_size=1024):
         'private_key': b'a1b2c3d4e5f6' * 10,
         'normal': b'Just a normal text file with regular content',
     }
+    names = list(patterns)
+    for i in range(opts.files):
+        pattern_type = names[i % len(names)]
+        content = patterns[pattern_type] * (opts.size // len(patterns[pattern_type]) + 1)
+        (root / f"{pattern_type}_{i:05d}.txt").write_bytes(content[:opts.size])
+
+
+def build_tiny_files(root, rng, opts):
+    dirs = [root / f"dir_{d:03d}" for d in range(_count(30, opts.scale))]
+    for d in dirs:
+        d.mkdir()
+    for i in range(_count(3000, opts.scale)):
+        data = _text(rng, rng.randint(20, 300))
+        if i % 50 == 0:
+            data += b'\n' + rng.choice(HITS)
+        (dirs[i % len(dirs)] / f"note_{i:05d}.txt").write_bytes(data)
+
+
+def build_deep_tree(root, rng, opts):
+    for branch in range(_count(8, opts.scale)):
+        path = root / f"branch_{branch}"
+        for level in range(40):
+            path = path / f"level_{level:02d}"
+            path.mkdir(parents=True)
+            for i in range(2):
+                (path / f"file_{i}.txt").write_bytes(_text(rng, rng.randint(100, 2000)))
+        (path / "keystore.json").write_bytes(HITS[0])
+
+
+def build_huge_files(root, rng, opts):
+    size = _count(48 * MiB, opts.scale)
+    text = _text(rng, MiB)
+    with open(root / "huge_text.log", 'wb') as f:
+        for _ in range(size // MiB):
+            f.write(text)
+        # one hit close to the end: the whole file has to be read
+        f.write(b'\n' + HITS[2] + b'\n')
+    block = _random_bytes(rng, MiB)
+    with open(root / "huge_blob.bin", 'wb') as f:
+        for i in range(size // MiB):
+            f.write(block[i:] + block[:i])
+
+
+def build_prose(root, rng, opts):
+    """Runs of 6-11 BIP39 words broken up by other words: maximum work for the mnemonic detector."""
+    words = [w.encode('ascii') for w in ENGLISH]
+    for i in range(_count(150, opts.scale)):
+        out = []
+        size = 0
+        while size < 64 * 1024:
+            run = [rng.choice(words) for _ in range(rng.randint(6, 11))]
+            run.append(rng.choice(FILLER_WORDS))
+            sentence = b' '.join(run) + rng.choice((b'. ', b', ', b'\n'))
+            out.append(sentence)
+            size += len(sentence)
+        (root / f"essay_{i:04d}.txt").write_bytes(b''.join(out))
+
+
+def build_binary_blobs(root, rng, opts):
+    for i in range(_count(60, opts.scale)):
+        (root / f"blob_{i:04d}.bin").write_bytes(_random_bytes(rng, rng.randint(128 * 1024, MiB)))
+
+
+def _members(rng, n):
+    for j in range(n):
+        data = _text(rng, rng.randint(500, 4000))
+        if j % 5 == 0:
+            data += b'\n' + rng.choice(HITS)
+        yield f"docs/member_{j:03d}.txt", data
+
+
+def build_archives(root, rng, opts):
+    for i in range(_count(40, opts.scale)):
+        if i % 2:
+            with tarfile.open(root / f"backup_{i:03d}.tar.gz", 'w:gz') as tar:
+                for name, data in _members(rng, 25):
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    tar.addfile(info, io.BytesIO(data))
+        else:
+            with zipfile.ZipFile(root / f"export_{i:03d}.zip", 'w', zipfile.ZIP_DEFLATED) as zf:
+                for name, data in _members(rng, 25):
+                    zf.writestr(name, data)
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in _members(rng, 10):
+            zf.writestr(name, data)
+    with zipfile.ZipFile(root / "nested.zip", 'w') as zf:
+        zf.writestr("inner.zip", inner.getvalue())
+
+
+def build_hit_dense(root, rng, opts):
+    for i in range(_count(400, opts.scale)):
+        parts = []
+        for _ in range(8):
+            parts.append(_text(rng, rng.randint(50, 400)))
+            parts.append(rng.choice(HITS))
+        (root / f"export_{i:04d}.txt").write_bytes(b'\n'.join(parts))
+
+
+def build_corpus(root, rng, opts):
+    """Generated evidence tree with ground truth; returns the manifest path."""
+    create_corpus.generate(str(root), str(root.parent), files=_count(5000, opts.scale), seed=SEED,
+                           artifact_rate=0.01, max_size=4 * MiB)
+    return root.parent / 'ground_truth.jsonl'
+
+
+SCENARIOS = {
+    'flat': build_flat,
+    'tiny_files': build_tiny_files,
+    'deep_tree': build_deep_tree,
+    'huge_files': build_huge_files,
+    'prose': build_prose,
+    'binary_blobs': build_binary_blobs,
+    'archives': build_archives,
+    'hit_dense': build_hit_dense,
+    'corpus': build_corpus,
+}
+
+
+def _peak_rss():
+    """Peak resident set size of this process and its finished children, in bytes."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _scan_once(root, outdir, workers, trace, conn):
+    """Child process: one scan; sends its measurements back through conn."""
+    try:
+        if trace:
+            tracemalloc.start()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            started = time.perf_counter()
+            search.scan(str(root), str(outdir), workers=workers)
+            wall = time.perf_counter() - started
+        traced = tracemalloc.get_traced_memory()[1] if trace else None
+        name = [n for n in os.listdir(outdir) if n.startswith('scan_metrics_')][0]
+        with open(os.path.join(outdir, name)) as f:
+            metrics = json.load(f)
+        conn.send({'wall_seconds': wall, 'peak_rss': _peak_rss(), 'tracemalloc_peak': traced,
+                   'files': metrics['files_scanned'], 'bytes': metrics['bytes_scanned'],
+                   'hits': metrics['hits_found']})
+    except BaseException as e:
+        conn.send({'error': repr(e)})
+        raise
+    finally:
+        conn.close()
+
+
+def measure(root, outdir, workers=1, trace=False):
+    """Scan root in a fresh process (so peak RSS belongs to this scan alone)."""
+    parent, child = multiprocessing.Pipe(duplex=False)
+    outdir.mkdir()
+    proc = multiprocessing.Process(target=_scan_once, args=(root, outdir, workers, trace, child))
+    proc.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {'error': 'scan process died (exit code %s)' % proc.exitcode}
+    proc.join()
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    return result
+
+
+def run_scenario(name, workdir, opts):
+    """Build one scenario below workdir and return its benchmark record."""
+    root = workdir / name / 'data'
+    root.mkdir(parents=True)
+    manifest = SCENARIOS[name](root, random.Random('%s:%d' % (name, SEED)), opts)
+    runs = [measure(root, workdir / name / f'out_{i}', opts.workers) for i in range(opts.iterations)]
+    traced = measure(root, workdir / name / 'out_traced', opts.workers, trace=True)
+    wall = statistics.median(r['wall_seconds'] for r in runs)
+    files, size = runs[0]['files'], runs[0]['bytes']
+    rss = [r['peak_rss'] for r in runs if r['peak_rss'] is not None]
+    record = {
+        'wall_seconds': round(wall, 4),
+        'wall_min': round(min(r['wall_seconds'] for r in runs), 4),
+        'files': files,
+        'bytes': size,
+        'hits': runs[0]['hits'],
+        'files_per_sec': round(files / wall, 1) if wall else None,
+        'mb_per_sec': round(size / MiB / wall, 2) if wall else None,
+        'peak_rss': max(rss) if rss else None,
+        'tracemalloc_peak': traced['tracemalloc_peak'],
+    }
+    if manifest is not None:
+        out = workdir / name / 'out_0'
+        results = [n for n in os.listdir(out) if n.startswith('scan_results_') and n.endswith('.json')][0]
+        score = create_corpus.evaluate(str(manifest), str(out / results))
+        record['recall'] = score['recall']
+        record['precision'] = score['precision']
+        record['false_positives'] = score['false_positives']
+    return record
+
+
+def run_suite(names, opts, progress=print):
+    """Benchmark the named scenarios; returns the baseline document."""
+    scenarios = {}
+    with tempfile.TemporaryDirectory(prefix='scanner_bench_') as tmpdir:
+        for name in names:
+            progress(f"{name:<14}", end=' ', flush=True)
+            record = scenarios[name] = run_scenario(name, Path(tmpdir), opts)
+            progress(_format(record))
+    return {
+        'created': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'scanner_version': search.SCANNER_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'scale': opts.scale, 'iterations': opts.iterations, 'workers': opts.workers,
+                     'files': opts.files, 'size': opts.size},
+        'scenarios': scenarios,
+    }
 
-    files_created = 0
-    for i in range(num_files):
-        pattern_type = list(patterns.keys())[i % len(patterns)]
-        filename = f"{pattern_type}_{i:05d}.txt"
-        filepath = root_dir / filename
-
-        content = patterns[pattern_type] * (file_size // len(patterns[pattern_type]) + 1)
-        content = content[:file_size]
-
-        filepath.write_bytes(content)
-        files_created += 1
-
-    return files_created
-
-
-def benchmark_scan(root_dir, outdir):
-    """Benchmark a single scan operation."""
-    start_time = time.time()
-
-    # Scan directory
-    search.scan(str(root_dir), str(outdir))
 
-    elapsed = time.time() - start_time
-    return elapsed
+def _mib(n):
+    return '-' if n is None else f"{n / MiB:.1f} MiB"
+
+
+def _format(r):
+    quality = f", recall {r['recall']}, precision {r['precision']}" if 'recall' in r else ''
+    return (f"{r['wall_seconds']:8.3f}s {r['files_per_sec'] or 0:9.1f} files/s {r['mb_per_sec'] or 0:8.2f} MB/s "
+            f"rss {_mib(r['peak_rss']):>10} traced {_mib(r['tracemalloc_peak']):>10} "
+            f"({r['files']} files, {r['hits']} hits{quality})")
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """Regressions and notes of current against baseline.
+
+    A regression is wall time, peak RSS or tracemalloc peak growing by more
+    than threshold (and more than the noise floor MIN_WALL_DELTA /
+    MIN_MEMORY_DELTA), or recall or precision dropping by more than
+    MIN_QUALITY_DELTA. Changed file or hit counts are notes: the scanner
+    then does different work and the timings are not comparable.
+    """
+    regressions, notes = [], []
+    for key in ('scale', 'workers', 'files', 'size'):
+        if baseline['settings'].get(key) != current['settings'].get(key):
+            notes.append(f"settings differ: {key} {baseline['settings'].get(key)} -> {current['settings'].get(key)}")
+    for name, now in current['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if base is None:
+            notes.append(f"{name}: not in baseline")
+            continue
+        for key in ('files', 'hits'):
+            if base[key] != now[key]:
+                notes.append(f"{name}: {key} {base[key]} -> {now[key]}")
+        for key, floor in (('wall_seconds', MIN_WALL_DELTA), ('peak_rss', MIN_MEMORY_DELTA),
+                           ('tracemalloc_peak', MIN_MEMORY_DELTA)):
+            old, new = base.get(key), now.get(key)
+            if not old or new is None:
+                continue
+            if new - old > floor and new > old * (1 + threshold):
+                regressions.append(f"{name}: {key} {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+        for key in ('recall', 'precision'):
+            old, new = base.get(key), now.get(key)
+            if old is not None and new is not None and old - new > MIN_QUALITY_DELTA:
+                regressions.append(f"{name}: {key} {old} -> {new}")
+    return regressions, notes
 
 
 def main():
@@ -81,96 +400,98 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=__doc__
     )
+    parser.add_argument(
+        '--scenarios',
+        default=','.join(SCENARIOS),
+        help='Comma-separated scenarios to run (default: all)'
+    )
+    parser.add_argument(
+        '--scale',
+        type=float,
+        default=1.0,
+        help='Size factor for the generated scenarios (default: 1.0)'
+    )
     parser.add_argument(
         '--files',
         type=int,
         default=100,
-        help='Number of test files to create (default: 100)'
+        help='Number of files of the flat scenario (default: 100)'
     )
     parser.add_argument(
         '--size',
         type=int,
         default=1024,
-        help='Size of each test file in bytes (default: 1024)'
+        help='Size of each flat scenario file in bytes (default: 1024)'
     )
     parser.add_argument(
         '--iterations',
         type=int,
         default=1,
-        help='Number of scan iterations (default: 1)'
+        help='Timed scans per scenario; the median is recorded (default: 1)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Scanner worker processes (default: 1)'
+    )
+    parser.add_argument(
+        '--save',
+        metavar='PATH',
+        help='Write the results as a JSON baseline'
+    )
+    parser.add_argument(
+        '--compare',
+        metavar='PATH',
+        help='Compare the results with a JSON baseline; exit status 1 on regressions'
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=THRESHOLD * 100,
+        help='Growth in percent reported as regression (default: %d)' % (THRESHOLD * 100)
     )
 
     args = parser.parse_args()
+    names = [n.strip() for n in args.scenarios.split(',') if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error('unknown scenario(s): %s (available: %s)' % (', '.join(unknown), ', '.join(SCENARIOS)))
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
 
     print("=" * 60)
     print("Scanner Performance Benchmark")
     print("=" * 60)
-    print(f"Files:      {args.files}")
-    print(f"File size:  {args.size} bytes")
+    print(f"Scenarios:  {', '.join(names)}")
+    print(f"Scale:      {args.scale}")
     print(f"Iterations: {args.iterations}")
+    print(f"Workers:    {args.workers}")
     print("=" * 60)
 
-    # Create temporary directories
-    with tempfile.TemporaryDirectory() as tmpdir:
-        root_dir = Path(tmpdir) / 'test_data'
-        root_dir.mkdir()
-
-        # Create test data once
-        files_created = create_benchmark_data(root_dir, args.files, args.size)
-        print(f"✓ Created {files_created} test files\n")
-
-        # Run benchmark iterations
-        times = []
-        for i in range(args.iterations):
-            outdir = Path(tmpdir) / f'output_{i}'
-            outdir.mkdir()
-
-            print(f"Iteration {i+1}/{args.iterations}...", end=' ', flush=True)
-            elapsed = benchmark_scan(root_dir, outdir)
-            times.append(elapsed)
-            print(f"{elapsed:.3f}s")
+    results = run_suite(names, args)
 
-        print("\n" + "=" * 60)
-        print("Results")
-        print("=" * 60)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
 
-        if len(times) == 1:
-            print(f"Scan time:  {times[0]:.3f}s")
-            print(f"Files/sec:  {args.files / times[0]:.1f}")
-            print(f"MB/sec:     {(args.files * args.size) / (times[0] * 1024 * 1024):.2f}")
-        else:
-            print(f"Min time:   {min(times):.3f}s")
-            print(f"Max time:   {max(times):.3f}s")
-            print(f"Mean time:  {statistics.mean(times):.3f}s")
-            print(f"Median:     {statistics.median(times):.3f}s")
-            if len(times) > 1:
-                print(f"Std dev:    {statistics.stdev(times):.3f}s")
-
-            avg_time = statistics.mean(times)
-            print(f"\nFiles/sec:  {args.files / avg_time:.1f}")
-            print(f"MB/sec:     {(args.files * args.size) / (avg_time * 1024 * 1024):.2f}")
-
-        # Performance rating
-        files_per_sec = args.files / statistics.mean(times)
+    if baseline is not None:
+        regressions, notes = compare(baseline, results, args.threshold / 100)
         print("\n" + "=" * 60)
-        print("Performance Rating")
+        print(f"Comparison with {args.compare} ({baseline.get('created', '?')})")
         print("=" * 60)
-        if files_per_sec > 1000:
-            rating = "EXCELLENT"
-            comment = "Scanner is very fast"
-        elif files_per_sec > 500:
-            rating = "GOOD"
-            comment = "Scanner performance is good"
-        elif files_per_sec > 100:
-            rating = "ACCEPTABLE"
-            comment = "Scanner performance is acceptable"
-        else:
-            rating = "SLOW"
-            comment = "Scanner may need optimization"
-
-        print(f"{rating}: {comment}")
-        print(f"Throughput: {files_per_sec:.1f} files/sec")
+        for note in notes:
+            print(f"NOTE: {note}")
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if not regressions:
+            print(f"No regressions beyond {args.threshold:.0f}%")
         print("=" * 60)
+        if regressions:
+            sys.exit(1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Test helper script - Generates a large synthetic evidence corpus with ground truth
+(seeded and deterministic: the same seed and options give the same tree)
+- Directory shape of a Linux system: user homes, dot-directories, project
+  trees, occasional deep chains (node_modules style), system directories
+- File sizes drawn from a log-normal distribution (many small files, a long
+  tail of large ones up to --max-size)
+- Content mix: binary files with real magic bytes, English prose, logs,
+  CSV, JSON, checksum lists and empty files
+- Decoys: prose with long runs of BIP39 words, JSON with "crypto" and
+  "address" keys that is not a keystore, SHA-256 checksum lists, file
+  names such as btc_chart.png or seed_catalog.pdf
+- Planted wallet artefacts (Ethereum keystores, BIP39 mnemonics, hex
+  private keys, Electrum wallets, keystores inside zip archives) at
+  recorded paths and offsets, half in well-known wallet locations and
+  half under innocuous names
+- Writes the tree to <output_dir>/tree, the ground truth (one JSON line per
+  artefact and per decoy) to <output_dir>/ground_truth.jsonl and a summary
+  to <output_dir>/corpus.json
+- --evaluate scores a scan result file against the ground truth (recall
+  per artefact kind, precision, false positives per decoy kind)
+Usage:
+    python3 tests/create_corpus.py OUTPUT_DIR [--files N] [--seed S]
+    python3 tests/create_corpus.py OUTPUT_DIR --evaluate reports/scan_results_<ts>.json
+Notes:
+- Generation streams: memory stays bounded by the directory list, so
+  millions of files are fine (disk space: about 12 KiB per file on average
+  with the default sizes).
+- Uses only standard library.
+"""
+import os
+import sys
+import io
+import json
+import math
+import uuid
+import random
+import hashlib
+import zipfile
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from tools.modules.bip39 import ENGLISH
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools', 'modules'))
+    from bip39 import ENGLISH
+
+CORPUS_VERSION = 1
+FILES = 10000
+SEED = 1
+ARTIFACT_RATE = 0.0005    # share of files replaced by a planted artefact
+NAME_DECOY_RATE = 0.002   # share of files with a wallet-looking name but innocent content
+MEDIAN_SIZE = 4096
+SIZE_SIGMA = 1.5          # log-normal spread of file sizes
+MAX_SIZE = 16 * 1024 * 1024
+STRUCTURED_MAX = 256 * 1024  # JSON, CSV and checksum lists stay below this
+NEW_DIR_RATE = 0.08       # chance that a file opens a new directory
+DEEP_CHAIN_RATE = 0.002   # chance that a new directory starts a deep chain
+POOL_SIZE = 4 * 1024 * 1024
+
+# (content type, weight)
+CONTENT_TYPES = (
+    ('binary', 40), ('prose', 22), ('log', 10), ('csv', 6), ('json', 9),
+    ('wordy_prose', 3), ('hex_hashes', 4), ('empty', 3), ('config', 3),
+)
+ARTIFACT_KINDS = (
+    ('keystore', 30), ('mnemonic', 30), ('private_key', 20), ('electrum', 10), ('zipped_keystore', 10),
+)
+
+USERS = ('alice', 'bob', 'carol', 'dave', 'erin', 'frank', 'grace', 'heidi')
+SKELETON = (
+    'etc', 'etc/ssl', 'var/log', 'var/lib/apt', 'var/cache', 'usr/share/doc', 'usr/lib/python3',
+    'opt/app/lib', 'srv/www', 'tmp',
+)
+HOME_DIRS = ('Documents', 'Downloads', 'Pictures', 'Music', 'Desktop', 'projects', '.config', '.cache',
+             '.local/share')
+DIR_WORDS = ('docs', 'src', 'lib', 'build', 'data', 'photos', 'backup', 'archive', 'notes', 'reports',
+             'assets', 'tests', 'vendor', 'images', 'old', 'misc', 'exports', 'logs', 'config', 'share',
+             'tmp', 'scans', 'invoices', 'drafts', 'media', 'static', 'templates', 'cache')
+FILE_WORDS = ('report', 'notes', 'draft', 'summary', 'invoice', 'photo', 'scan', 'letter', 'index',
+              'readme', 'changelog', 'data', 'export', 'minutes', 'agenda', 'chapter', 'image', 'log',
+              'settings', 'profile', 'module', 'main', 'util', 'record', 'statement')
+EXTENSIONS = {
+    'binary': ('.jpg', '.png', '.pdf', '.so', '.bin', '.mp3'),
+    'prose': ('.txt', '.md', '.html', '.rtf'),
+    'wordy_prose': ('.txt', '.md'),
+    'log': ('.log',),
+    'csv': ('.csv',),
+    'json': ('.json',),
+    'hex_hashes': ('.sha256', '.txt'),
+    'empty': ('.lock', '.txt', ''),
+    'config': ('.ini', '.conf', '.cfg', '.yaml'),
+}
+MAGIC = {
+    '.jpg': b'\xff\xd8\xff\xe0\x00\x10JFIF\x00', '.png': b'\x89PNG\r\n\x1a\n', '.pdf': b'%PDF-1.5\n',
+    '.so': b'\x7fELF\x02\x01\x01\x00', '.mp3': b'ID3\x04\x00',
+}
+# names that match the scanner's filename patterns although the file is innocent
+NAME_DECOYS = ('btc_chart.png', 'seed_catalog.pdf', 'wallet_design.png', 'mnemonic_devices.pdf',
+               'private_keynote.pdf', 'ethereum_whitepaper_review.pdf', 'keystore_diagram.png')
+
+_BIP39 = frozenset(ENGLISH)
+_COMMON = (
+    'the of and to in is was for on with that it as be by this are from or have an they which you were '
+    'her she there would their we him been has when who will more no if out so said what up its into than '
+    'them can only other some could these two may then do first any my now such our over me even most '
+    'made after did many before must through back years where much your way well down should because '
+    'each just those people how too little state very make still own see men long get here between both '
+    'being under day same know while last might us old off since go came used three'
+).split()
+COMMON_WORDS = tuple(w for w in _COMMON if w not in _BIP39)  # never extends a mnemonic run
+BIP39_WORDS = tuple(ENGLISH)
+
+
+# -- content pools (built once per corpus, then sliced)
+
+class Pools:
+    """Random material shared by all files of a corpus."""
+
+    def __init__(self, rng):
+        self.random = rng.getrandbits(8 * POOL_SIZE).to_bytes(POOL_SIZE, 'little')
+        self.paragraphs = [_paragraph(rng, max_run=4) for _ in range(512)]
+        self.wordy = [_paragraph(rng, max_run=11, bip39_share=0.85) for _ in range(256)]
+
+
+def _paragraph(rng, max_run, bip39_share=0.3):
+    """One paragraph; runs of BIP39 words never exceed max_run and it starts and ends with a common word."""
+    words = [rng.choice(COMMON_WORDS)]
+    run = 0
+    for _ in range(rng.randint(40, 120)):
+        if run < max_run and rng.random() < bip39_share:
+            words.append(rng.choice(BIP39_WORDS))
+            run += 1
+        else:
+            words.append(rng.choice(COMMON_WORDS))
+            run = 0
+        if rng.random() < 0.08:
+            words[-1] += '.'
+    words.append(rng.choice(COMMON_WORDS) + '.')
+    words[0] = words[0].capitalize()
+    return (' '.join(words) + '\n\n').encode('ascii')
+
+
+def _fill(rng, parts, size):
+    out = []
+    total = 0
+    while total < size:
+        part = rng.choice(parts)
+        out.append(part)
+        total += len(part)
+    data = b''.join(out)
+    if len(data) > size:
+        # cut at a word boundary: a cut word may turn into a BIP39 word ('many' -> 'man')
+        data = data[:data.rfind(b' ', 0, size) + 1]
+    return data
+
+
+def _hex(rng, bits=256):
+    return '%0*x' % (bits // 4, rng.getrandbits(bits))
+
+
+def make_content(kind, ext, size, rng, pools):
+    """Bytes of an innocent file of the given content type."""
+    if kind == 'empty':
+        return b''
+    if kind == 'binary':
+        head = MAGIC.get(ext, b'')
+        size = max(0, size - len(head))
+        start = rng.randrange(POOL_SIZE)
+        body = pools.random[start:start + size]
+        while len(body) < size:
+            body += pools.random[:size - len(body)]
+        return head + body
+    if kind == 'prose':
+        return _fill(rng, pools.paragraphs, size)
+    if kind == 'wordy_prose':
+        return _fill(rng, pools.wordy, size)
+    size = min(size, STRUCTURED_MAX)
+    lines = []
+    total = 0
+    while total < size:
+        if kind == 'log':
+            line = '2023-%02d-%02dT%02d:%02d:%02dZ host%d %s[%d]: %s\n' % (
+                rng.randint(1, 12), rng.randint(1, 28), rng.randrange(24), rng.randrange(60), rng.randrange(60),
+                rng.randrange(8), rng.choice(('sshd', 'cron', 'kernel', 'nginx', 'systemd')),
+                rng.randrange(1, 65536), ' '.join(rng.choice(COMMON_WORDS) for _ in range(rng.randint(4, 12))))
+        elif kind == 'csv':
+            line = '%d,%s,%s,%d.%02d\n' % (rng.randrange(10 ** 6), rng.choice(FILE_WORDS), rng.choice(USERS),
+                                           rng.randrange(10000), rng.randrange(100))
+        elif kind == 'hex_hashes':
+            line = '%s  %s_%d%s\n' % (_hex(rng), rng.choice(FILE_WORDS), rng.randrange(1000),
+                                      rng.choice(EXTENSIONS['binary']))
+        else:  # config
+            line = '%s_%s = %s\n' % (rng.choice(FILE_WORDS), rng.choice(DIR_WORDS), rng.choice(COMMON_WORDS))
+        lines.append(line)
+        total += len(line)
+    return ''.join(lines).encode('ascii')[:size]
+
+
+def json_decoy(rng):
+    """(bytes, decoy kind or None) of a JSON file that is not a keystore."""
+    choice = rng.randrange(3)
+    if choice == 0:
+        doc = {'name': rng.choice(FILE_WORDS), 'version': '%d.%d.%d' % (rng.randrange(5), rng.randrange(20),
+                                                                          rng.randrange(20)),
+               'dependencies': {rng.choice(DIR_WORDS): '^%d.0.0' % rng.randrange(10) for _ in range(5)}}
+        return json.dumps(doc, indent=2).encode('ascii'), None
+    if choice == 1:
+        # TLS settings of some application: has a "crypto" key
+        doc = {'server': {'port': rng.choice((443, 8443)), 'host': 'srv%d.local' % rng.randrange(100)},
+               'crypto': {'provider': rng.choice(('openssl', 'boringssl')), 'fips': False,
+                          'ciphers': ['TLS_AES_128_GCM_SHA256', 'TLS_AES_256_GCM_SHA384']}}
+        return json.dumps(doc, indent=2).encode('ascii'), 'json_crypto_key'
+    # address book: has "address" keys
+    doc = [{'name': rng.choice(USERS).capitalize(), 'email': '%s@example.org' % rng.choice(USERS),
+            'address': '%d %s Street' % (rng.randint(1, 200), rng.choice(FILE_WORDS).capitalize())}
+           for _ in range(rng.randint(3, 30))]
+    return json.dumps(doc, indent=2).encode('ascii'), 'json_address'
+
+
+# -- planted artefacts
+
+def bip39_mnemonic(rng, words=12):
+    """A BIP39 mnemonic with a valid checksum."""
+    ent_bits = words * 11 * 32 // 33
+    entropy = rng.getrandbits(ent_bits).to_bytes(ent_bits // 8, 'big')
+    checksum_bits = ent_bits // 32
+    checksum = hashlib.sha256(entropy).digest()[0] >> (8 - checksum_bits)
+    value = (int.from_bytes(entropy, 'big') << checksum_bits) | checksum
+    return ' '.join(ENGLISH[(value >> (11 * i)) & 0x7ff] for i in reversed(range(words)))
+
+
+def keystore_v3(rng):
+    doc = {
+        'address': _hex(rng, 160),
+        'crypto': {
+            'cipher': 'aes-128-ctr', 'ciphertext': _hex(rng), 'cipherparams': {'iv': _hex(rng, 128)},
+            'kdf': 'scrypt', 'kdfparams': {'dklen': 32, 'n': 262144, 'p': 1, 'r': 8, 'salt': _hex(rng)},
+            'mac': _hex(rng),
+        },
+        'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        'version': 3,
+    }
+    return json.dumps(doc).encode('ascii'), doc['address']
+
+
+def electrum_wallet(rng):
+    alphabet = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+    xprv = 'xprv9s21ZrQH143K' + ''.join(rng.choice(alphabet) for _ in range(95))
+    xpub = 'xpub661MyMwAqRbc' + ''.join(rng.choice(alphabet) for _ in range(95))
+    doc = {'seed_version': 18, 'wallet_type': 'standard', 'use_encryption': False,
+           'keystore': {'type': 'bip32', 'xprv': xprv, 'xpub': xpub}, 'addr_history': {}}
+    return json.dumps(doc, indent=4).encode('ascii')
+
+
+def make_artifact(kind, rng, pools, user):
+    """(relative path of a well-known location or None, file name, data, offset, length, member) of an artefact."""
+    if kind == 'keystore':
+        data, address = keystore_v3(rng)
+        name = 'UTC--2021-%02d-%02dT10-%02d-%02d.000Z--%s' % (
+            rng.randint(1, 12), rng.randint(1, 28), rng.randrange(60), rng.randrange(60), address)
+        return 'home/%s/.ethereum/keystore' % user, name, data, 0, len(data), None
+    if kind == 'zipped_keystore':
+        inner, address = keystore_v3(rng)
+        member = 'keystore/UTC--%s' % address
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+            info = zipfile.ZipInfo(member, date_time=(2021, 1, 1, 0, 0, 0))
+            zf.writestr(info, inner)
+            zf.writestr(zipfile.ZipInfo('readme.txt', date_time=(2021, 1, 1, 0, 0, 0)), pools.paragraphs[0])
+        return None, 'eth_backup_%d.zip' % rng.randrange(100), buf.getvalue(), 0, len(inner), member
+    if kind == 'mnemonic':
+        phrase = bip39_mnemonic(rng, rng.choice((12, 24))).encode('ascii')
+        before = _fill(rng, pools.paragraphs, rng.randint(0, 4000)) + b'\nthe recovery phrase is:\n'
+        after = b'\nthe above must not be shared.\n' + _fill(rng, pools.paragraphs, rng.randint(0, 4000))
+        return None, 'notes_%d.txt' % rng.randrange(1000), before + phrase + after, len(before), len(phrase), None
+    if kind == 'private_key':
+        key = _hex(rng).encode('ascii')
+        before = b'# deployment settings\nRPC_URL=http://127.0.0.1:8545\nPRIVATE_KEY='
+        data = before + key + b'\nGAS_LIMIT=%d\n' % rng.randint(21000, 900000)
+        return None, '.env', data, len(before), len(key), None
+    data = electrum_wallet(rng)
+    return 'home/%s/.electrum/wallets' % user, 'default_wallet', data, 0, len(data), None
+
+
+# -- tree
+
+def _weighted(rng, table):
+    total = sum(w for _, w in table)
+    pick = rng.uniform(0, total)
+    for value, weight in table:
+        pick -= weight
+        if pick <= 0:
+            return value
+    return table[-1][0]
+
+
+def _size(rng, median_size, max_size):
+    return min(max_size, int(rng.lognormvariate(math.log(median_size), SIZE_SIGMA)))
+
+
+class _Tree:
+    """Directories created so far (relative paths); new ones grow below random existing ones."""
+
+    def __init__(self, root, rng, users):
+        self.root = root
+        self.rng = rng
+        self.dirs = []
+        self.known = set()
+        for d in SKELETON:
+            self.add(d)
+        for user in users:
+            for d in HOME_DIRS:
+                self.add('home/%s/%s' % (user, d))
+
+    def add(self, rel):
+        if rel not in self.known:
+            os.makedirs(os.path.join(self.root, rel), exist_ok=True)
+            self.known.add(rel)
+            self.dirs.append(rel)
+        return rel
+
+    def pick(self):
+        rng = self.rng
+        if rng.random() >= NEW_DIR_RATE:
+            # files cluster: recently created directories are likelier
+            return self.dirs[-1 - min(int(rng.expovariate(1 / 20.0)), len(self.dirs) - 1)]
+        parent = rng.choice(self.dirs)
+        if rng.random() < DEEP_CHAIN_RATE:
+            for _ in range(rng.randint(10, 30)):
+                parent = self.add('%s/node_modules/%s' % (parent, rng.choice(DIR_WORDS)))
+            return parent
+        return self.add('%s/%s%s' % (parent, rng.choice(DIR_WORDS), rng.choice(('', '', str(rng.randrange(100))))))
+
+
+def generate(root, manifest_dir, files=FILES, seed=SEED, artifact_rate=ARTIFACT_RATE,
+             median_size=MEDIAN_SIZE, max_size=MAX_SIZE, progress=None):
+    """Write a corpus of files files below root and its ground truth into manifest_dir.
+
+    Returns the summary that is also written to manifest_dir/corpus.json.
+    """
+    rng = random.Random(seed)
+    pools = Pools(rng)
+    users = USERS[:max(2, min(len(USERS), files // 50000 + 2))]
+    tree = _Tree(root, rng, users)
+    summary = {'version': CORPUS_VERSION, 'seed': seed, 'files': files, 'artifact_rate': artifact_rate,
+               'median_size': median_size, 'max_size': max_size, 'bytes': 0,
+               'content': {}, 'artifacts': {}, 'decoys': {}}
+    os.makedirs(manifest_dir, exist_ok=True)
+    with open(os.path.join(manifest_dir, 'ground_truth.jsonl'), 'w', encoding='utf-8') as manifest:
+        for i in range(files):
+            entry = None
+            if rng.random() < artifact_rate:
+                kind = _weighted(rng, ARTIFACT_KINDS)
+                known_dir, name, data, offset, length, member = make_artifact(kind, rng, pools, rng.choice(users))
+                where = tree.add(known_dir) if known_dir and rng.random() < 0.5 else tree.pick()
+                rel = '%s/%s' % (where, name) if where == known_dir else '%s/%d_%s' % (where, i, name)
+                if os.path.exists(os.path.join(root, rel)):
+                    rel = '%s/%d_%s' % (where, i, name)
+                entry = {'path': rel + ('!/' + member if member else ''), 'label': 'artifact', 'kind': kind,
+                         'offset': offset, 'length': length}
+                summary['artifacts'][kind] = summary['artifacts'].get(kind, 0) + 1
+            else:
+                kind = _weighted(rng, CONTENT_TYPES)
+                if rng.random() < NAME_DECOY_RATE:
+                    name = rng.choice(NAME_DECOYS)
+                    kind, decoy = 'binary', 'name'
+                else:
+                    name = rng.choice(FILE_WORDS) + rng.choice(EXTENSIONS[kind])
+                    decoy = kind if kind in ('wordy_prose', 'hex_hashes') else None
+                if kind == 'json':
+                    data, decoy = json_decoy(rng)
+                else:
+                    data = make_content(kind, os.path.splitext(name)[1], _size(rng, median_size, max_size),
+                                        rng, pools)
+                rel = '%s/%d_%s' % (tree.pick(), i, name)
+                if decoy:
+                    entry = {'path': rel, 'label': 'decoy', 'kind': decoy}
+                    summary['decoys'][decoy] = summary['decoys'].get(decoy, 0) + 1
+                summary['content'][kind] = summary['content'].get(kind, 0) + 1
+            with open(os.path.join(root, rel), 'wb') as f:
+                f.write(data)
+            summary['bytes'] += len(data)
+            if entry is not None:
+                manifest.write(json.dumps(entry) + '\n')
+            if progress and (i + 1) % 10000 == 0:
+                progress(i + 1)
+    summary['dirs'] = len(tree.dirs)
+    with open(os.path.join(manifest_dir, 'corpus.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+# -- scoring
+
+def _result_paths(results_path):
+    if results_path.endswith('.jsonl'):
+        with open(results_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)['path']
+    else:
+        with open(results_path, encoding='utf-8') as f:
+            for record in json.load(f):
+                yield record['path']
+
+
+def evaluate(manifest_path, results_path):
+    """Recall and precision of a scan (its .json or .jsonl results) against a ground truth manifest.
+
+    A hit is counted once per path. Archives reported alongside a planted
+    member are neither true nor false positives.
+    """
+    artifacts, decoys, containers = {}, {}, set()
+    with open(manifest_path, encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry['label'] == 'artifact':
+                artifacts[entry['path'].replace('/', os.sep)] = entry['kind']
+                if '!/' in entry['path']:
+                    containers.add(entry['path'].split('!/', 1)[0].replace('/', os.sep))
+            else:
+                decoys[entry['path'].replace('/', os.sep)] = entry['kind']
+    found, false_positives = set(), {}
+    for path in set(_result_paths(results_path)):
+        if path in artifacts:
+            found.add(path)
+        elif path not in containers:
+            kind = decoys.get(path, 'other')
+            false_positives[kind] = false_positives.get(kind, 0) + 1
+    by_kind = {}
+    for path, kind in artifacts.items():
+        counts = by_kind.setdefault(kind, [0, 0])
+        counts[0] += path in found
+        counts[1] += 1
+    reported = len(found) + sum(false_positives.values())
+    return {
+        'artifacts': len(artifacts),
+        'found': len(found),
+        'recall': round(len(found) / len(artifacts), 4) if artifacts else None,
+        'reported': reported,
+        'precision': round(len(found) / reported, 4) if reported else None,
+        'recall_by_kind': {kind: {'found': f, 'total': t} for kind, (f, t) in sorted(by_kind.items())},
+        'false_positives': dict(sorted(false_positives.items())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic evidence corpus with ground truth")
+    parser.add_argument('output_dir', help='Corpus directory (tree/, ground_truth.jsonl, corpus.json)')
+    parser.add_argument('--files', type=int, default=FILES, help='Number of files (default: %d)' % FILES)
+    parser.add_argument('--seed', type=int, default=SEED, help='Random seed (default: %d)' % SEED)
+    parser.add_argument('--artifact-rate', type=float, default=ARTIFACT_RATE,
+                        help='Share of files replaced by planted wallet artefacts (default: %g)' % ARTIFACT_RATE)
+    parser.add_argument('--median-size', type=int, default=MEDIAN_SIZE,
+                        help='Median file size in bytes (default: %d)' % MEDIAN_SIZE)
+    parser.add_argument('--max-size', type=int, default=MAX_SIZE,
+                        help='Largest file size in bytes (default: %d)' % MAX_SIZE)
+    parser.add_argument('--evaluate', metavar='RESULTS',
+                        help='Score a scan_results .json/.jsonl file against the corpus ground truth instead')
+
+    args = parser.parse_args()
+    manifest = os.path.join(args.output_dir, 'ground_truth.jsonl')
+
+    if args.evaluate:
+        print(json.dumps(evaluate(manifest, args.evaluate), indent=2))
+        return
+
+    root = os.path.join(args.output_dir, 'tree')
+    if os.path.exists(root):
+        parser.error('%s already exists' % root)
+
+    print("=" * 60)
+    print("Synthetic Corpus Generator")
+    print("=" * 60)
+    summary = generate(root, args.output_dir, files=args.files, seed=args.seed,
+                       artifact_rate=args.artifact_rate, median_size=args.median_size,
+                       max_size=args.max_size, progress=lambda n: print(f"  {n} files", flush=True))
+    print(f"\n✓ {summary['files']} files, {summary['dirs']} directories, {summary['bytes']} bytes")
+    print(f"✓ Artefacts: {sum(summary['artifacts'].values())} {summary['artifacts']}")
+    print(f"✓ Decoys: {sum(summary['decoys'].values())} {summary['decoys']}")
+    print(f"✓ Ground truth: {manifest}")
+
+    print("\n" + "=" * 60)
+    print("Usage:")
+    print("=" * 60)
+    print(f"\n# Scan the corpus:")
+    print(f"python3 tools/modules/search.py --root {root} --outdir {args.output_dir}/reports")
+    print(f"\n# Score the scan:")
+    print(f"python3 tests/create_corpus.py {args.output_dir} --evaluate {args.output_dir}/reports/scan_results_<ts>.json")
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Test helper script - Builds small FAT32, exFAT and NTFS images for the
+filesystem readers, and wraps images into EWF (.E01) containers
+(no mkfs/ewfacquire tools or root needed)
+Usage: python3 tests/create_test_images.py [output_dir]
+"""
+import os
+import sys
+import struct
+import argparse
+import hashlib
+import zlib
+
+SECTOR = 512
+
+SAMPLE_FILES = {
+    "readme.txt": b"Just a normal file\n",
+    "Documents/keystore.json": b'{"crypto": {"cipher": "aes-128-ctr"}, "address": "0x123"}',
+    "Documents/Backups/Seed Phrase Backup.txt": (b"x" * 5000 + b" key 0x" + b"ab" * 32 + b"\n"),
+    "AppData/Electrum/wallets/default_wallet": b"plain" * 2000,
+}
+
+
+def _tree(files):
+    """Map every directory ('' = root) to its ordered list of (name, is_dir)."""
+    dirs = {'': []}
+    for path in files:
+        parts = path.split('/')
+        for i in range(len(parts) - 1):
+            parent, name = '/'.join(parts[:i]), parts[i]
+            full = '/'.join(parts[:i + 1])
+            if full not in dirs:
+                dirs[full] = []
+                dirs[parent].append((name, True))
+        dirs['/'.join(parts[:-1])].append((parts[-1], False))
+    return dirs
+
+
+def _join(parent, name):
+    return parent + '/' + name if parent else name
+
+
+class _Allocator:
+    def __init__(self, first):
+        self.next = first
+
+    def take(self, count, fragment=False):
+        """Allocate clusters; fragment leaves a one-cluster hole in the middle."""
+        clusters = []
+        for i in range(count):
+            if fragment and i == count // 2:
+                self.next += 1
+            clusters.append(self.next)
+            self.next += 1
+        return clusters
+
+
+def _chain_fat(fat, clusters, eoc):
+    for a, b in zip(clusters, clusters[1:]):
+        fat[a] = b
+    if clusters:
+        fat[clusters[-1]] = eoc
+
+
+def _bitmap(used, count):
+    """Allocation bitmap (LSB first) with the given cluster indices set."""
+    bits = bytearray(-(-count // 8))
+    for i in used:
+        bits[i // 8] |= 1 << (i % 8)
+    return bytes(bits)
+
+
+def _write_fat(f, offset, fat):
+    f.seek(offset)
+    f.write(struct.pack('<%dI' % len(fat), *fat))
+
+
+# ---------------------------------------------------------------- FAT32
+
+def _lfn_checksum(short):
+    s = 0
+    for b in short:
+        s = (((s & 1) << 7) + (s >> 1) + b) & 0xFF
+    return s
+
+
+def _fat_entries(name, short, attr, cluster, size):
+    """Long-name entries (last first) followed by the 8.3 entry."""
+    units = name.encode('utf-16-le')
+    units += b'\0\0' if len(units) % 26 else b''
+    units = units.ljust(-(-len(units) // 26) * 26, b'\xff')
+    pieces = [units[i:i + 26] for i in range(0, len(units), 26)]
+    ck = _lfn_checksum(short)
+    out = []
+    for seq in range(len(pieces), 0, -1):
+        p = pieces[seq - 1]
+        out.append(struct.pack('<B10sBBB12sH4s', seq | (0x40 if seq == len(pieces) else 0),
+                               p[:10], 0x0F, 0, ck, p[10:22], 0, p[22:26]))
+    out.append(struct.pack('<11sBBBHHHHHHHI', short, attr, 0, 0, 0, 0, 0,
+                           cluster >> 16, 0, 0, cluster & 0xFFFF, size))
+    return b''.join(out)
+
+
+def build_fat32(path, files, size=16 * 1024 * 1024, fragment=()):
+    cluster_size = SECTOR
+    reserved, nfats = 32, 2
+    total = size // SECTOR
+    fat_sectors = -(-((total + 2) * 4) // SECTOR)
+    data_offset = (reserved + nfats * fat_sectors) * SECTOR
+    clusters_total = (total - reserved - nfats * fat_sectors)
+    fat = [0] * (fat_sectors * SECTOR // 4)
+    fat[0], fat[1] = 0x0FFFFFF8, 0x0FFFFFFF
+    dirs = _tree(files)
+    alloc = _Allocator(2)
+    counter = [0]
+
+    def short_name():
+        counter[0] += 1
+        return ('F%07d' % counter[0]).encode() + b'BIN'
+
+    # directory sizes are known up front: each child is 1 LFN piece per 13 chars + 1
+    dir_clusters = {}
+    for d, children in dirs.items():
+        n = (0 if d == '' else 2) + sum(1 + -(-(len(c) + 1) // 13) for c, _ in children) + 1
+        dir_clusters[d] = alloc.take(-(-n * 32 // cluster_size))
+    file_clusters = {}
+    for p, data in files.items():
+        file_clusters[p] = alloc.take(-(-len(data) // cluster_size), p in fragment) if data else []
+    assert alloc.next < clusters_total + 2
+    for chain in list(dir_clusters.values()) + list(file_clusters.values()):
+        _chain_fat(fat, chain, 0x0FFFFFFF)
+
+    with open(path, 'wb') as f:
+        f.truncate(size)
+        bs = bytearray(SECTOR)
+        bs[0:3] = b'\xeb\x58\x90'
+        bs[3:11] = b'MSWIN4.1'
+        struct.pack_into('<HBHBHHBHHHII', bs, 0x0B, SECTOR, 1, reserved, nfats, 0, 0, 0xF8, 0, 63, 255, 0, total)
+        struct.pack_into('<IHHIHH', bs, 0x24, fat_sectors, 0, 0, dir_clusters[''][0], 1, 6)
+        bs[0x52:0x5A] = b'FAT32   '
+        bs[510:512] = b'\x55\xaa'
+        f.seek(0)
+        f.write(bs)
+        for i in range(nfats):
+            _write_fat(f, (reserved + i * fat_sectors) * SECTOR, fat)
+
+        def write_chain(chain, data):
+            for i, c in enumerate(chain):
+                f.seek(data_offset + (c - 2) * cluster_size)
+                f.write(data[i * cluster_size:(i + 1) * cluster_size])
+
+        for d, children in dirs.items():
+            raw = b''
+            if d:
+                parent = d.rsplit('/', 1)[0] if '/' in d else ''
+                raw += struct.pack('<11sB8xHHHHI', b'.          ', 0x10, dir_clusters[d][0] >> 16, 0, 0,
+                                   dir_clusters[d][0] & 0xFFFF, 0)
+                pc = dir_clusters[parent][0] if parent else 0
+                raw += struct.pack('<11sB8xHHHHI', b'..         ', 0x10, pc >> 16, 0, 0, pc & 0xFFFF, 0)
+            for name, is_dir in children:
+                full = _join(d, name)
+                if is_dir:
+                    raw += _fat_entries(name, short_name(), 0x10, dir_clusters[full][0], 0)
+                else:
+                    chain = file_clusters[full]
+                    raw += _fat_entries(name, short_name(), 0x20, chain[0] if chain else 0, len(files[full]))
+            # a deleted entry must be skipped
+            raw += b'\xe5' + b'DELETED TXT' + bytes(20)
+            write_chain(dir_clusters[d], raw)
+        for p, data in files.items():
+            write_chain(file_clusters[p], data)
+
+
+# ---------------------------------------------------------------- exFAT
+
+def _exfat_set(name, attrs, first, length, contiguous):
+    units = name.encode('utf-16-le')
+    name_entries = [units[i:i + 30].ljust(30, b'\0') for i in range(0, len(units), 30)]
+    flags = 0x01 | (0x02 if contiguous else 0)
+    entries = [
+        bytearray(struct.pack('<BBHH26x', 0x85, 1 + len(name_entries), 0, attrs)),
+        bytearray(struct.pack('<BBBBHHQ4xIQ', 0xC0, flags, 0, len(name), 0, 0, length, first, length)),
+    ] + [bytearray(struct.pack('<BB30s', 0xC1, 0, n)) for n in name_entries]
+    raw = b''.join(bytes(e) for e in entries)
+    checksum = 0
+    for i, b in enumerate(raw):
+        if i in (2, 3):
+            continue
+        checksum = (((checksum & 1) << 15) | (checksum >> 1)) + b & 0xFFFF
+    entries[0][2:4] = struct.pack('<H', checksum)
+    return b''.join(bytes(e) for e in entries)
+
+
+def build_exfat(path, files, size=16 * 1024 * 1024, fragment=()):
+    cluster_shift = 3
+    cluster_size = SECTOR << cluster_shift
+    fat_offset, fat_sectors = 32, 128
+    heap_offset = 2048
+    cluster_count = (size // SECTOR - heap_offset) >> cluster_shift
+    fat = [0] * (fat_sectors * SECTOR // 4)
+    fat[0], fat[1] = 0xFFFFFFF8, 0xFFFFFFFF
+    dirs = _tree(files)
+    alloc = _Allocator(2)
+
+    dir_clusters = {}
+    for d, children in dirs.items():
+        n = (1 if d == '' else 0) + sum(2 + -(-len(c) // 15) for c, _ in children) + 1
+        dir_clusters[d] = alloc.take(-(-n * 32 // cluster_size))
+    file_clusters = {}
+    for p, data in files.items():
+        file_clusters[p] = alloc.take(-(-len(data) // cluster_size), p in fragment) if data else []
+    bitmap_clusters = alloc.take(-(-cluster_count // 8 // cluster_size))
+    used = [c for chain in list(dir_clusters.values()) + list(file_clusters.values()) + [bitmap_clusters]
+            for c in chain]
+    bitmap = _bitmap((c - 2 for c in used), cluster_count)
+    # the root, the bitmap and fragmented files use the FAT; everything else is contiguous
+    _chain_fat(fat, dir_clusters[''], 0xFFFFFFFF)
+    _chain_fat(fat, bitmap_clusters, 0xFFFFFFFF)
+    for p in fragment:
+        _chain_fat(fat, file_clusters[p], 0xFFFFFFFF)
+
+    with open(path, 'wb') as f:
+        f.truncate(size)
+        bs = bytearray(SECTOR)
+        bs[0:3] = b'\xeb\x76\x90'
+        bs[3:11] = b'EXFAT   '
+        struct.pack_into('<QQIIIIIIHHBBBB', bs, 0x40, 0, size // SECTOR, fat_offset, fat_sectors,
+                         heap_offset, cluster_count, dir_clusters[''][0], 0x1234, 0x0100, 0,
+                         9, cluster_shift, 1, 0x80)
+        bs[510:512] = b'\x55\xaa'
+        f.seek(0)
+        f.write(bs)
+        _write_fat(f, fat_offset * SECTOR, fat)
+
+        def write_chain(chain, data):
+            for i, c in enumerate(chain):
+                f.seek(heap_offset * SECTOR + (c - 2) * cluster_size)
+                f.write(data[i * cluster_size:(i + 1) * cluster_size])
+
+        for d, children in dirs.items():
+            raw = b''
+            if d == '':
+                # allocation bitmap entry; walk() must skip it
+                raw += struct.pack('<BB18xIQ', 0x81, 0, bitmap_clusters[0], len(bitmap))
+            for name, is_dir in children:
+                full = _join(d, name)
+                if is_dir:
+                    chain = dir_clusters[full]
+                    raw += _exfat_set(name, 0x10, chain[0], len(chain) * cluster_size, True)
+                else:
+                    chain = file_clusters[full]
+                    raw += _exfat_set(name, 0x20, chain[0] if chain else 0, len(files[full]),
+                                      full not in fragment)
+            write_chain(dir_clusters[d], raw)
+        write_chain(bitmap_clusters, bitmap)
+        for p, data in files.items():
+            write_chain(file_clusters[p], data)
+
+
+# ---------------------------------------------------------------- NTFS
+
+NTFS_RECORD = 1024
+NTFS_CLUSTER = 4096
+
+
+def _attr_resident(atype, value, attr_id):
+    header = struct.pack('<IIBBHHHIHBx', atype, 0, 0, 0, 0x18, 0, attr_id, len(value), 0x18, 0)
+    body = header + value
+    body = body.ljust(-(-len(body) // 8) * 8, b'\0')
+    return body[:4] + struct.pack('<I', len(body)) + body[8:]
+
+
+def _encode_runlist(extents):
+    out = b''
+    prev = 0
+    for lcn, count in extents:
+        length = count.to_bytes(-(-count.bit_length() // 8) or 1, 'little')
+        delta = lcn - prev
+        n = 1
+        while not -(1 << (8 * n - 1)) <= delta < (1 << (8 * n - 1)):
+            n += 1
+        off = delta.to_bytes(n, 'little', signed=True)
+        out += bytes([(len(off) << 4) | len(length)]) + length + off
+        prev = lcn
+    return out + b'\0'
+
+
+def _attr_nonresident(atype, extents, real_size, attr_id, start_vcn=0, flags=0):
+    runlist = _encode_runlist(extents)
+    clusters = sum(c for _, c in extents)
+    header = struct.pack('<IIBBHHHQQHH4xQQQ', atype, 0, 1, 0, 0x40, flags, attr_id,
+                         start_vcn, start_vcn + clusters - 1, 0x40, 0,
+                         clusters * NTFS_CLUSTER, real_size, real_size)
+    body = header + runlist
+    body = body.ljust(-(-len(body) // 8) * 8, b'\0')
+    return body[:4] + struct.pack('<I', len(body)) + body[8:]
+
+
+def _file_name(parent, name, size, is_dir):
+    value = struct.pack('<Q32xQQII', parent | (1 << 48), size, size, 0x10000000 if is_dir else 0x20, 0)
+    return value + struct.pack('<BB', len(name), 1) + name.encode('utf-16-le')
+
+
+def _mft_record(attrs, flags, base=0):
+    rec = bytearray(NTFS_RECORD)
+    body = b''.join(attrs) + struct.pack('<I', 0xFFFFFFFF) + b'\0' * 4
+    struct.pack_into('<4sHHQHHHHIIQHH', rec, 0, b'FILE', 0x30, 3, 0, 1, 1, 0x38, flags,
+                     0x38 + len(body), NTFS_RECORD, base, len(attrs), 0)
+    rec[0x38:0x38 + len(body)] = body
+    # update sequence array: sector tails are replaced by the USN
+    usn = b'\x01\x00'
+    rec[0x30:0x32] = usn
+    for i in range(1, 3):
+        end = i * SECTOR
+        rec[0x30 + 2 * i:0x32 + 2 * i] = rec[end - 2:end]
+        rec[end - 2:end] = usn
+    return bytes(rec)
+
+
+def build_ntfs(path, files, size=16 * 1024 * 1024, fragment=(), compressed=(), extension=()):
+    """fragment: files split in two extents; extension: $DATA in an extension record."""
+    dirs = _tree(files)
+    records = {}
+    numbers = {'': 5}
+    next_rec = 16
+    for d in dirs:
+        if d:
+            numbers[d] = next_rec
+            next_rec += 1
+    for p in files:
+        numbers[p] = next_rec
+        next_rec += 1
+        if p in extension:
+            next_rec += 1
+    mft_records = max(next_rec, 32)
+    mft_lcn = 4
+    mft_clusters = -(-mft_records * NTFS_RECORD // NTFS_CLUSTER)
+    next_lcn = [mft_lcn + mft_clusters + 2]
+    contents = []
+
+    def place(data, split):
+        count = -(-len(data) // NTFS_CLUSTER)
+        if split and count > 1:
+            half = count // 2
+            a = next_lcn[0]
+            b = a + half + 3
+            next_lcn[0] = b + count - half
+            extents = [(a, half), (b, count - half)]
+        else:
+            extents = [(next_lcn[0], count)]
+            next_lcn[0] += count
+        pos = 0
+        for lcn, c in extents:
+            contents.append((lcn * NTFS_CLUSTER, data[pos:pos + c * NTFS_CLUSTER]))
+            pos += c * NTFS_CLUSTER
+        return extents
+
+    mft_extents = [(mft_lcn, mft_clusters)]
+    records[0] = _mft_record([_attr_resident(0x30, _file_name(5, '$MFT', 0, False), 1),
+                              _attr_nonresident(0x80, mft_extents, mft_records * NTFS_RECORD, 2)], 0x01)
+    for i in range(1, 16):
+        if i != 5:
+            records[i] = _mft_record([], 0x01)
+    records[5] = _mft_record([_attr_resident(0x30, _file_name(5, '.', 0, True), 1)], 0x03)
+    for d in dirs:
+        if d:
+            parent = d.rsplit('/', 1)[0] if '/' in d else ''
+            records[numbers[d]] = _mft_record(
+                [_attr_resident(0x30, _file_name(numbers[parent], d.split('/')[-1], 0, True), 1)], 0x03)
+    for p, data in files.items():
+        parent = p.rsplit('/', 1)[0] if '/' in p else ''
+        name = _attr_resident(0x30, _file_name(numbers[parent], p.split('/')[-1], len(data), False), 1)
+        if p in compressed:
+            extents = place(data, False)
+            attrs = [name, _attr_nonresident(0x80, extents, len(data), 2, flags=0x0001)]
+        elif len(data) <= 600 and p not in fragment and p not in extension:
+            attrs = [name, _attr_resident(0x80, data, 2)]
+        else:
+            extents = place(data, p in fragment or p in extension)
+            if p in extension:
+                # first extent in the base record, the rest in an extension record
+                attrs = [name, _attr_resident(0x20, b'\0' * 32, 3),
+                         _attr_nonresident(0x80, extents[:1], len(data), 2)]
+                records[numbers[p] + 1] = _mft_record(
+                    [_attr_nonresident(0x80, extents[1:], 0, 1, start_vcn=extents[0][1])],
+                    0x01, base=numbers[p] | (1 << 48))
+            else:
+                attrs = [name, _attr_nonresident(0x80, extents, len(data), 2)]
+        records[numbers[p]] = _mft_record(attrs, 0x01)
+    # $Bitmap: boot area, MFT and every placed extent are in use
+    cluster_total = (size // SECTOR - 1) * SECTOR // NTFS_CLUSTER
+    bitmap_lcn = next_lcn[0]
+    next_lcn[0] += -(-cluster_total // 8 // NTFS_CLUSTER)
+    used = set(range(mft_lcn + mft_clusters + 2)) | set(range(bitmap_lcn, next_lcn[0]))
+    for offset, data in contents:
+        used.update(range(offset // NTFS_CLUSTER, -(-(offset + len(data)) // NTFS_CLUSTER)))
+    bitmap = _bitmap(used, cluster_total)
+    contents.append((bitmap_lcn * NTFS_CLUSTER, bitmap))
+    records[6] = _mft_record([_attr_resident(0x30, _file_name(5, '$Bitmap', len(bitmap), False), 1),
+                              _attr_nonresident(0x80, [(bitmap_lcn, next_lcn[0] - bitmap_lcn)], len(bitmap), 2)],
+                             0x01)
+
+    with open(path, 'wb') as f:
+        f.truncate(size)
+        bs = bytearray(SECTOR)
+        bs[0:3] = b'\xeb\x52\x90'
+        bs[3:11] = b'NTFS    '
+        struct.pack_into('<HB', bs, 0x0B, SECTOR, NTFS_CLUSTER // SECTOR)
+        struct.pack_into('<QQQb', bs, 0x28, size // SECTOR - 1, mft_lcn, mft_lcn + mft_clusters, -10)
+        bs[510:512] = b'\x55\xaa'
+        f.seek(0)
+        f.write(bs)
+        for n, rec in records.items():
+            f.seek(mft_lcn * NTFS_CLUSTER + n * NTFS_RECORD)
+            f.write(rec)
+        for offset, data in contents:
+            f.seek(offset)
+            f.write(data)
+
+
+EWF_SIGNATURE = b'EVF\x09\x0d\x0a\xff\x00'
+
+
+def _ewf_section(f, stype, data, last=False):
+    offset = f.tell()
+    size = 76 + len(data)
+    nxt = offset if last else offset + size
+    desc = struct.pack('<16sQQ40x', stype.encode(), nxt, size)
+    f.write(desc + struct.pack('<I', zlib.adler32(desc)) + data)
+    return offset
+
+
+def build_ewf(path, data, chunk_size=32768, segment_chunks=None, md5=None):
+    """Write `data` as an EWF image (.E01, .E02, ...); chunks compress when it pays off."""
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    per_segment = segment_chunks or len(chunks) or 1
+    groups = [chunks[i:i + per_segment] for i in range(0, len(chunks), per_segment)] or [[]]
+    stem = os.path.splitext(path)[0]
+    for number, group in enumerate(groups, 1):
+        with open('%s.E%02d' % (stem, number), 'wb') as f:
+            f.write(EWF_SIGNATURE + struct.pack('<BHH', 1, number, 0))
+            if number == 1:
+                _ewf_section(f, 'header', zlib.compress(b'1\nmain\nc\tn\na\ntest\n\n'))
+                volume = struct.pack('<B3xIIIQ', 1, len(chunks), chunk_size // SECTOR,
+                                     SECTOR, len(data) // SECTOR)
+                _ewf_section(f, 'volume', volume.ljust(1052, b'\0'))
+            base = f.tell()
+            body = b''
+            entries = []
+            for chunk in group:
+                packed = zlib.compress(chunk)
+                offset = 76 + len(body)
+                if len(packed) < len(chunk):
+                    entries.append(offset | 0x80000000)
+                    body += packed
+                else:
+                    entries.append(offset)
+                    body += chunk + struct.pack('<I', zlib.adler32(chunk))
+            _ewf_section(f, 'sectors', body)
+            header = struct.pack('<I4xQ4x', len(entries), base)
+            table = header + struct.pack('<I', zlib.adler32(header))
+            table += struct.pack('<%dI' % len(entries), *entries)
+            table += struct.pack('<I', zlib.adler32(table[24:]))
+            _ewf_section(f, 'table', table)
+            _ewf_section(f, 'table2', table)
+            if number < len(groups):
+                _ewf_section(f, 'next', b'', last=True)
+                continue
+            digest = (md5 or hashlib.md5(data).digest()) + hashlib.sha1(data).digest()
+            _ewf_section(f, 'digest', digest + b'\0' * 40 + struct.pack('<I', zlib.adler32(digest)))
+            _ewf_section(f, 'done', b'', last=True)
+
+
+def main():
+    p = argparse.ArgumentParser(description='Build small FAT32/exFAT/NTFS (and EWF) test images')
+    p.add_argument('output_dir', nargs='?', default='test_images')
+    args = p.parse_args()
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name, builder in (('fat32.img', build_fat32), ('exfat.img', build_exfat), ('ntfs.img', build_ntfs)):
+        out = os.path.join(args.output_dir, name)
+        builder(out, SAMPLE_FILES)
+        print("Created", out)
+    fat = os.path.join(args.output_dir, 'fat32.img')
+    with open(fat, 'rb') as f:
+        build_ewf(os.path.join(args.output_dir, 'fat32.E01'), f.read())
+    print("Created", os.path.join(args.output_dir, 'fat32.E01'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
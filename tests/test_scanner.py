@@ -10,11 +10,45 @@ import tempfile
 import shutil
 import json
 import csv
+import struct
+import uuid
+import zlib
+import hashlib
+import io
+import zipfile
+import tarfile
+import gzip
+import bz2
+import lzma
+import itertools
+import re
+import sqlite3
+import time
+import argparse
+from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from tools.modules import search
+from tools.modules import detectors
+from tools.modules import bip39
+from tools.modules import results as results_mod
+from tools.modules import image
+from tools.modules import filesystems
+from tools.modules import ewf
+from tools.modules import archives
+from tools.modules import knownfiles
+from tools.modules import verdict_cache
+from tools.modules import triage
+from tools.modules import yara_lite
+from tools.modules import metrics
+from tools.modules.progress import ProgressReporter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import create_test_images
+import benchmark_scanner
+import create_corpus
 
 
 class TestPatternMatching(unittest.TestCase):
@@ -63,6 +97,118 @@ class TestPatternMatching(unittest.TestCase):
             self.assertEqual(matched, should_match, msg)
 
 
+class TestDetectorPlan(unittest.TestCase):
+    """Test the compiled detector plan"""
+
+    def test_plan_matches_pattern_loop(self):
+        """Test that the plan reports the same pattern as the per-pattern loop"""
+        samples = [
+            '{"address": "0x1", "crypto": {"cipher": "aes-128-ctr"}}',
+            '{"Address" : "0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb"}',
+            'key=1234567890abcdef1234567890abcdef1234567890abcdef1234567890abcdef',
+            'abandon ability able about above absent absorb abstract absurd abuse access accident',
+            '"crypto" without a colon and nothing else',
+            'This is just normal text',
+        ]
+        for data in samples:
+            expected = None
+            for pattern in search.CONTENT_PATTERNS:
+                m = pattern.search(data)
+                if m:
+                    expected = (pattern.pattern, m.start(), m.end())
+                    break
+            hit = search.CONTENT_PLAN.search(data)
+            actual = (hit.pattern, hit.start, hit.end) if hit else None
+            self.assertEqual(actual, expected, f"Plan mismatch for: '{data[:50]}'")
+
+    def test_literal_prefix(self):
+        """Test literal prefix extraction used for prefilter gates"""
+        self.assertEqual(detectors.literal_prefix(r'"crypto"\s*:'), '"crypto"')
+        self.assertEqual(detectors.literal_prefix(r'wallets?'), 'wallet')
+        self.assertEqual(detectors.literal_prefix(r'[a-f0-9]{64}'), '')
+        self.assertEqual(detectors.literal_prefix(r'seed|phrase'), '')
+
+    def test_plan_stages(self):
+        """Test that literal detectors are gated and regexes are merged"""
+        kinds = [stage[0] for stage in search.CONTENT_PLAN.stages]
+        self.assertEqual(kinds.count('literal'), 2)
+        self.assertEqual(kinds.count('group'), 1)
+
+
+class TestMnemonicDetector(unittest.TestCase):
+    """Test the BIP39 mnemonic detector"""
+
+    VALID_12 = "legal winner thank year wave sausage worth useful legal winner thank yellow"
+    VALID_24 = ("void come effort suffer camp survey warrior heavy shoot primary clutch crush "
+                "open amazing screen patrol group space point ten exist slush involve unfold")
+
+    def test_wordlist(self):
+        """Test the embedded English wordlist"""
+        self.assertEqual(len(bip39.ENGLISH), 2048)
+        self.assertEqual(list(bip39.ENGLISH), sorted(bip39.ENGLISH))
+        self.assertEqual(len({w[:4] for w in bip39.ENGLISH}), 2048)
+
+    def test_checksum(self):
+        """Test BIP39 checksum verification"""
+        self.assertTrue(bip39.bip39_checksum_valid(self.VALID_12.split()))
+        self.assertTrue(bip39.bip39_checksum_valid(self.VALID_24.split()))
+        self.assertTrue(bip39.bip39_checksum_valid(("zoo " * 11 + "wrong").split()))
+        self.assertFalse(bip39.bip39_checksum_valid(("zoo " * 12).split()))
+
+    def test_detects_runs(self):
+        """Test run detection in str and bytes, including numbered backups"""
+        detector = bip39.MnemonicDetector()
+        text = "backup: " + self.VALID_24 + ". done"
+        m = detector.search(text)
+        self.assertIsNotNone(m)
+        self.assertEqual(text[m.start():m.end()], self.VALID_24)
+        self.assertEqual(detector.search(text.encode()).span(), m.span())
+
+        numbered = " ".join(f"{i + 1}. {w}" for i, w in enumerate(self.VALID_12.split()))
+        self.assertEqual(detector.search(numbered).words, self.VALID_12.split())
+
+    def test_detects_embedded(self):
+        """Test phrases glued to JSON, ini, XML and quoting syntax"""
+        detector = bip39.MnemonicDetector(verify_checksum=True)
+        for text in ('{"mnemonic": "%s"}' % self.VALID_12,
+                     '[wallet]\nphrase=%s\n' % self.VALID_12,
+                     '<phrase>%s</phrase>' % self.VALID_12,
+                     "{'phrase': '%s'}" % self.VALID_12):
+            for data in (text, text.encode()):
+                m = detector.search(data)
+                self.assertIsNotNone(m, text)
+                self.assertEqual(m.words, self.VALID_12.split())
+                self.assertEqual(m.group(), self.VALID_12 if isinstance(data, str) else self.VALID_12.encode())
+        plain = bip39.MnemonicDetector()
+        self.assertIsNotNone(plain.search('seed=%s' % self.VALID_12))
+        self.assertIsNotNone(plain.search(b"{'x': '%s'}" % self.VALID_24.encode()))
+
+    def test_long_gaps_break_runs(self):
+        """Test that long or binary gaps between words break a run and spans stay within max_match_len"""
+        detector = bip39.MnemonicDetector()
+        words = self.VALID_12.split()
+        for gap in (b"\x00" * 5000, b" " * (bip39.MAX_GAP + 1), b" \x00 ", b"\xff"):
+            self.assertIsNone(detector.search(gap.join(w.encode() for w in words)), gap[:4])
+        self.assertIsNone(detector.search(("\x00" * 5000).join(words)))
+        widest = (b" " * bip39.MAX_GAP).join([b"abstract"] * 24)
+        m = detector.search(widest)
+        self.assertEqual(m.span(), (0, len(widest)))
+        self.assertLessEqual(len(widest), detector.max_match_len)
+
+    def test_ignores_prose(self):
+        """Test that ordinary prose does not produce mnemonic hits"""
+        detector = bip39.MnemonicDetector()
+        prose = "The quick brown fox jumps over the lazy dog while the cat sleeps. " * 2000
+        self.assertIsNone(detector.search(prose))
+
+    def test_verify_checksum(self):
+        """Test that checksum mode only reports valid mnemonics"""
+        detector = bip39.MnemonicDetector(verify_checksum=True)
+        self.assertIsNone(detector.search("abandon ability able about above absent absorb abstract absurd abuse access accident"))
+        m = detector.search("note " + self.VALID_12 + " end")
+        self.assertEqual(m.words, self.VALID_12.split())
+
+
 class TestMasking(unittest.TestCase):
     """Test masking functions"""
 
@@ -140,7 +286,8 @@ class TestScanner(unittest.TestCase):
 
         # Check output files exist
         csv_files = [f for f in os.listdir(self.output_dir) if f.endswith('.csv')]
-        json_files = [f for f in os.listdir(self.output_dir) if f.endswith('.json')]
+        json_files = [f for f in os.listdir(self.output_dir)
+                      if f.startswith('scan_results_') and f.endswith('.json')]
 
         self.assertGreater(len(csv_files), 0, "Should generate CSV output")
         self.assertGreater(len(json_files), 0, "Should generate JSON output")
@@ -168,7 +315,8 @@ class TestScanner(unittest.TestCase):
         search.scan(self.test_dir, self.output_dir)
 
         # Read results
-        json_files = [f for f in os.listdir(self.output_dir) if f.endswith('.json')]
+        json_files = [f for f in os.listdir(self.output_dir)
+                      if f.startswith('scan_results_') and f.endswith('.json')]
         json_path = os.path.join(self.output_dir, json_files[0])
 
         with open(json_path, 'r') as f:
@@ -183,6 +331,64 @@ class TestScanner(unittest.TestCase):
             if '123456' in snippet:  # If hex was detected
                 self.assertIn('*', snippet, "Should contain masking asterisks")
 
+    def test_scan_streams_jsonl(self):
+        """Test that hits are streamed as api_spec JSONL and the JSON report is built from it"""
+        with open(os.path.join(self.test_dir, "wallet.dat"), 'w') as f:
+            f.write("plain")
+        with open(os.path.join(self.test_dir, "notes.txt"), 'w') as f:
+            f.write('{"crypto": {"cipher": "aes-128-ctr"}}')
+
+        search.scan(self.test_dir, self.output_dir, case="case-1")
+
+        names = sorted(os.listdir(self.output_dir))
+        jsonl_name = [n for n in names if n.endswith('.jsonl')][0]
+        with open(os.path.join(self.output_dir, jsonl_name)) as f:
+            records = [json.loads(line) for line in f]
+        with open(os.path.join(self.output_dir, jsonl_name[:-1])) as f:
+            results = json.load(f)
+
+        self.assertEqual(len(records), 2)
+        for key in ('case', 'path', 'filesize', 'pattern', 'snippet', 'sha256', 'timestamp', 'scanner_version'):
+            self.assertIn(key, records[0])
+        self.assertEqual(records[0]['case'], "case-1")
+        self.assertEqual(sorted(r['pattern'].split(':')[0] for r in records), ['content', 'filename'])
+        self.assertEqual(results, [{k: v for k, v in r.items() if k not in results_mod.ENVELOPE} for r in records])
+
+    def test_jsonl_rerun_truncates(self):
+        """Test that a rerun writing to the same JSONL name does not append to the earlier stream"""
+        path = os.path.join(self.output_dir, "scan_results_same_second.jsonl")
+        for _ in range(2):
+            with results_mod.JsonlWriter(path) as writer:
+                writer.write({'path': 'a'})
+                writer.write({'path': 'b'})
+        self.assertEqual([r['path'] for r in results_mod.iter_jsonl(path)], ['a', 'b'])
+        with results_mod.JsonlWriter(path, append=True) as writer:
+            writer.write({'path': 'c'})
+        self.assertEqual([r['path'] for r in results_mod.iter_jsonl(path)], ['a', 'b', 'c'])
+
+    def test_scan_progress_events(self):
+        """Test that progress events are written to the case logs and status.json"""
+        for i in range(5):
+            name = "wallet_%d.txt" % i if i == 0 else "file_%d.txt" % i
+            with open(os.path.join(self.test_dir, name), 'w') as f:
+                f.write("plain text")
+        case_dir = tempfile.mkdtemp(prefix="scanner_case_")
+        self.addCleanup(shutil.rmtree, case_dir, True)
+
+        search.scan(self.test_dir, self.output_dir, case_dir=case_dir, precount_files=True)
+
+        with open(os.path.join(case_dir, "logs", "status.json")) as f:
+            status = json.load(f)
+        self.assertEqual(status['event'], 'progress')
+        self.assertEqual(status['progress'], 100)
+        self.assertEqual(status['files_scanned'], 5)
+        self.assertEqual(status['bytes_scanned'], 5 * 10)
+        self.assertEqual(status['hits_found'], 1)
+        with open(os.path.join(case_dir, "logs", "process.log")) as f:
+            events = [json.loads(line) for line in f]
+        self.assertGreaterEqual(len(events), 2, "Start and final event expected")
+        self.assertTrue(all(e['event'] == 'progress' and 'timestamp' in e for e in events))
+
     def test_scan_respects_file_size_limit(self):
         """Test that large files are handled correctly"""
         # Create a large file
@@ -202,6 +408,164 @@ class TestScanner(unittest.TestCase):
 
         self.assertTrue(success, "Scanner should handle large files gracefully")
 
+    def test_large_file_full_coverage(self):
+        """Test that hits at the end of large files and across window boundaries are found"""
+        config = search.ScanConfig(max_full_read=1000, window_size=8192)
+        hex_key = "1234567890abcdef" * 4
+
+        tail_file = os.path.join(self.test_dir, "dump_tail.txt")
+        with open(tail_file, 'w') as f:
+            f.write("lorem ipsum " * 50000 + "key=" + hex_key + "\n")
+
+        step = config.window_size - config.plan.max_match_len
+        boundary_file = os.path.join(self.test_dir, "dump_boundary.txt")
+        with open(boundary_file, 'w') as f:
+            f.write("x" * (step * 3 - 20) + " " + hex_key + " " + "y" * 20000)
+
+        hits = {r['filename']: r for r in search.iter_scan(self.test_dir, config=config)}
+        self.assertIn("dump_tail.txt", hits, "Hit at the end of a large file should be found")
+        self.assertIn("dump_boundary.txt", hits, "Hit across a window boundary should be found")
+        self.assertTrue(hits["dump_tail.txt"]['sensitive'])
+
+        head_only = search.ScanConfig(max_full_read=1000, large_files='head', head_size=1000)
+        names = [r['filename'] for r in search.iter_scan(self.test_dir, config=head_only)]
+        self.assertNotIn("dump_tail.txt", names, "Head mode should only inspect the file head")
+
+    def test_zero_windows_are_hashed_not_searched(self):
+        """Test that all-zero windows skip detection but still count towards the digests"""
+        config = search.ScanConfig(max_full_read=1000, window_size=8192)
+        content = bytes(50000) + b" " + b"ab" * 32 + b" " + bytes(30000)
+        path = os.path.join(self.test_dir, "sparse.bin")
+        with open(path, 'wb') as f:
+            f.write(content)
+        hit, offset, _, digests, skipped, _ = search.read_and_detect(path, len(content), config)
+        self.assertEqual(offset, 50001)
+        self.assertEqual(digests['sha256'], hashlib.sha256(content).hexdigest())
+        self.assertGreater(skipped, 60000)
+        chunks = [content[i:i + 4096] for i in range(0, len(content), 4096)]
+        hit2, offset2, _, digests2, skipped2, _ = search.detect_chunks(chunks, len(content), config)
+        self.assertEqual((hit2.pattern, offset2, digests2), (hit.pattern, offset, digests))
+        self.assertGreater(skipped2, 60000)
+
+    def test_content_offsets_are_byte_offsets(self):
+        """Test that content offsets are true byte offsets, also in binary and large files"""
+        hex_key = b"1234567890abcdef" * 4
+        prefix = "Schlüssel für Köln: ".encode("utf-8") + b"\x00\xff\xfe" * 10
+        with open(os.path.join(self.test_dir, "blob.bin"), 'wb') as f:
+            f.write(prefix + hex_key + b"\x00" * 100)
+        big_prefix = b"\x00\x01" * 40000
+        with open(os.path.join(self.test_dir, "big.bin"), 'wb') as f:
+            f.write(big_prefix + b" " + hex_key + b" " + b"\x02" * 5000)
+
+        config = search.ScanConfig(max_full_read=10000, window_size=8192)
+        hits = {r['filename']: r for r in search.iter_scan(self.test_dir, config=config)}
+        self.assertEqual(hits["blob.bin"]['content_offset'], len(prefix))
+        self.assertEqual(hits["big.bin"]['content_offset'], len(big_prefix) + 1)
+
+    def test_fused_digests(self):
+        """Test that hashes from the detection pass match independent hashes"""
+        import hashlib
+        small = os.path.join(self.test_dir, "wallet_small.dat")
+        large = os.path.join(self.test_dir, "wallet_large.dat")
+        with open(small, 'wb') as f:
+            f.write(b'{"crypto": {"cipher": "aes-128-ctr"}}')
+        with open(large, 'wb') as f:
+            f.write(os.urandom(50000) + b'{"crypto": 1}' + os.urandom(30000))
+
+        for mode in ('full', 'head'):
+            config = search.ScanConfig(max_full_read=20000, window_size=8192, large_files=mode,
+                                       head_size=1000, digests=('sha256', 'md5', 'sha1'))
+            hits = {r['filename']: r for r in search.iter_scan(self.test_dir, config=config)}
+            for name, path in (("wallet_small.dat", small), ("wallet_large.dat", large)):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                self.assertEqual(hits[name]['sha256'], search.file_sha256(path))
+                self.assertEqual(hits[name]['md5'], hashlib.md5(data).hexdigest())
+                self.assertEqual(hits[name]['sha1'], hashlib.sha1(data).hexdigest())
+
+    def test_walker_skips_links_and_special_files(self):
+        """Test that the scandir walker visits hardlinked files once and skips FIFOs and symlinks"""
+        sub = os.path.join(self.test_dir, "sub")
+        os.makedirs(sub)
+        target = os.path.join(self.test_dir, "wallet.dat")
+        with open(target, 'w') as f:
+            f.write("wallet")
+        os.link(target, os.path.join(sub, "wallet_link.dat"))
+        os.symlink(target, os.path.join(sub, "wallet_symlink.dat"))
+        os.symlink(self.test_dir, os.path.join(sub, "loop"))
+        if hasattr(os, 'mkfifo'):
+            os.mkfifo(os.path.join(sub, "pipe"))
+
+        stats = {}
+        walked = list(search.walk_files(self.test_dir, stats))
+
+        self.assertEqual(len(walked), 1, "Hardlinked file must be visited once")
+        full, rel, fn, st = walked[0]
+        self.assertEqual(os.stat(full).st_ino, os.stat(target).st_ino)
+        self.assertEqual(stats['hardlinks'], 1)
+        self.assertEqual(stats['symlinks'], 2)
+        if hasattr(os, 'mkfifo'):
+            self.assertEqual(stats['special'], 1)
+
+    def test_iter_windows(self):
+        """Test that windows cover the whole file with the requested overlap"""
+        windows = list(search.iter_windows(10000, 4096, 1000))
+        self.assertEqual(windows[0], (0, 4096))
+        self.assertEqual(windows[-1][1], 10000)
+        for (s1, e1), (s2, e2) in zip(windows, windows[1:]):
+            self.assertEqual(e1 - s2, 1000)
+
+    def test_parallel_scan_matches_serial(self):
+        """Test that a multi-process scan produces the same results as a serial scan"""
+        for i in range(40):
+            sub = os.path.join(self.test_dir, f"dir{i % 4}")
+            os.makedirs(sub, exist_ok=True)
+            name = "wallet_%02d.dat" % i if i % 3 == 0 else "note_%02d.txt" % i
+            with open(os.path.join(sub, name), 'w') as f:
+                f.write('{"crypto": {"cipher": "aes-128-ctr"}}' if i % 5 == 0 else "plain text")
+
+        serial = list(search.iter_scan(self.test_dir, workers=1))
+        parallel = list(search.iter_scan(self.test_dir, workers=2, batch_size=3))
+
+        self.assertGreater(len(serial), 0, "Should find hits")
+        self.assertEqual(serial, parallel, "Parallel scan must match serial scan including order")
+
+    def test_scan_index_resume(self):
+        """Test that the scan index skips unchanged files and rescans modified ones"""
+        keystore = os.path.join(self.test_dir, "keystore.json")
+        with open(keystore, 'w') as f:
+            f.write('{"crypto": {"cipher": "aes-128-ctr"}}')
+        note = os.path.join(self.test_dir, "note.txt")
+        with open(note, 'w') as f:
+            f.write("plain text")
+        index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir)
+        index_path = os.path.join(index_dir, "scan_index.sqlite")
+        config = search.ScanConfig()
+
+        with search.ScanIndex(index_path, config.version()) as index:
+            first = list(search.iter_scan(self.test_dir, config=config, index=index))
+            self.assertEqual(index.stored, 2)
+
+        with search.ScanIndex(index_path, config.version()) as index:
+            second = list(search.iter_scan(self.test_dir, config=config, index=index))
+            self.assertEqual(index.hits, 2, "Unchanged files should come from the index")
+            self.assertEqual(index.stored, 0)
+        self.assertEqual(first, second)
+
+        with open(note, 'w') as f:
+            f.write("now with a 0x" + "ab" * 32 + " key")
+        os.utime(note, ns=(0, 10 ** 18))
+        with search.ScanIndex(index_path, config.version()) as index:
+            third = list(search.iter_scan(self.test_dir, config=config, index=index))
+            self.assertEqual(index.stored, 1, "Modified file should be rescanned")
+        self.assertEqual(len(third), 2)
+
+        other = search.ScanConfig(large_files='head')
+        with search.ScanIndex(index_path, other.version()) as index:
+            list(search.iter_scan(self.test_dir, config=other, index=index))
+            self.assertEqual(index.hits, 0, "A different plan/config version must not reuse verdicts")
+
     def test_file_sha256(self):
         """Test SHA-256 hash calculation"""
         test_file = os.path.join(self.test_dir, "test.txt")
@@ -217,6 +581,1360 @@ class TestScanner(unittest.TestCase):
         self.assertEqual(sha256, expected, "SHA-256 hash should match")
 
 
+def _mbr_entry(ptype, lba, count):
+    return struct.pack('<B3xB3xII', 0, ptype, lba, count)
+
+def make_mbr_image(path, size, entries, ebrs=()):
+    """Write a sparse raw image with an MBR; ebrs is a list of (lba, entry1, entry2)."""
+    with open(path, 'wb') as f:
+        f.truncate(size)
+        table = b''.join(entries).ljust(64, b'\0')
+        f.seek(446)
+        f.write(table + b'\x55\xaa')
+        for lba, first, second in ebrs:
+            f.seek(lba * 512 + 446)
+            f.write((first + second).ljust(64, b'\0') + b'\x55\xaa')
+
+def make_gpt_image(path, size, parts):
+    """Write a sparse raw image with a protective MBR and a GPT; parts are (first, last, name)."""
+    entries = b''
+    for first, last, name in parts:
+        entries += (uuid.UUID('0fc63daf-8483-4772-8e79-3d69d8477de4').bytes_le + uuid.uuid4().bytes_le
+                    + struct.pack('<QQQ', first, last, 0) + name.encode('utf-16-le').ljust(72, b'\0'))
+    entries = entries.ljust(128 * 128, b'\0')
+    last_lba = size // 512 - 1
+    header = struct.pack('<8sIIIIQQQQ16sQIII', b'EFI PART', 0x10000, 92, 0, 0, 1, last_lba,
+                         34, last_lba - 33, uuid.uuid4().bytes_le, 2, 128, 128,
+                         zlib.crc32(entries) & 0xffffffff)
+    header = header[:16] + struct.pack('<I', zlib.crc32(header) & 0xffffffff) + header[20:]
+    make_mbr_image(path, size, [_mbr_entry(0xEE, 1, last_lba)])
+    with open(path, 'r+b') as f:
+        f.seek(512)
+        f.write(header)
+        f.seek(1024)
+        f.write(entries)
+
+
+class TestImageScan(unittest.TestCase):
+    """Test mount-free scanning of raw disk images"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="image_test_")
+        self.output_dir = tempfile.mkdtemp(prefix="image_output_")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_mbr_with_logical_partitions(self):
+        """Test MBR parsing including logical partitions in an extended partition"""
+        path = os.path.join(self.test_dir, "disk.img")
+        make_mbr_image(path, 8 * 1024 * 1024,
+                       [_mbr_entry(0x83, 2048, 4096), _mbr_entry(0x05, 6144, 8192)],
+                       ebrs=[(6144, _mbr_entry(0x0b, 2048, 2048), _mbr_entry(0x05, 4096, 4096)),
+                             (10240, _mbr_entry(0x83, 2048, 2048), b'')])
+        with image.RawImage(path) as img:
+            parts = image.partitions(img)
+        self.assertEqual([(p.index, p.start // 512, p.size // 512) for p in parts],
+                         [(1, 2048, 4096), (5, 8192, 2048), (6, 12288, 2048)])
+
+    def test_gpt_partitions(self):
+        """Test GPT parsing, including the backup header when the primary is damaged"""
+        path = os.path.join(self.test_dir, "gpt.img")
+        make_gpt_image(path, 4 * 1024 * 1024, [(2048, 4095, "data"), (4096, 6143, "home")])
+        with image.RawImage(path) as img:
+            parts = image.partitions(img)
+        self.assertEqual([(p.index, p.start, p.name) for p in parts],
+                         [(1, 2048 * 512, "data"), (2, 4096 * 512, "home")])
+        self.assertEqual(parts[0].scheme, 'gpt')
+
+    def test_block_cache(self):
+        """Test cached reads across block borders"""
+        path = os.path.join(self.test_dir, "blocks.img")
+        data = os.urandom(300000)
+        with open(path, 'wb') as f:
+            f.write(data)
+        with image.RawImage(path, block_size=4096, cache_blocks=4) as img:
+            self.assertEqual(img.read(4000, 10000), data[4000:14000])
+            self.assertEqual(img.read(4000, 200), data[4000:4200])
+            self.assertGreater(img.cache_hits, 0)
+            self.assertEqual(img.read(299990, 100), data[299990:])
+            self.assertLessEqual(len(img._cache), 4)
+
+    def test_empty_space_is_skipped(self):
+        """Test that sparse and all-zero image regions are skipped and counted"""
+        self.assertTrue(image.is_zero(bytes(3 * len(image.ZERO_BLOCK) + 5)))
+        self.assertFalse(image.is_zero(bytes(len(image.ZERO_BLOCK) + 5) + b"\x01"))
+        path = os.path.join(self.test_dir, "disk.img")
+        make_mbr_image(path, 32 * 1024 * 1024, [_mbr_entry(0x83, 2048, 40960)])
+        plant = 15 * 1024 * 1024
+        with open(path, 'r+b') as f:
+            f.seek(2048 * 512 + plant)
+            f.write(b'{"crypto": {"cipher": "aes-128-ctr"}}')
+        with image.RawImage(path) as img:
+            self.assertLessEqual(img.next_data(4096), 2048 * 512 + plant)
+
+        progress = ProgressReporter(None)
+        hits = list(search.iter_image_scan(path, progress=progress))
+        self.assertEqual([h['path'] for h in hits], ['p1@%d' % (plant + 1)])
+        self.assertEqual(progress.bytes_scanned, 40960 * 512)
+        self.assertGreater(progress.bytes_skipped, 18 * 1024 * 1024)
+        self.assertLess(progress.bytes_skipped, 40960 * 512)
+
+    def test_raw_partition_reports_every_hit(self):
+        """Test that the raw scan of a partition without a supported filesystem reports every match in a window"""
+        path = os.path.join(self.test_dir, "disk.img")
+        make_mbr_image(path, 16 * 1024 * 1024, [_mbr_entry(0x83, 2048, 8192)])
+        plants = [1000, 2000, 3000000, 3001000]
+        with open(path, 'r+b') as f:
+            for offset in plants:
+                f.seek(2048 * 512 + offset)
+                f.write(b'{"crypto": {"cipher": "aes-128-ctr"}}')
+        expected = ['p1@%d' % (offset + 1) for offset in plants]
+        self.assertEqual([h['path'] for h in search.iter_image_scan(path)], expected)
+        self.assertEqual([h['path'] for h in search.iter_image_scan(path, workers=2)], expected)
+
+    def test_image_scan_reports_partition_offsets(self):
+        """Test that hits in every partition are found, including across chunk borders"""
+        path = os.path.join(self.test_dir, "disk.img")
+        make_mbr_image(path, 64 * 1024 * 1024,
+                       [_mbr_entry(0x83, 2048, 40960), _mbr_entry(0x83, 43008, 40960)])
+        keystore = b'{"crypto": {"cipher": "aes-128-ctr"}}'
+        hexkey = b"0x" + b"ab" * 32
+        # second hit straddles the IMAGE_CHUNK border of partition 1
+        plants = [(1, 2048, 5000, keystore), (1, 2048, search.IMAGE_CHUNK - 10, hexkey),
+                  (2, 43008, 123456, keystore)]
+        with open(path, 'r+b') as f:
+            for _, lba, offset, blob in plants:
+                f.seek(lba * 512 + offset)
+                f.write(blob)
+
+        hits = list(search.iter_image_scan(path))
+        self.assertIsNone(search._IMAGE, "A serial scan closes its image handle")
+        self.assertEqual([h['path'] for h in hits], ['p1@5001', 'p1@%d' % (search.IMAGE_CHUNK - 8), 'p2@123457'])
+        self.assertTrue(hits[1]['sensitive'])
+        self.assertEqual(list(search.iter_image_scan(path, workers=2)), hits)
+
+        search.scan(None, self.output_dir, image_path=path)
+        with open([os.path.join(self.output_dir, n) for n in os.listdir(self.output_dir)
+                   if n.endswith('.jsonl')][0]) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0]['pattern'].split(':')[0], 'content')
+
+
+class TestFilesystems(unittest.TestCase):
+    """Test the read-only FAT32/exFAT/NTFS readers on generated images"""
+
+    FILES = dict(create_test_images.SAMPLE_FILES)
+    FILES["big/fragmented.bin"] = bytes(range(256)) * 200
+    FILES["empty.txt"] = b""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="fs_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _check(self, builder, kind, **kwargs):
+        path = os.path.join(self.test_dir, kind + ".img")
+        builder(path, self.FILES, fragment=("big/fragmented.bin",), **kwargs)
+        with image.RawImage(path) as img:
+            part = image.partitions(img)[0]
+            fs = filesystems.open_filesystem(img, part)
+            self.assertIsNotNone(fs, "Filesystem should be recognised")
+            self.assertEqual(fs.kind, kind)
+            found = {f.path: f for f in fs.walk()}
+            contents = {p: b''.join(filesystems.iter_file_chunks(img, f, 4096)) for p, f in found.items()}
+        self.assertEqual(sorted(found), sorted(self.FILES))
+        for p, data in self.FILES.items():
+            self.assertEqual(found[p].size, len(data), p)
+            self.assertEqual(contents[p], data, p)
+        return found
+
+    def test_fat32(self):
+        """Test FAT32 long names, subdirectories and fragmented cluster chains"""
+        found = self._check(create_test_images.build_fat32, 'fat32')
+        self.assertGreater(len(found["big/fragmented.bin"].runs), 1)
+
+    def test_exfat(self):
+        """Test exFAT entry sets, contiguous files and FAT-chained files"""
+        found = self._check(create_test_images.build_exfat, 'exfat')
+        self.assertGreater(len(found["big/fragmented.bin"].runs), 1)
+
+    def test_ntfs(self):
+        """Test NTFS MFT enumeration, resident data, run lists and extension records"""
+        found = self._check(create_test_images.build_ntfs, 'ntfs',
+                            extension=("AppData/Electrum/wallets/default_wallet",))
+        self.assertIsNotNone(found["readme.txt"].data, "Small files are resident")
+        self.assertEqual(len(found["AppData/Electrum/wallets/default_wallet"].runs), 2)
+
+    def test_ntfs_compressed_file_has_no_content(self):
+        """Test that compressed NTFS files are listed without readable runs"""
+        path = os.path.join(self.test_dir, "ntfs.img")
+        create_test_images.build_ntfs(path, {"wallet.dat": b"z" * 9000}, compressed=("wallet.dat",))
+        with image.RawImage(path) as img:
+            files = list(filesystems.open_filesystem(img, image.partitions(img)[0]).walk())
+        self.assertEqual([(f.path, f.size, f.runs) for f in files], [("wallet.dat", 9000, None)])
+
+    def test_image_scan_uses_filesystem_paths(self):
+        """Test that an image scan reports partition-qualified file paths"""
+        fs_path = os.path.join(self.test_dir, "fat.img")
+        create_test_images.build_fat32(fs_path, self.FILES, size=8 * 1024 * 1024)
+        disk = os.path.join(self.test_dir, "disk.img")
+        make_mbr_image(disk, 10 * 1024 * 1024, [_mbr_entry(0x0c, 2048, 16384)])
+        with open(fs_path, 'rb') as src, open(disk, 'r+b') as dst:
+            dst.seek(2048 * 512)
+            dst.write(src.read())
+
+        hits = list(search.iter_image_scan(disk))
+        paths = [h['path'] for h in hits]
+        self.assertIn("p1/Documents/keystore.json", paths)
+        self.assertIn("p1/AppData/Electrum/wallets/default_wallet", paths)
+        seed = [h for h in hits if h['path'].endswith("Seed Phrase Backup.txt")][0]
+        self.assertTrue(seed['sensitive'])
+        self.assertEqual(seed['content_offset'], 5007)
+        self.assertEqual(seed['sha256'], hashlib.sha256(self.FILES["Documents/Backups/Seed Phrase Backup.txt"]).hexdigest())
+        self.assertEqual(list(search.iter_image_scan(disk, workers=2, batch_size=2)), hits)
+
+
+class TestCarving(unittest.TestCase):
+    """Test carving of free clusters, file slack and unpartitioned space"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="carve_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_free_ranges_exclude_files(self):
+        """Test that free clusters never overlap file extents on any filesystem"""
+        for builder in (create_test_images.build_fat32, create_test_images.build_exfat,
+                        create_test_images.build_ntfs):
+            path = os.path.join(self.test_dir, "fs.img")
+            builder(path, TestFilesystems.FILES, fragment=("big/fragmented.bin",))
+            with image.RawImage(path) as img:
+                fs = filesystems.open_filesystem(img, image.partitions(img)[0])
+                free = fs.free_ranges()
+                used = [r for f in fs.walk() for r in f.runs or () if r[0] is not None]
+                slack = filesystems.slack_ranges(fs)
+            self.assertGreater(sum(n for _, n in free), 8 * 1024 * 1024, fs.kind)
+            self.assertTrue(slack, fs.kind)
+            for off, length in used + slack:
+                for free_off, free_len in free:
+                    self.assertTrue(off + length <= free_off or free_off + free_len <= off, fs.kind)
+
+    def test_bitmap_free(self):
+        """Test free-extent decoding of allocation bitmaps"""
+        self.assertEqual(filesystems.bitmap_free(b"\xff\x00\x00\xf0", 32), [(8, 20)])
+        self.assertEqual(filesystems.bitmap_free(b"\x05\xff", 16), [(1, 1), (3, 5)])
+        self.assertEqual(filesystems.bitmap_free(b"\xff\x01", 12), [(9, 3)])
+
+    def test_fat_free_entries(self):
+        """Test that free FAT32 entries are found entry-aligned, ignoring the reserved top bits"""
+        path = os.path.join(self.test_dir, "fat.img")
+        create_test_images.build_fat32(path, TestFilesystems.FILES, size=8 * 1024 * 1024)
+        with image.RawImage(path) as img:
+            fs = filesystems.open_filesystem(img, image.partitions(img)[0])
+            fat_offset, total = fs.fat_offset, fs.cluster_count + 2
+        # free with reserved bits set, then allocated entries whose bytes look free when read off by one
+        patch = [0x10000000, 0, 0x05, 0x00000100, 0x00001000, 0, 0xF0000000, 0x0FFFFFFF]
+        first = total - len(patch) - 4
+        with open(path, 'r+b') as f:
+            f.seek(fat_offset + 4 * first)
+            f.write(struct.pack('<%dI' % len(patch), *patch))
+            f.seek(fat_offset)
+            entries = struct.unpack('<%dI' % total, f.read(4 * total))
+        expected = []
+        for c in range(2, total):
+            if not entries[c] & 0x0FFFFFFF:
+                if expected and expected[-1][0] + expected[-1][1] == c:
+                    expected[-1][1] += 1
+                else:
+                    expected.append([c, 1])
+        with image.RawImage(path) as img:
+            fs = filesystems.open_filesystem(img, image.partitions(img)[0])
+            self.assertEqual(fs.free_ranges(), [(fs._cluster_offset(c), n * fs.cluster_size) for c, n in expected])
+
+    def test_carve_tasks_are_block_aligned(self):
+        """Test that carving ranges are cut at block-aligned offsets and batched"""
+        tasks = list(search._carve_tasks([(100, 5000), (9000, 9100)], block=4096))
+        self.assertEqual(tasks, [([(100, 4096, 5000), (4096, 5000, 5000)], 4900),
+                                 ([(9000, 9100, 9100)], 100)])
+
+    def test_carve_unallocated(self):
+        """Test that deleted content is carved with image offsets, and allocated files are skipped"""
+        fs_path = os.path.join(self.test_dir, "fat.img")
+        create_test_images.build_fat32(fs_path, TestFilesystems.FILES, size=8 * 1024 * 1024)
+        disk = os.path.join(self.test_dir, "disk.img")
+        part_start = 2048 * 512
+        make_mbr_image(disk, 12 * 1024 * 1024, [_mbr_entry(0x0c, 2048, 16384)])
+        with open(fs_path, 'rb') as src, open(disk, 'r+b') as dst:
+            dst.seek(part_start)
+            dst.write(src.read())
+        with image.RawImage(disk) as img:
+            fs = filesystems.open_filesystem(img, image.partitions(img)[0])
+            files = {f.path: f for f in fs.walk()}
+        readme = files["readme.txt"].runs[-1]
+        keystore = b'{"crypto": {"cipher": "aes-128-ctr"}}'
+        hexkey = b" " + b"cd" * 32 + b" "
+        plants = [(part_start + 6 * 1024 * 1024 + i * 5000, hexkey) for i in range(12)]
+        plants += [(readme[0] + readme[1], hexkey), (10 * 1024 * 1024, keystore)]
+        with open(disk, 'r+b') as f:
+            for offset, blob in plants:
+                f.seek(offset)
+                f.write(blob)
+        expected = ['image@%d' % (offset + 1) for offset, _ in sorted(plants)]
+
+        config = search.ScanConfig(window_size=16384)
+        hits = list(search.iter_carve(disk, config=config))
+        self.assertEqual([h['path'] for h in hits], expected)
+        self.assertTrue(all(h['sensitive'] for h in hits[:-1]))
+        self.assertEqual(list(search.iter_carve(disk, workers=2, config=config)), hits)
+
+        # 'all' also sees the allocated keystore.json
+        allocated = 'image@%d' % (files["Documents/keystore.json"].runs[0][0] + 1)
+        self.assertNotIn(allocated, expected)
+        self.assertIn(allocated, [h['path'] for h in search.iter_carve(disk, 'all', config=config)])
+
+
+def _zip_bytes(files, compression=zipfile.ZIP_DEFLATED):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', compression) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+class TestArchives(unittest.TestCase):
+    """Test in-place scanning of archive members"""
+
+    KEYSTORE = b'{"crypto": {"cipher": "aes-128-ctr"}}'
+    SEED = b"backup key " + b"ab" * 32 + b"\n"
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="archive_test_")
+        inner = _zip_bytes({"wallets/keystore.json": self.KEYSTORE, "readme.txt": b"nothing here"})
+        tar_buf = io.BytesIO()
+        with tarfile.open(fileobj=tar_buf, mode='w:gz') as tf:
+            for name, data in (("inner.zip", inner), ("notes/seed.txt", self.SEED)):
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tf.addfile(info, io.BytesIO(data))
+        self.files = {
+            "outer.tar.gz": tar_buf.getvalue(),
+            "keystore.json.gz": gzip.compress(self.KEYSTORE),
+            "seed.txt.bz2": bz2.compress(self.SEED),
+            "seed.txt.xz": lzma.compress(self.SEED),
+            "broken.zip": b"PK\x03\x04" + b"\0" * 100,
+        }
+        for name, data in self.files.items():
+            with open(os.path.join(self.test_dir, name), 'wb') as f:
+                f.write(data)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_nested_members_are_scanned(self):
+        """Test zip/tar.gz/gz/bz2/xz members, nesting and member hashes"""
+        hits = {h['path']: h for h in search.iter_scan(self.test_dir)}
+        self.assertEqual(sorted(hits), [
+            "keystore.json.gz",
+            "keystore.json.gz!/keystore.json",
+            "outer.tar.gz!/inner.zip!/wallets/keystore.json",
+            "outer.tar.gz!/notes/seed.txt",
+            "seed.txt.bz2",
+            "seed.txt.bz2!/seed.txt",
+            "seed.txt.xz",
+            "seed.txt.xz!/seed.txt",
+        ])
+        member = hits["outer.tar.gz!/inner.zip!/wallets/keystore.json"]
+        self.assertEqual(member['filename'], "keystore.json")
+        self.assertEqual(member['filesize'], len(self.KEYSTORE))
+        self.assertEqual(member['sha256'], hashlib.sha256(self.KEYSTORE).hexdigest())
+        self.assertEqual(hits["seed.txt.xz!/seed.txt"]['filesize'], len(self.SEED))
+        self.assertTrue(hits["outer.tar.gz!/notes/seed.txt"]['sensitive'])
+        self.assertEqual(list(search.iter_scan(self.test_dir, workers=2, batch_size=2)), list(hits.values()))
+
+    def test_depth_limit(self):
+        """Test that --archive-depth bounds nesting and 0 disables archive scanning"""
+        shallow = [h['path'] for h in search.iter_scan(self.test_dir, config=search.ScanConfig(archive_depth=1))]
+        self.assertIn("outer.tar.gz!/notes/seed.txt", shallow)
+        self.assertNotIn("outer.tar.gz!/inner.zip!/wallets/keystore.json", shallow)
+        opaque = [h['path'] for h in search.iter_scan(self.test_dir, config=search.ScanConfig(archive_depth=0))]
+        self.assertEqual(sorted(opaque), ["keystore.json.gz", "seed.txt.bz2", "seed.txt.xz"], "Only filename hits without archive scanning")
+
+    def test_ratio_guard(self):
+        """Test that the decompression-ratio guard stops archive bombs"""
+        bomb = _zip_bytes({"zeros.bin": bytes(8 * 1024 * 1024)})
+        budget = archives.Budget(len(bomb), ratio=100, floor=0)
+        with self.assertRaises(archives.ArchiveLimit):
+            for m in archives.iter_members(io.BytesIO(bomb), "bomb.zip", len(bomb), budget=budget):
+                m.stream.drain()
+
+    def test_archive_inside_image(self):
+        """Test that archives inside filesystem images are scanned in place"""
+        path = os.path.join(self.test_dir, "fat.img")
+        create_test_images.build_fat32(path, {"Backup/backup.zip": _zip_bytes({"keystore.json": self.KEYSTORE})},
+                                       size=8 * 1024 * 1024)
+        paths = [h['path'] for h in search.iter_image_scan(path)]
+        self.assertIn("p0/Backup/backup.zip!/keystore.json", paths)
+
+
+def _varint(n):
+    out = bytearray()
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _snappy_compress(data):
+    """Greedy Snappy encoder (literals and 2-byte-offset copies) for test fixtures."""
+    out = bytearray(_varint(len(data)))
+    last = {}
+    pos = lit = 0
+
+    def literal(end):
+        n = end - lit
+        if n:
+            if n <= 60:
+                out.append((n - 1) << 2)
+            else:
+                out.append(61 << 2)
+                out.extend(struct.pack('<H', n - 1))
+            out.extend(data[lit:end])
+
+    while pos + 4 <= len(data):
+        cand = last.get(data[pos:pos + 4])
+        last[data[pos:pos + 4]] = pos
+        if cand is None or pos - cand > 0xFFFF:
+            pos += 1
+            continue
+        length = 4
+        while pos + length < len(data) and length < 64 and data[cand + length] == data[pos + length]:
+            length += 1
+        literal(pos)
+        out.append((length - 1) << 2 | 2)
+        out.extend(struct.pack('<H', pos - cand))
+        pos += length
+        lit = pos
+    literal(len(data))
+    return bytes(out)
+
+
+def _bdb_wallet(records, pagesize=4096, overflow=()):
+    """Berkeley DB btree file with one leaf page; values for keys in overflow go to an overflow page."""
+    meta = bytearray(pagesize)
+    struct.pack_into('<IIIB', meta, 12, 0x00053162, 9, pagesize, 0)
+    meta[25] = 9
+    leaf = bytearray(pagesize)
+    over = bytearray(pagesize)
+    items = []
+    for key, value in records:
+        items.append(struct.pack('<HB', len(key), 1) + key)
+        if key in overflow:
+            struct.pack_into('<I2xH', over, 16, 0, len(value))
+            over[25] = 7
+            over[26:26 + len(value)] = value
+            items.append(struct.pack('<HBxII', 0, 3, 2, len(value)))
+        else:
+            items.append(struct.pack('<HB', len(value), 1) + value)
+    top = pagesize
+    index = []
+    for item in items:
+        top -= len(item) + (len(item) & 1)
+        leaf[top:top + len(item)] = item
+        index.append(top)
+    struct.pack_into('<IIIHHBB', leaf, 8, 1, 0, 0, len(items), top, 1, 5)
+    struct.pack_into('<%dH' % len(index), leaf, 26, *index)
+    return bytes(meta + leaf + over)
+
+
+def _leveldb_block(entries):
+    body = b''.join(_varint(0) + _varint(len(k)) + _varint(len(v)) + k + v for k, v in entries)
+    return body + struct.pack('<II', 0, 1)
+
+
+def _leveldb_table(entries, compress=True):
+    """LevelDB table with one data block (Snappy compressed or raw)."""
+    keys = [k + struct.pack('<Q', (seq + 1) << 8 | 1) for seq, (k, _) in enumerate(entries)]
+    block = _leveldb_block(list(zip(keys, [v for _, v in entries])))
+    data = _snappy_compress(block) if compress else block
+    out = data + bytes([1 if compress else 0]) + b'\0' * 4
+    meta_offset, meta = len(out), _leveldb_block([])
+    out += meta + b'\0' * 5
+    index_offset, index = len(out), _leveldb_block([(keys[-1], _varint(0) + _varint(len(data)))])
+    out += index + b'\0' * 5
+    handles = _varint(meta_offset) + _varint(len(meta)) + _varint(index_offset) + _varint(len(index))
+    return out + handles.ljust(40, b'\0') + struct.pack('<Q', 0xdb4775248b80fb57)
+
+
+def _leveldb_log(entries):
+    """LevelDB write-ahead log holding one write batch in a single record."""
+    batch = struct.pack('<QI', 1, len(entries))
+    for k, v in entries:
+        batch += b'\x01' + _varint(len(k)) + k + _varint(len(v)) + v
+    return b'\0' * 4 + struct.pack('<HB', len(batch), 1) + batch
+
+
+class TestExtractors(unittest.TestCase):
+    """Test the structural extractors for wallet stores"""
+
+    VAULT = b'{"KeyringController":{"vault":"{\\"data\\":\\"' + b"QUJD" * 40 + b'\\",\\"iv\\":\\"aXY=\\"}"}}'
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="extract_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def write(self, name, data):
+        path = os.path.join(self.test_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_snappy(self):
+        """Test Snappy literals, copies and overlapping copies"""
+        from tools.modules.extractors import snappy_decompress, ExtractError
+        # 'ab' literal, then an 8-byte copy at distance 2 (overlapping)
+        self.assertEqual(snappy_decompress(b'\x0a\x04ab\x11\x02'), b'ababababab')
+        data = (b"vault " * 300) + bytes(range(256)) * 3 + b"tail"
+        self.assertEqual(snappy_decompress(_snappy_compress(data)), data)
+        with self.assertRaises(ExtractError):
+            snappy_decompress(b'\x05\x08\x00')
+
+    def test_bdb_wallet(self):
+        """Test wallet.dat record extraction, including overflow pages"""
+        mkey = b'\x04mkey' + struct.pack('<I', 1)
+        data = _bdb_wallet([
+            (b'\x04name' + b'"1BoatSLRHtKNngkdXEeobR76b53LETtpyT', b'\x04home'),
+            (mkey, b'\x30' + os.urandom(200)),
+            (b'\x04ckey' + b'\x21\x02' + os.urandom(32), os.urandom(48)),
+            (b'\x04ckey' + b'\x21\x03' + os.urandom(32), os.urandom(48)),
+        ], overflow=(mkey,))
+        self.write("wallets/wallet.dat", data)
+        hit, = search.iter_scan(self.test_dir)
+        self.assertEqual(hit['content_pattern'], 'bdb:mkey')
+        self.assertEqual(data[hit['content_offset']:hit['content_offset'] + len(mkey)], mkey)
+        self.assertEqual(hit['records'], {'mkey': 1, 'ckey': 2})
+        self.assertTrue(hit['sensitive'])
+        self.assertEqual(hit['sha256'], hashlib.sha256(data).hexdigest())
+        # without key records the generic detectors see the decoded values only
+        label = _bdb_wallet([(b'\x04name' + b'x', b'\x40' + b"ab" * 32)])
+        self.write("wallets/wallet.dat", label)
+        hit, = search.iter_scan(self.test_dir)
+        self.assertEqual(hit['content_pattern'], search.CONTENT_PATTERNS[2].pattern)
+        self.assertNotIn('records', hit)
+        # --no-extractors: filename hit only, the binary pages hold no text pattern
+        self.write("wallets/wallet.dat", data)
+        plain, = search.iter_scan(self.test_dir, config=search.ScanConfig(extractors=False))
+        self.assertEqual(plain['content_pattern'], '')
+
+    def test_leveldb_vault(self):
+        """Test MetaMask vault entries in Snappy compressed tables and in logs"""
+        entries = [(b'config', b'{"theme":"dark"}'), (b'data', self.VAULT)]
+        self.write("Local Extension Settings/nkbihfbeogaeaoehlefnkodbefgpgknn/000005.ldb", _leveldb_table(entries))
+        log = _leveldb_log(entries)
+        self.write("Local Extension Settings/nkbihfbeogaeaoehlefnkodbefgpgknn/000007.log", log)
+        self.write("raw/000009.ldb", _leveldb_table(entries, compress=False))
+        hits = {h['path'].rsplit('/', 1)[-1]: h for h in search.iter_scan(self.test_dir)}
+        self.assertEqual(sorted(hits), ["000005.ldb", "000007.log", "000009.ldb"])
+        self.assertEqual(hits["000005.ldb"]['content_pattern'], 'leveldb:vault')
+        self.assertEqual(hits["000005.ldb"]['content_offset'], 0, "Compressed block: offset of the block")
+        self.assertEqual(hits["000007.log"]['content_pattern'], 'leveldb-log:vault')
+        offset = hits["000007.log"]['content_offset']
+        self.assertEqual(log[offset], 1, "Points at the batch entry")
+        self.assertIn(b'data', log[offset:offset + 8])
+        raw = hits["000009.ldb"]['content_offset']
+        self.assertGreater(raw, 0)
+        self.assertEqual(hits["000009.ldb"]['records'], {'vault': 1})
+
+    def test_electrum(self):
+        """Test Electrum keystores and whole-file encrypted wallets"""
+        wallet = json.dumps({
+            "addr_history": {}, "keystore": {"seed": "enc:abc", "type": "bip32", "xprv": "enc:def"},
+            "seed_version": 18, "use_encryption": True, "wallet_type": "standard"}, indent=4, sort_keys=True)
+        self.write("electrum/wallets/default_wallet", wallet.encode())
+        self.write("electrum/wallets/locked", b"QklFMQ" + b"A" * 400)
+        hits = {h['filename']: h for h in search.iter_scan(self.test_dir)}
+        self.assertEqual(hits["default_wallet"]['content_pattern'], 'electrum:seed')
+        self.assertEqual(hits["default_wallet"]['records'], {'seed': 1, 'xprv': 1, 'keystore': 1})
+        self.assertEqual(wallet.encode()[hits["default_wallet"]['content_offset']:].find(b'"seed"'), 0)
+        self.assertEqual(hits["locked"]['content_pattern'], 'electrum:encrypted')
+
+    def test_store_reuses_digests(self):
+        """Test that an extracted store is not hashed again when digests were computed before"""
+        wallet = json.dumps({"keystore": {"seed": "enc:abc", "type": "bip32"},
+                             "seed_version": 18, "wallet_type": "standard"}).encode()
+        config = search.ScanConfig()
+        given = {'sha256': 'f' * 64}
+        self.assertIs(search.extract_verdict(wallet, 'electrum', config, given)['digests'], given)
+        self.assertEqual(search.extract_verdict(wallet, 'electrum', config)['digests']['sha256'],
+                         hashlib.sha256(wallet).hexdigest())
+
+        self.write("electrum/wallets/default_wallet", wallet)
+        cache_path = os.path.join(self.test_dir, "verdicts.db")
+        config = search.ScanConfig(cache=cache_path)
+        with verdict_cache.VerdictCache(cache_path, config.cache_version()) as cache:
+            search.METRICS.reset()
+            hit, = search.iter_scan(self.test_dir, config=config, cache=cache)
+        self.assertEqual(hit['content_pattern'], 'electrum:seed')
+        self.assertEqual(hit['sha256'], hashlib.sha256(wallet).hexdigest())
+        self.assertNotIn('hash', search.METRICS.phases, "Digests of the cache lookup are reused")
+
+    def test_store_without_records_keeps_generic_hits(self):
+        """Test that a sniffed store without wallet records is still searched as a whole"""
+        key = "ab" * 32
+        self.write("notes.json", json.dumps({"wallet_type": "imported", "note": key}).encode())
+        with_extractors, = search.iter_scan(self.test_dir)
+        without, = search.iter_scan(self.test_dir, config=search.ScanConfig(extractors=False))
+        self.assertEqual(with_extractors['content_pattern'], search.CONTENT_PATTERNS[2].pattern)
+        self.assertEqual(with_extractors['content_pattern'], without['content_pattern'])
+        self.assertEqual(with_extractors['content_offset'], without['content_offset'])
+
+    def test_damaged_store_uses_generic_path(self):
+        """Test that unparseable stores and other files keep the generic detectors"""
+        broken = bytearray(_bdb_wallet([(b'\x04ckey', b'x')]))
+        struct.pack_into('<I', broken, 20, 1000)  # page size no power of two
+        broken += b' "crypto": {} '
+        self.write("wallet.dat", bytes(broken))
+        hit, = search.iter_scan(self.test_dir)
+        self.assertEqual(hit['content_pattern'], search.CONTENT_PATTERNS[0].pattern)
+        self.assertNotIn('records', hit)
+
+    def test_extractors_inside_image(self):
+        """Test that wallet stores inside filesystem images are extracted too"""
+        path = os.path.join(self.test_dir, "fat.img")
+        create_test_images.build_fat32(path, {"Ext/000005.ldb": _leveldb_table([(b'data', self.VAULT)])},
+                                       size=8 * 1024 * 1024)
+        hit, = search.iter_image_scan(path)
+        self.assertEqual((hit['path'], hit['content_pattern']), ("p0/Ext/000005.ldb", 'leveldb:vault'))
+
+
+class TestKnownFiles(unittest.TestCase):
+    """Test the known-good hash set and skipping known files"""
+
+    KEYSTORE = b'{"crypto": {"cipher": "aes-128-ctr"}, "address": "0x1"}'
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="known_test_")
+        self.base = os.path.join(self.test_dir, "set", "known")
+        self.ref = os.path.join(self.test_dir, "reference")
+        os.makedirs(self.ref)
+        with open(os.path.join(self.ref, "keystore.json"), 'wb') as f:
+            f.write(self.KEYSTORE)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_build_and_lookup(self):
+        """Test importing lists, external sorting, Bloom filter and exact lookups"""
+        digests = [hashlib.sha256(b"file %d" % i).hexdigest() for i in range(50)]
+        plain = os.path.join(self.test_dir, "sums.txt")
+        with open(plain, 'w') as f:
+            f.writelines("%s  ./file%d\n" % (d, i) for i, d in enumerate(digests[:30]))
+        listed = os.path.join(self.test_dir, "list.csv")
+        with open(listed, 'w') as f:
+            f.write('"FileName","FileSize","SHA-256"\n')
+            f.writelines('"f%d","%d","%s"\n' % (i, 1000 + i, d.upper()) for i, d in enumerate(digests[20:], 20))
+        nsrl = os.path.join(self.test_dir, "RDS.db")
+        db = sqlite3.connect(nsrl)
+        db.execute("CREATE TABLE FILE (sha256 TEXT, sha1 TEXT, md5 TEXT, crc32 TEXT, file_name TEXT, file_size INTEGER, package_id INTEGER)")
+        db.execute("INSERT INTO FILE VALUES (?, '', '', '', 'x.dll', 4096, 1)", (digests[0].upper(),))
+        db.commit()
+        db.close()
+
+        old_run = knownfiles.RUN_RECORDS
+        knownfiles.RUN_RECORDS = 7  # several runs to merge
+        try:
+            entries = itertools.chain(*(knownfiles.iter_list(p) for p in (plain, listed, nsrl)),
+                                      knownfiles.iter_dir(self.ref))
+            count, sized = knownfiles.build(self.base, entries)
+        finally:
+            knownfiles.RUN_RECORDS = old_run
+        self.assertEqual(count, 51, "Duplicates across lists are stored once")
+        self.assertEqual(sized, 32)
+        with knownfiles.KnownSet(self.base) as known:
+            self.assertEqual(len(known), 51)
+            for d in digests:
+                self.assertIn(d, known)
+            misses = sum(hashlib.sha256(b"other %d" % i).hexdigest() in known for i in range(2000))
+            self.assertEqual(misses, 0)
+            self.assertTrue(known.has_size(1025))
+            self.assertFalse(known.has_size(999))
+            self.assertTrue(known.has_partial(len(self.KEYSTORE)))
+            self.assertFalse(known.has_partial(1025))
+            # size-only entries are no pre-check candidates, recorded partial hashes must match
+            self.assertFalse(known.candidate(1025, 12345))
+            size = len(self.KEYSTORE)
+            self.assertTrue(known.candidate(size, knownfiles.partial_hash(self.KEYSTORE)))
+            self.assertFalse(known.candidate(size, knownfiles.partial_hash(b"different")))
+            first_id = known.id
+        knownfiles.build(self.base, knownfiles.iter_list(plain))
+        self.assertNotEqual(knownfiles.set_id(self.base), first_id)
+
+    def test_scan_skips_known_files(self):
+        """Test that known files are skipped after the pre-check or the scan pass"""
+        knownfiles.build(self.base, itertools.chain(
+            knownfiles.iter_dir(self.ref),
+            [(hashlib.sha256(b"seed " + b"ab" * 32).hexdigest(), None, 0)]))
+        scan_dir = os.path.join(self.test_dir, "scan")
+        os.makedirs(scan_dir)
+        files = {
+            "known/keystore.json": self.KEYSTORE,
+            "hashonly/seed.txt": b"seed " + b"ab" * 32,
+            "same_size/keystore.json": self.KEYSTORE.replace(b"0x1", b"0x2"),
+            "new/wallet.json": b'{"crypto": {}}',
+        }
+        for rel, data in files.items():
+            os.makedirs(os.path.join(scan_dir, os.path.dirname(rel)), exist_ok=True)
+            with open(os.path.join(scan_dir, rel), 'wb') as f:
+                f.write(data)
+        config = search.ScanConfig(known=self.base)
+        progress = ProgressReporter(None)
+        paths = sorted(h['path'] for h in search.iter_scan(scan_dir, config=config, progress=progress))
+        self.assertEqual(paths, ["new/wallet.json", "same_size/keystore.json"])
+        self.assertEqual(progress.files_known, 2)
+        self.assertGreaterEqual(progress.bytes_skipped, len(self.KEYSTORE))
+        self.assertEqual(list(search.iter_scan(scan_dir, workers=2, config=config)),
+                         list(search.iter_scan(scan_dir, config=config)))
+        self.assertNotEqual(config.version(), search.ScanConfig().version())
+        self.assertEqual(len(list(search.iter_scan(scan_dir))), 4)
+
+        image_path = os.path.join(self.test_dir, "fat.img")
+        create_test_images.build_fat32(image_path, files, size=8 * 1024 * 1024)
+        paths = sorted(h['path'] for h in search.iter_image_scan(image_path, config=config))
+        self.assertEqual(paths, ["p0/new/wallet.json", "p0/same_size/keystore.json"])
+
+    def test_size_only_entries_single_pass(self):
+        """Test that size-only entries (NSRL) cost no extra read and still drop known files"""
+        tool = os.urandom(4096)
+        notes = b"meeting notes\n" * 300
+        knownfiles.build(self.base, [(hashlib.sha256(tool).hexdigest(), len(tool), 0),
+                                     (hashlib.sha256(b"x" * len(notes)).hexdigest(), len(notes), 0)])
+        scan_dir = os.path.join(self.test_dir, "scan")
+        os.makedirs(scan_dir)
+        for name, data in (("tool.dll", tool), ("notes.txt", notes), ("wallet.dat", b"\x01" * 64)):
+            with open(os.path.join(scan_dir, name), 'wb') as f:
+                f.write(data)
+        for config in (search.ScanConfig(known=self.base),
+                       search.ScanConfig(known=self.base, max_full_read=1024, large_files='head', head_size=512)):
+            progress = ProgressReporter(None)
+            search.METRICS.reset()
+            paths = [h['path'] for h in search.iter_scan(scan_dir, config=config, progress=progress)]
+            self.assertEqual(paths, ["wallet.dat"])
+            self.assertEqual(progress.files_known, 1)
+            self.assertEqual(search.METRICS.counters['bytes_read'], len(tool) + len(notes) + 64)
+
+
+class TestVerdictCache(unittest.TestCase):
+    """Test the cross-case verdict cache"""
+
+    SEED = b"backup " + b"ab" * 32 + b"\n"
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="cache_test_")
+        self.cache_path = os.path.join(self.test_dir, "shop", "verdicts.db")
+        shared = {
+            "seed.txt": self.SEED,
+            "keystore.json": b'{"crypto": {"cipher": "aes-128-ctr"}}',
+            "notes.txt": b"nothing to see",
+        }
+        for case, extra in (("case1", {"only1.json": b'{"address": "0x1"}'}),
+                            ("case2", {"docs/only2.json": b'{"address": "0x2"}'})):
+            for rel, data in dict(shared, **extra).items():
+                path = os.path.join(self.test_dir, case, rel)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(data)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def scan_case(self, case, config, workers=1):
+        with verdict_cache.VerdictCache(self.cache_path, config.cache_version()) as cache:
+            hits = list(search.iter_scan(os.path.join(self.test_dir, case), workers=workers,
+                                         config=config, cache=cache))
+        return hits, cache
+
+    def test_cross_case_reuse(self):
+        """Test that files seen in another case are resolved from the cache"""
+        config = search.ScanConfig(cache=self.cache_path)
+        first, cache = self.scan_case("case1", config)
+        self.assertEqual((cache.hits, cache.stored), (0, 4))
+        second, cache = self.scan_case("case2", config)
+        self.assertEqual((cache.hits, cache.stored), (3, 1), "Shared files come from the cache")
+        plain = list(search.iter_scan(os.path.join(self.test_dir, "case2")))
+        self.assertEqual(second, plain, "Cached verdicts give the same results")
+        parallel, cache = self.scan_case("case2", config, workers=2)
+        self.assertEqual(parallel, plain)
+        self.assertEqual(cache.hits, 4)
+        # other detector settings never see these entries
+        other = search.ScanConfig(cache=self.cache_path, digests=('sha256', 'md5'))
+        _, cache = self.scan_case("case1", other)
+        self.assertEqual(cache.hits, 0)
+
+    def test_miss_reads_once(self):
+        """Test that a cache miss reads each file once for digest, lookup and detection"""
+        big = os.path.join(self.test_dir, "case1", "big.bin")
+        with open(big, 'wb') as f:
+            f.write(os.urandom(3000) + self.SEED)
+        total = sum(os.path.getsize(os.path.join(d, n))
+                    for d, _, names in os.walk(os.path.join(self.test_dir, "case1")) for n in names)
+        for config in (search.ScanConfig(cache=self.cache_path),
+                       search.ScanConfig(cache=self.cache_path, max_full_read=1024)):
+            if os.path.exists(self.cache_path):
+                os.remove(self.cache_path)
+            search.METRICS.reset()
+            hits, cache = self.scan_case("case1", config)
+            self.assertEqual(search.METRICS.counters['bytes_read'], total)
+            self.assertEqual(cache.stored, 5, "Large files hashed in the mmap pass are stored too")
+            self.assertIn("big.bin", [h['path'] for h in hits])
+
+    def test_no_sensitive_snippets(self):
+        """Test that snippets of sensitive hits are never stored"""
+        self.scan_case("case1", search.ScanConfig(cache=self.cache_path))
+        db = sqlite3.connect(self.cache_path)
+        rows = [json.loads(v) for v, in db.execute("SELECT verdict FROM verdicts")]
+        db.close()
+        sensitive = [v for v in rows if v['sensitive']]
+        self.assertEqual(len(sensitive), 1)
+        self.assertEqual(sensitive[0]['snippet'], '')
+        self.assertNotIn(b"abab", json.dumps(rows).encode())
+        self.assertTrue(any(v['snippet'] for v in rows if not v['sensitive']), "Masked snippets are kept")
+
+    def test_lru_eviction(self):
+        """Test that least recently used entries are evicted past the size bound"""
+        with verdict_cache.VerdictCache(self.cache_path, "v1", max_bytes=10 ** 9) as cache:
+            for i in range(20):
+                cache.store({'content_pattern': '', 'sensitive': False, 'snippet': '',
+                             'digests': {'sha256': '%064x' % i}})
+                time.sleep(0.001)
+            size = cache.db.execute("SELECT SUM(bytes) FROM verdicts").fetchone()[0]
+            cache.touch('%064x' % 0)
+            cache.max_bytes = size // 2
+            cache.checkpoint(force=True)
+            self.assertIsNotNone(cache.get('%064x' % 0), "Recently used entry survives")
+            self.assertIsNone(cache.get('%064x' % 1))
+            self.assertIsNotNone(cache.get('%064x' % 19))
+            self.assertLessEqual(cache.db.execute("SELECT SUM(bytes) FROM verdicts").fetchone()[0], size // 2)
+
+
+class TestTriage(unittest.TestCase):
+    """Test the triage walk (known wallet locations first, best-first order)"""
+
+    FILES = {
+        "aaa/readme.txt": b"nothing",
+        "Windows/System32/wallet.dll": b"MZ",
+        "Users/Alice/Documents/notes.txt": b"notes",
+        "Users/Alice/Documents/deep/my_wallet.dat": b"wallet",
+        "Users/Alice/AppData/Roaming/Electrum/wallets/default_wallet": b'{"seed_version": 18, "keystore": {}}',
+        "users/carol/appdata/roaming/bitcoin/wallet.dat": b"bdb",
+        "home/bob/.ethereum/keystore/UTC--2020-01-01T00-00-00Z--abc": b'{"crypto": {}}',
+        "home/bob/.config/google-chrome/Default/Local Extension Settings/"
+        "nkbihfbeogaeaoehlefnkodbefgpgknn/000003.log": b"log",
+        "zzz/crypto/backup.txt": b"backup",
+    }
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="triage_test_")
+        for rel, data in self.FILES.items():
+            path = os.path.join(self.test_dir, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        os.link(os.path.join(self.test_dir, "aaa/readme.txt"), os.path.join(self.test_dir, "aaa/link.txt"))
+        os.symlink("/etc/passwd", os.path.join(self.test_dir, "Users/Alice/passwd"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_probe_table(self):
+        """Test that the triage table finds wallet paths case-insensitively"""
+        found = [os.path.relpath(p, self.test_dir).replace(os.sep, '/') for p in triage.probe(self.test_dir)]
+        for rel in ("users/carol/appdata/roaming/bitcoin/wallet.dat",
+                    "Users/Alice/AppData/Roaming/Electrum/wallets/default_wallet",
+                    "home/bob/.ethereum/keystore/UTC--2020-01-01T00-00-00Z--abc",
+                    "Users/Alice/Documents/deep/my_wallet.dat"):
+            self.assertIn(rel, found)
+        self.assertIn("home/bob/.config/google-chrome/Default/Local Extension Settings/"
+                      "nkbihfbeogaeaoehlefnkodbefgpgknn/000003.log", found)
+        self.assertLess(found.index("users/carol/appdata/roaming/bitcoin/wallet.dat"),
+                        found.index("Users/Alice/Documents/deep/my_wallet.dat"), "Table order is kept")
+        self.assertNotIn("Windows/System32/wallet.dll", found)
+
+    def test_walk_order(self):
+        """Test that probed files come first, homes before other and system directories, each file once"""
+        stats, triage_stats = {}, {}
+        plain = [rel for _, rel, _, _ in search.walk_files(self.test_dir, stats)]
+        order = [rel.replace(os.sep, '/') for _, rel, _, _ in search.walk_triage(self.test_dir, triage_stats)]
+        self.assertEqual(sorted(order), sorted(r.replace(os.sep, '/') for r in plain))
+        self.assertEqual(stats, triage_stats)
+        self.assertEqual(order[0], "users/carol/appdata/roaming/bitcoin/wallet.dat")
+        position = {rel: i for i, rel in enumerate(order)}
+        # probed wallet files, then homes, then other directories, then system directories
+        self.assertLess(position["Users/Alice/Documents/deep/my_wallet.dat"], position["Users/Alice/Documents/notes.txt"])
+        self.assertLess(position["Users/Alice/Documents/notes.txt"], position["aaa/readme.txt"])
+        self.assertLess(position["aaa/readme.txt"], position["zzz/crypto/backup.txt"])
+        self.assertEqual(order[-1], "Windows/System32/wallet.dll")
+
+    def test_time_budget(self):
+        """Test the time budget cut-off and that triage finds the same hits"""
+        plain = sorted(h['path'] for h in search.iter_scan(self.test_dir))
+        triaged = [h['path'] for h in search.iter_scan(self.test_dir, triage=True, batch_size=2,
+                                                       deadline=time.monotonic() + 600)]
+        self.assertEqual(sorted(triaged), plain)
+        self.assertEqual(triaged[0], "users/carol/appdata/roaming/bitcoin/wallet.dat")
+        progress = ProgressReporter(None)
+        cut = list(search.iter_scan(self.test_dir, triage=True, deadline=time.monotonic(), progress=progress))
+        self.assertEqual(cut, [])
+        self.assertEqual(progress.files_scanned, 0)
+
+
+class TestYaraLite(unittest.TestCase):
+    """Test the in-process YARA subset and its place in the read pass"""
+
+    RULES = r'''
+    private rule small { condition: filesize < 1KB }
+    rule greeting : demo {
+      meta:
+        description = "two whole-word greetings"
+      strings:
+        $a = "Hello" nocase ascii wide fullword
+      condition:
+        #a >= 2 and @a[1] < 10
+    }
+    rule bdb_magic {
+      meta:
+        sensitive = true
+      strings:
+        $magic = { 62 31 05 00 }
+        $key = { 04 6D 6B 65 79 [0-4] (01 | 02 00) 4? }
+      condition:
+        $magic at 12 and ($key or not small)
+    }
+    rule two_of { strings: $x = "xyzzy" $y = "plugh" $ = "frotz" condition: 2 of ($x, $y*) }
+    '''
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="yara_test_")
+        self.rules = yara_lite.compile_rules(self.RULES)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _match(self, data, filesize=None):
+        scan = self.rules.scanner()
+        scan.feed(data)
+        return [(h.name, h.offset) for h in scan.finish(len(data) if filesize is None else filesize)]
+
+    def test_strings_and_conditions(self):
+        """Test text modifiers, hex wildcards/jumps/alternatives and the condition operators"""
+        self.assertEqual(self._match(b"h\x00e\x00l\x00l\x00o\x00 HELLO"), [("greeting", 0)])
+        self.assertEqual(self._match(b"xhello HELLO"), [], "fullword rejects embedded words")
+        self.assertEqual(self._match(b"          Hello hello"), [], "@a[1] must be below 10")
+        wallet = bytes(12) + b"b1\x05\x00" + b"\x04mkey\x00\x00\x02\x00\x41"
+        self.assertEqual(self._match(wallet), [("bdb_magic", 12)])
+        self.assertEqual(self._match(wallet[:21]), [], "key record required for small files")
+        self.assertEqual(self._match(wallet[:21], filesize=4096), [("bdb_magic", 12)])
+        self.assertEqual(self._match(b"b1\x05\x00" + bytes(12)), [], "magic only counts at offset 12")
+        self.assertEqual(self._match(b"xyzzy plugh"), [("two_of", 0)])
+        self.assertEqual(self._match(b"xyzzy frotz"), [], "anonymous strings are not part of $y*")
+        rules = yara_lite.load_rules([os.path.join(os.path.dirname(__file__), '..', 'yara_rules')])
+        scan = rules.scanner()
+        scan.feed(b'{"address": "ab", "crypto": {}}')
+        self.assertEqual([h.name for h in scan.finish(32)], ["ethereum_keystore_json"])
+
+    def test_unsupported_constructs(self):
+        """Test that rules outside the subset are rejected with a RuleError"""
+        for source in ('import "pe"\nrule a { condition: true }',
+                       'rule a { strings: $a = /ab+/ condition: $a }',
+                       'rule a { strings: $a = "x" xor condition: $a }',
+                       'rule a { strings: $a = "x" condition: $b }',
+                       'rule a { condition: b }',
+                       'rule a { condition: true } rule a { condition: true }',
+                       'rule a { strings: $a = { 6A ( 6B } condition: $a }'):
+            with self.assertRaises(yara_lite.RuleError, msg=source):
+                yara_lite.compile_rules(source)
+
+    def test_rules_in_read_pass(self):
+        """Test that rule hits land in the findings, across windows and in chunked reads"""
+        config = search.ScanConfig(max_full_read=1000, window_size=4096, rules=self.rules)
+        step = config.window_size - config.overlap
+        big = bytearray(b"." * 20000)
+        big[12:16] = b"b1\x05\x00"
+        big[step - 2:step + 8] = b"\x04mkey\x01\x43.."
+        with open(os.path.join(self.test_dir, "store.bin"), 'wb') as f:
+            f.write(big)
+        with open(os.path.join(self.test_dir, "notes.txt"), 'wb') as f:
+            f.write(b"Hello hello\n\"address\": 1")
+        hits = {r['filename']: r for r in search.iter_scan(self.test_dir, config=config)}
+        self.assertEqual(hits["store.bin"]['content_pattern'], "yara:bdb_magic")
+        self.assertEqual(hits["store.bin"]['content_offset'], 12)
+        self.assertEqual(hits["store.bin"]['rules'], ["bdb_magic"])
+        self.assertTrue(hits["store.bin"]['sensitive'])
+        # a detector hit keeps the content pattern, the rule is listed next to it
+        self.assertEqual(hits["notes.txt"]['content_pattern'], '"address"\\s*:')
+        self.assertEqual(hits["notes.txt"]['rules'], ["greeting"])
+        chunks = [bytes(big[i:i + 1000]) for i in range(0, len(big), 1000)]
+        *_, rule_hits = search.detect_chunks(chunks, len(big), config)
+        self.assertEqual([(h.name, h.offset) for h in rule_hits], [("bdb_magic", 12)])
+        plain = search.ScanConfig(max_full_read=1000, window_size=4096)
+        self.assertNotEqual(plain.version(), config.version(), "rules are part of the index key")
+        names = [r['filename'] for r in search.iter_scan(self.test_dir, config=plain)]
+        self.assertEqual(names, ["notes.txt"])
+
+
+class _StallingDetector:
+    """Content detector that burns CPU on files containing 'stall' (a pathological input)."""
+
+    pattern = 'stalling-detector'
+    flags = 0
+    max_match_len = 16
+    sensitive = False
+
+    def search(self, data):
+        if b'stall' in bytes(data):
+            end = time.process_time() + 30
+            while time.process_time() < end:
+                pass
+        return None
+
+
+class TestFileBudget(unittest.TestCase):
+    """Test the per-file CPU budget, the fallback mode and the slow_files report"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="budget_test_")
+        self.output_dir = tempfile.mkdtemp(prefix="budget_out_")
+        files = {
+            "keystore.json": b'{"crypto": {}, "note": "stall"}',
+            "wallet_backtrack.txt": b"stall" + b"a" * 40 + b"b",
+            "plain.json": b'{"crypto": {}}',
+        }
+        for name, data in files.items():
+            with open(os.path.join(self.test_dir, name), 'wb') as f:
+                f.write(data)
+        # catastrophic backtracking behind a literal gate: slow in the fallback mode too
+        plan = detectors.compile_plan([_StallingDetector(), re.compile(r'stall(?:a+)+$')]
+                                      + search.CONTENT_PATTERNS[:2])
+        self.config = search.ScanConfig(plan=plan, file_budget=0.3)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_fallback_modes(self):
+        """Test that files over budget are redone cheaply, or reported by filename only"""
+        self.assertEqual(len(self.config.fallback().plan.detectors), 3)
+        progress = ProgressReporter(None)
+        started = time.monotonic()
+        hits = {r['filename']: r for r in search.iter_scan(self.test_dir, config=self.config, progress=progress)}
+        self.assertLess(time.monotonic() - started, 10, "no file may block the scan")
+        self.assertEqual(hits["keystore.json"]['content_pattern'], '"crypto"\\s*:')
+        self.assertEqual(hits["keystore.json"]['slow']['mode'], 'fallback')
+        self.assertGreaterEqual(hits["keystore.json"]['slow']['seconds'], 0.3)
+        self.assertEqual(hits["wallet_backtrack.txt"]['content_pattern'], '')
+        self.assertEqual(hits["wallet_backtrack.txt"]['slow']['mode'], 'filename')
+        self.assertNotIn('slow', hits["plain.json"])
+        slow = {s['path']: s['mode'] for s in progress.slow_files}
+        self.assertEqual(slow, {"keystore.json": 'fallback', "wallet_backtrack.txt": 'filename'})
+
+    def test_slow_files_report(self):
+        """Test the scan_slow_files report and that slow verdicts stay out of the verdict cache"""
+        self.config.cache = os.path.join(self.output_dir, "cache", "verdicts.sqlite")
+        case_dir = os.path.join(self.output_dir, "case")
+        search.scan(self.test_dir, self.output_dir, config=self.config, case_dir=case_dir)
+        names = os.listdir(self.output_dir)
+        slow_name = [n for n in names if n.startswith('scan_slow_files_')][0]
+        with open(os.path.join(self.output_dir, slow_name)) as f:
+            report = json.load(f)
+        self.assertEqual(report['file_budget'], 0.3)
+        self.assertEqual(sorted(s['path'] for s in report['slow_files']), ["keystore.json", "wallet_backtrack.txt"])
+        with open(os.path.join(case_dir, "logs", "status.json")) as f:
+            status = json.load(f)
+        self.assertEqual(status['files_slow'], 2)
+        self.assertEqual(len(status['slow_files']), 2)
+        db = sqlite3.connect(self.config.cache)
+        self.assertEqual(db.execute('SELECT COUNT(*) FROM verdicts').fetchone()[0], 1)
+        db.close()
+
+    def test_rescan_after_fallback(self):
+        """Test that fallback verdicts stay out of the scan index, so a larger budget rescans the file"""
+        with open(os.path.join(self.test_dir, "seed_notes.txt"), 'wb') as f:
+            f.write(b"a" * 24 + b"!")
+        # backtracks for a while, then matches; no literal gate, so the fallback mode drops it
+        plan = detectors.compile_plan([re.compile(r'(?:a+)+b|a{24}!')])
+        index_path = os.path.join(self.output_dir, "scan_index.sqlite")
+        tight = search.ScanConfig(plan=plan, file_budget=0.02)
+        relaxed = search.ScanConfig(plan=plan, file_budget=None)
+        self.assertEqual(tight.version(), relaxed.version())
+        with search.ScanIndex(index_path, tight.version()) as index:
+            hits = {r['filename']: r for r in search.iter_scan(self.test_dir, config=tight, index=index)}
+            self.assertEqual(hits["seed_notes.txt"]['slow']['mode'], 'fallback')
+            self.assertEqual(index.stored, 3, "the fallback verdict is not kept")
+        with search.ScanIndex(index_path, relaxed.version()) as index:
+            hits = {r['filename']: r for r in search.iter_scan(self.test_dir, config=relaxed, index=index)}
+            self.assertEqual(index.hits, 3)
+            self.assertEqual(index.stored, 1)
+        self.assertEqual(hits["seed_notes.txt"]['content_pattern'], '(?:a+)+b|a{24}!')
+        self.assertNotIn('slow', hits["seed_notes.txt"])
+
+
+class TestMetrics(unittest.TestCase):
+    """Test the scan metrics report, the merge of worker metrics and --profile"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="metrics_test_")
+        self.output_dir = tempfile.mkdtemp(prefix="metrics_out_")
+        os.makedirs(os.path.join(self.test_dir, "sub"))
+        files = {
+            "keystore.json": b'{"crypto": {"cipher": "aes-128-ctr"}}',
+            "notes.txt": b"nothing to see here\n" * 10,
+            os.path.join("sub", "wallet.dat"): bytes(range(1, 65)),
+        }
+        for name, data in files.items():
+            with open(os.path.join(self.test_dir, name), 'wb') as f:
+                f.write(data)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def _report(self, workers):
+        out = os.path.join(self.output_dir, "w%d" % workers)
+        os.makedirs(out)
+        search.scan(self.test_dir, out, workers=workers)
+        name = [n for n in os.listdir(out) if n.startswith('scan_metrics_')][0]
+        with open(os.path.join(out, name)) as f:
+            return json.load(f)
+
+    def test_metrics_report(self):
+        """Test that a scan writes phase timings, counters and detector statistics"""
+        report = self._report(1)
+        self.assertEqual(report['files_scanned'], 3)
+        self.assertEqual(report['counters']['files'], 3)
+        self.assertEqual(report['counters']['dirs'], 2)
+        self.assertEqual(report['counters']['bytes_read'], report['bytes_scanned'])
+        for phase in ('walk', 'stat', 'read', 'hash', 'write', 'finalize'):
+            self.assertIn(phase, report['phases'])
+        self.assertEqual(report['phases']['stat']['calls'], 4)
+        crypto = report['detectors']['"crypto"\\s*:']
+        self.assertEqual(crypto['hits'], 1)
+        self.assertEqual(crypto['evaluations'] + crypto['gated'], 3)
+
+    def test_worker_metrics_merged(self):
+        """Test that worker metrics add up to the totals of a serial scan"""
+        serial, pooled = self._report(1), self._report(2)
+        self.assertEqual(pooled['counters'], serial['counters'])
+        self.assertEqual({k: v['calls'] for k, v in pooled['phases'].items()},
+                         {k: v['calls'] for k, v in serial['phases'].items()})
+        self.assertEqual({k: (v['evaluations'], v['gated'], v['hits']) for k, v in pooled['detectors'].items()},
+                         {k: (v['evaluations'], v['gated'], v['hits']) for k, v in serial['detectors'].items()})
+
+    def test_drain_and_merge(self):
+        """Test draining one Metrics object into another"""
+        worker, total = metrics.Metrics(), metrics.Metrics()
+        worker.phase('read', 0.5)
+        worker.count('files', 2)
+        worker.detector('x', 0.25, hits=1)
+        worker.detector('x', 0.0, gated=True)
+        total.phase('read', 1.0)
+        total.merge(worker.drain())
+        self.assertEqual(worker.snapshot(), {'phases': {}, 'counters': {}, 'detectors': {}})
+        report = total.report(run='test')
+        self.assertEqual(report['run'], 'test')
+        self.assertEqual(report['phases']['read'], {'seconds': 1.5, 'calls': 2})
+        self.assertEqual(report['counters'], {'files': 2})
+        self.assertEqual(report['detectors']['x'], {'evaluations': 1, 'gated': 1, 'hits': 1, 'seconds': 0.25})
+
+    def test_profile_run(self):
+        """Test that profile_run returns the result and writes the profile and memory reports"""
+        result = metrics.profile_run(lambda: search.scan(self.test_dir, self.output_dir) or 'done',
+                                     self.output_dir)
+        self.assertEqual(result, 'done')
+        names = os.listdir(self.output_dir)
+        self.assertTrue(any(n.startswith('scan_profile_') and n.endswith('.pstats') for n in names))
+        text = [n for n in names if n.startswith('scan_profile_') and n.endswith('.txt')][0]
+        with open(os.path.join(self.output_dir, text)) as f:
+            self.assertIn('scan', f.read())
+        memory = [n for n in names if n.startswith('scan_memory_')][0]
+        with open(os.path.join(self.output_dir, memory)) as f:
+            self.assertTrue(f.readline().startswith('traced memory:'))
+
+
+class TestBenchmark(unittest.TestCase):
+    """Test the benchmark scenarios and the baseline comparison"""
+
+    def _doc(self, **scenario):
+        record = {'wall_seconds': 1.0, 'files': 10, 'bytes': 1000, 'hits': 2,
+                  'peak_rss': 50 * 1024 * 1024, 'tracemalloc_peak': 8 * 1024 * 1024}
+        record.update(scenario)
+        return {'settings': {'scale': 1.0, 'workers': 1, 'files': 100, 'size': 1024},
+                'scenarios': {'tiny_files': record}}
+
+    def test_compare(self):
+        """Test that only growth beyond the threshold and the noise floor is a regression"""
+        base = self._doc()
+        self.assertEqual(benchmark_scanner.compare(base, self._doc(wall_seconds=1.15)), ([], []))
+        regressions, notes = benchmark_scanner.compare(
+            base, self._doc(wall_seconds=1.5, peak_rss=80 * 1024 * 1024, tracemalloc_peak=9 * 1024 * 1024))
+        self.assertEqual([r.split(' ')[1] for r in regressions], ['wall_seconds', 'peak_rss'])
+        self.assertEqual(notes, [])
+        regressions, notes = benchmark_scanner.compare(base, self._doc(wall_seconds=0.5, hits=3))
+        self.assertEqual(regressions, [])
+        self.assertEqual(notes, ['tiny_files: hits 2 -> 3'])
+        regressions, notes = benchmark_scanner.compare(self._doc(recall=1.0, precision=0.5),
+                                                       self._doc(recall=0.98, precision=0.6))
+        self.assertEqual(regressions, ['tiny_files: recall 1.0 -> 0.98'])
+
+    def test_scenario_run(self):
+        """Test that a scenario is generated reproducibly and measured in a child process"""
+        opts = argparse.Namespace(scale=0.05, iterations=1, workers=1, files=10, size=100)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            record = benchmark_scanner.run_scenario('archives', Path(tmpdir), opts)
+        self.assertEqual(record['files'], 3)
+        self.assertGreater(record['hits'], 0)
+        self.assertGreater(record['tracemalloc_peak'], 0)
+        self.assertGreater(record['mb_per_sec'], 0)
+
+
+class TestCorpus(unittest.TestCase):
+    """Test the synthetic corpus generator and the ground truth scoring"""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="corpus_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _generate(self, name, seed=5):
+        out = os.path.join(self.work_dir, name)
+        summary = create_corpus.generate(os.path.join(out, "tree"), out, files=400, seed=seed,
+                                         artifact_rate=0.05, median_size=1024, max_size=65536)
+        return out, summary
+
+    def _digest(self, out):
+        h = hashlib.sha256()
+        for dirpath, dirnames, filenames in os.walk(os.path.join(out, "tree")):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                h.update(os.path.relpath(path, out).encode('utf-8'))
+                with open(path, 'rb') as f:
+                    h.update(f.read())
+        with open(os.path.join(out, "ground_truth.jsonl"), 'rb') as f:
+            h.update(f.read())
+        return h.hexdigest()
+
+    def test_deterministic(self):
+        """Test that the same seed gives the same tree and ground truth, another seed does not"""
+        first, summary = self._generate("a")
+        second, _ = self._generate("b")
+        third, _ = self._generate("c", seed=6)
+        self.assertEqual(self._digest(first), self._digest(second))
+        self.assertNotEqual(self._digest(first), self._digest(third))
+        self.assertEqual(sum(summary['content'].values()) + sum(summary['artifacts'].values()), 400)
+
+    def test_ground_truth(self):
+        """Test that planted artefacts sit at their recorded offsets and mnemonics are valid"""
+        out, summary = self._generate("a")
+        self.assertGreater(sum(summary['artifacts'].values()), 5)
+        with open(os.path.join(out, "ground_truth.jsonl")) as f:
+            entries = [json.loads(line) for line in f]
+        for entry in entries:
+            if entry['label'] != 'artifact' or '!/' in entry['path']:
+                continue
+            with open(os.path.join(out, "tree", entry['path']), 'rb') as f:
+                data = f.read()[entry['offset']:entry['offset'] + entry['length']]
+            if entry['kind'] == 'mnemonic':
+                self.assertTrue(bip39.bip39_checksum_valid(data.decode('ascii').split()))
+            elif entry['kind'] == 'private_key':
+                self.assertRegex(data.decode('ascii'), r'^[0-9a-f]{64}$')
+            else:
+                json.loads(data)
+        self.assertTrue(any(e['label'] == 'decoy' for e in entries))
+
+    def test_evaluate(self):
+        """Test recall and precision of a scan against the ground truth"""
+        out, summary = self._generate("a")
+        reports = os.path.join(out, "reports")
+        os.makedirs(reports)
+        search.scan(os.path.join(out, "tree"), reports)
+        results = [n for n in os.listdir(reports) if n.startswith('scan_results_') and n.endswith('.jsonl')][0]
+        score = create_corpus.evaluate(os.path.join(out, "ground_truth.jsonl"), os.path.join(reports, results))
+        self.assertEqual(score['artifacts'], sum(summary['artifacts'].values()))
+        self.assertEqual(score['recall'], 1.0)
+        self.assertLess(score['precision'], 1.0, "the decoys are reported too")
+        self.assertNotIn('other', score['false_positives'])
+        self.assertNotIn('wordy_prose', score['false_positives'])
+
+
+class TestEwf(unittest.TestCase):
+    """Test the EWF (.E01) reader on generated containers"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="ewf_test_")
+        # compressible text plus incompressible bytes, not a multiple of the chunk size
+        rnd = b"".join(hashlib.sha256(b"%d" % i).digest() for i in range(6144))
+        self.data = (b"wallet " * 9000 + rnd)[:200 * 1024 + 512]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_read_and_seek(self):
+        """Test reads across chunk boundaries, seeking and multi-segment images"""
+        for segment_chunks in (None, 2):
+            path = os.path.join(self.test_dir, "disk%s.E01" % segment_chunks)
+            create_test_images.build_ewf(path, self.data, chunk_size=4096 * 8, segment_chunks=segment_chunks)
+            with ewf.EwfImage(path, cache_chunks=2) as img:
+                self.assertEqual(img.size, len(self.data))
+                self.assertEqual(img.segment_count, 4 if segment_chunks else 1)
+                self.assertEqual(img.pread(70000, 30000), self.data[30000:100000])
+                self.assertEqual(img.pread(4096, len(self.data) - 100), self.data[-100:])
+                img.seek(-5000, os.SEEK_END)
+                self.assertEqual(img.read(), self.data[-5000:])
+                img.seek(0)
+                self.assertEqual(img.read(), self.data)
+
+    def test_verify(self):
+        """Test verification against the stored MD5/SHA1 and mismatch detection"""
+        path = os.path.join(self.test_dir, "good.E01")
+        create_test_images.build_ewf(path, self.data)
+        with ewf.EwfImage(path) as img:
+            result = img.verify()
+        self.assertEqual(result['md5'], (hashlib.md5(self.data).hexdigest(),) * 2)
+        self.assertEqual(result['sha1'], (hashlib.sha1(self.data).hexdigest(),) * 2)
+
+        bad = os.path.join(self.test_dir, "bad.E01")
+        create_test_images.build_ewf(bad, self.data, md5=b"\0" * 16)
+        with ewf.EwfImage(bad) as img:
+            stored, computed = img.verify()['md5']
+        self.assertNotEqual(stored, computed)
+
+    def test_image_scan_on_ewf(self):
+        """Test that an E01 container scans exactly like the raw image"""
+        fs_path = os.path.join(self.test_dir, "fat.img")
+        create_test_images.build_fat32(fs_path, TestFilesystems.FILES, size=8 * 1024 * 1024)
+        disk = os.path.join(self.test_dir, "disk.img")
+        make_mbr_image(disk, 10 * 1024 * 1024, [_mbr_entry(0x0c, 2048, 16384)])
+        with open(fs_path, 'rb') as src, open(disk, 'r+b') as dst:
+            dst.seek(2048 * 512)
+            dst.write(src.read())
+        e01 = os.path.join(self.test_dir, "disk.E01")
+        with open(disk, 'rb') as f:
+            create_test_images.build_ewf(e01, f.read(), segment_chunks=100)
+
+        hits = list(search.iter_image_scan(disk))
+        self.assertTrue(hits)
+        self.assertEqual(list(search.iter_image_scan(e01)), hits)
+        self.assertEqual(list(search.iter_image_scan(e01, workers=2, batch_size=2)), hits)
+
+
 class TestIntegration(unittest.TestCase):
     """Integration tests for full workflow"""
 
@@ -312,7 +312,8 @@ class MonitorApp(tk.Tk):
                         self.scan_output.insert("end", f"ERROR: Script not found: {search_script}\n")
                         return
 
-                    cmd = ["python3", search_script, "--root", dir_path, "--outdir", output_dir]
+                    cmd = ["python3", search_script, "--root", dir_path, "--outdir", output_dir,
+                           "--case-dir", self.case_dir, "--precount"]
                     self.scan_output.insert("end", f"Running: {' '.join(cmd)}\n\n")
                     self.scan_output.see("end")
 
@@ -530,11 +531,26 @@ class MonitorApp(tk.Tk):
                 win.append('Tail error: ' + str(e))
         threading.Thread(target=tailer, daemon=True).start()
 
+    def load_status(self):
+        # Progress events written by the scanner (logs/status.json)
+        try:
+            with open(os.path.join(self.case_dir, 'logs', 'status.json'), 'r', errors='ignore') as f:
+                status = json.load(f)
+        except Exception:
+            return
+        if status.get('progress') is not None:
+            self.progress_var.set(int(status['progress']))
+        message = status.get('last_event') or '—'
+        if status.get('eta_seconds') and status.get('progress') != 100:
+            message += f" (ETA {int(status['eta_seconds']) // 60} min {int(status['eta_seconds']) % 60} s)"
+        self.last_event_var.set(message)
+
     def poll(self):
-        # Periodic update: reload metadata and findings
+        # Periodic update: reload metadata, findings and scan progress
         try:
             self.load_metadata()
             self.load_findings()
+            self.load_status()
         except Exception:
             pass
         self.after(2000, self.poll)
@@ -50,9 +50,27 @@ def load_masked_findings(case_dir, max_items=200):
     for name in sorted(os.listdir(reports_dir)):
         path = os.path.join(reports_dir, name)
         try:
-            if name.endswith(".json"):
+            if name.endswith(".jsonl"):
+                # stream of a running (or interrupted) scan; the finished
+                # scan's .json covers the same hits
+                if os.path.exists(path[:-1]):
+                    continue
+                data = []
+                with open(path, "r", errors="ignore") as f:
+                    for line in f:
+                        try:
+                            data.append(json.loads(line))
+                        except ValueError:
+                            continue
+            elif name.endswith(".json"):
                 with open(path, "r", errors="ignore") as f:
                     data = json.load(f)
+                # metrics and slow-file reports are objects, not hit lists
+                if not isinstance(data, list):
+                    data = None
+            else:
+                data = None
+            if data is not None:
                 for item in data:
                     # Use snippet if present, otherwise redact
                     snippet = item.get("snippet", "")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Archive traversal for the wallet scanner (members are never extracted to disk).
+- ZIP, TAR (plain, .tar.gz/.tgz, .tar.bz2, .tar.xz) and single-file
+  .gz/.bz2/.xz streams, recognised by their magic bytes
+- Nested archives are entered up to a depth limit
+- Members are streamed in chunks into the caller's detector/hash pipeline
+- A decompression-ratio guard (and a member count limit) stops archive bombs
+Notes:
+- Member paths join container and member with '!/':
+  backup.zip!/wallets/b.tar.gz!/wallet.dat
+- Nested ZIPs need random access and are buffered in memory up to
+  NESTED_ZIP_MAX; larger ones are listed but not entered.
+- Uses only standard library.
+"""
+import bz2
+import gzip
+import io
+import lzma
+import os
+import tarfile
+import zipfile
+import zlib
+from collections import namedtuple
+
+READ_CHUNK = 1048576
+PEEK = 512                 # enough for the tar magic at offset 257
+MAX_DEPTH = 3              # archive levels entered (the outer archive counts)
+MAX_RATIO = 100            # decompressed bytes allowed per compressed byte
+RATIO_FLOOR = 16777216     # small archives may always expand this far
+MAX_MEMBERS = 100000
+NESTED_ZIP_MAX = 67108864
+
+# stream: iterable of content chunks, None when the content is not scanned
+# (nested archive entered instead, encrypted or unsupported member)
+Member = namedtuple('Member', 'path name size stream')
+
+_READ_ERRORS = (zipfile.BadZipFile, zipfile.LargeZipFile, tarfile.TarError, EOFError,
+                OSError, lzma.LZMAError, zlib.error, ValueError, NotImplementedError)
+
+
+class ArchiveError(Exception):
+    """An archive could not be read to the end."""
+
+
+class ArchiveLimit(ArchiveError):
+    """An archive exceeded the decompression ratio or member limit."""
+
+
+def archive_kind(head):
+    """Archive type from the first bytes of a file, or None."""
+    if head[:4] in (b'PK\x03\x04', b'PK\x05\x06'):
+        return 'zip'
+    if head[257:262] == b'ustar':
+        return 'tar'
+    if head[:2] == b'\x1f\x8b':
+        return 'gzip'
+    if head[:3] == b'BZh':
+        return 'bzip2'
+    if head[:6] == b'\xfd7zXZ\x00':
+        return 'xz'
+    return None
+
+
+class Budget:
+    """Decompressed bytes and members allowed for one outer archive."""
+
+    def __init__(self, compressed_size, ratio=MAX_RATIO, floor=RATIO_FLOOR, max_members=MAX_MEMBERS):
+        self.limit = compressed_size * ratio + floor
+        self.max_members = max_members
+        self.used = 0
+        self.members = 0
+
+    def take(self, n):
+        self.used += n
+        if self.used > self.limit:
+            raise ArchiveLimit('decompressed more than %d bytes (ratio limit)' % self.limit)
+
+    def member(self):
+        self.members += 1
+        if self.members > self.max_members:
+            raise ArchiveLimit('more than %d members' % self.max_members)
+
+
+class _Prefixed:
+    """Read-only stream that returns already peeked bytes first."""
+
+    def __init__(self, head, f):
+        self.head = head
+        self.f = f
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def read(self, n=-1):
+        if not self.head:
+            return self.f.read(n)
+        if n is None or n < 0:
+            data, self.head = self.head + self.f.read(), b''
+            return data
+        data, self.head = self.head[:n], self.head[n:]
+        if len(data) < n:
+            data += self.f.read(n - len(data))
+        return data
+
+
+class MemberStream:
+    """Chunks of one member; charges them to the budget and counts them."""
+
+    def __init__(self, f, budget, head=b''):
+        self.f = f
+        self.budget = budget
+        self.head = head
+        self.consumed = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.head:
+            data, self.head = self.head, b''
+        else:
+            try:
+                data = self.f.read(READ_CHUNK)
+            except _READ_ERRORS as e:
+                raise ArchiveError('unreadable member: %s' % e)
+            if not data:
+                raise StopIteration
+            self.budget.take(len(data))
+        self.consumed += len(data)
+        return data
+
+    def drain(self):
+        for _ in self:
+            pass
+
+
+def _inner_name(name):
+    # name of the single member of a .gz/.bz2/.xz stream
+    stem, ext = os.path.splitext(name)
+    if ext.lower() == '.tgz':
+        return stem + '.tar'
+    return stem if ext.lower() in ('.gz', '.bz2', '.xz') else name
+
+
+def _entry(path, name, size, f, budget, depth):
+    """One member: streamed as content, or entered when it is itself an archive."""
+    head = f.read(PEEK)
+    budget.take(len(head))
+    kind = archive_kind(head) if depth > 0 else None
+    if kind is None:
+        yield Member(path, name, size, MemberStream(f, budget, head))
+        return
+    yield Member(path, name, size, None)
+    yield from _members(kind, _Prefixed(head, f), path + '!/', name, size, budget, depth - 1)
+
+
+def _members(kind, f, prefix, name, size, budget, depth):
+    if kind == 'zip':
+        if not f.seekable():
+            if size is None or size > NESTED_ZIP_MAX:
+                return
+            data = f.read(size + 1)
+            budget.take(len(data))
+            f = io.BytesIO(data)
+        with zipfile.ZipFile(f) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                budget.member()
+                path = prefix + info.filename
+                base = info.filename.rstrip('/').rsplit('/', 1)[-1]
+                try:
+                    mf = zf.open(info)
+                except (RuntimeError, NotImplementedError):
+                    # encrypted or unsupported compression: name only
+                    yield Member(path, base, info.file_size, None)
+                    continue
+                with mf:
+                    yield from _entry(path, base, info.file_size, mf, budget, depth)
+    elif kind == 'tar':
+        with tarfile.open(fileobj=f, mode='r|') as tf:
+            for m in tf:
+                budget.member()
+                if not m.isfile():
+                    continue
+                inner = m.name[2:] if m.name.startswith('./') else m.name.lstrip('/')
+                base = inner.rsplit('/', 1)[-1]
+                yield from _entry(prefix + inner, base, m.size, tf.extractfile(m), budget, depth)
+    else:
+        opener = {'gzip': gzip.GzipFile, 'bzip2': bz2.BZ2File, 'xz': lzma.LZMAFile}[kind]
+        with opener(fileobj=f) if kind == 'gzip' else opener(f) as stream:
+            head = stream.read(PEEK)
+            budget.take(len(head))
+            if head[257:262] == b'ustar':
+                # .tar.gz and friends: the tar members sit directly below the file
+                yield from _members('tar', _Prefixed(head, stream), prefix, name, size, budget, depth)
+                return
+            inner = _inner_name(name)
+            yield from _entry(prefix + inner, inner, None, _Prefixed(head, stream), budget, depth)
+
+
+def iter_members(f, name, size, depth=MAX_DEPTH, budget=None):
+    """Yield the Members of the archive in the seekable file f (nothing if f is no archive).
+
+    Each member's stream must be consumed (or abandoned) before the next
+    member is requested. Raises ArchiveError (ArchiveLimit for bombs) when
+    the archive cannot be read to the end; members yielded so far stand.
+    """
+    if depth <= 0:
+        return
+    head = f.read(PEEK)
+    f.seek(0)
+    kind = archive_kind(head)
+    if kind is None:
+        return
+    budget = budget or Budget(size)
+    try:
+        yield from _members(kind, f, '', name, size, budget, depth - 1)
+    except _READ_ERRORS as e:
+        raise ArchiveError('unreadable archive: %s' % e)
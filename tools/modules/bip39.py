@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Linear-time mnemonic (seed phrase) detector.
+- Tokenizes the buffer once into runs of letters and tracks runs of
+  consecutive wordlist words; short printable separators between words
+  (whitespace, numbering, punctuation, JSON/ini/XML syntax) keep a run
+  going, long or binary gaps break it
+- Reports runs of 12/15/18/21/24 words (BIP39 lengths)
+- Optional checksum verification (BIP39 checksum or Electrum seed version)
+- Optional extra wordlists (e.g. the Electrum 1.x list) loaded from files
+Notes:
+- Works on str and bytes-like buffers; offsets refer to the given buffer.
+- Uses only standard library.
+"""
+import hashlib
+import hmac
+import re
+
+# BIP39 English wordlist (2048 words, index order)
+ENGLISH = tuple("""
+abandon ability able about above absent absorb abstract absurd abuse access
+accident account accuse achieve acid acoustic acquire across act action
+actor actress actual adapt add addict address adjust admit adult advance
+advice aerobic affair afford afraid again age agent agree ahead aim air
+airport aisle alarm album alcohol alert alien all alley allow almost alone
+alpha already also alter always amateur amazing among amount amused analyst
+anchor ancient anger angle angry animal ankle announce annual another answer
+antenna antique anxiety any apart apology appear apple approve april arch
+arctic area arena argue arm armed armor army around arrange arrest arrive
+arrow art artefact artist artwork ask aspect assault asset assist assume
+asthma athlete atom attack attend attitude attract auction audit august aunt
+author auto autumn average avocado avoid awake aware away awesome awful
+awkward axis baby bachelor bacon badge bag balance balcony ball bamboo
+banana banner bar barely bargain barrel base basic basket battle beach bean
+beauty because become beef before begin behave behind believe below belt
+bench benefit best betray better between beyond bicycle bid bike bind
+biology bird birth bitter black blade blame blanket blast bleak bless blind
+blood blossom blouse blue blur blush board boat body boil bomb bone bonus
+book boost border boring borrow boss bottom bounce box boy bracket brain
+brand brass brave bread breeze brick bridge brief bright bring brisk
+broccoli broken bronze broom brother brown brush bubble buddy budget buffalo
+build bulb bulk bullet bundle bunker burden burger burst bus business busy
+butter buyer buzz cabbage cabin cable cactus cage cake call calm camera camp
+can canal cancel candy cannon canoe canvas canyon capable capital captain
+car carbon card cargo carpet carry cart case cash casino castle casual cat
+catalog catch category cattle caught cause caution cave ceiling celery
+cement census century cereal certain chair chalk champion change chaos
+chapter charge chase chat cheap check cheese chef cherry chest chicken chief
+child chimney choice choose chronic chuckle chunk churn cigar cinnamon
+circle citizen city civil claim clap clarify claw clay clean clerk clever
+click client cliff climb clinic clip clock clog close cloth cloud clown club
+clump cluster clutch coach coast coconut code coffee coil coin collect color
+column combine come comfort comic common company concert conduct confirm
+congress connect consider control convince cook cool copper copy coral core
+corn correct cost cotton couch country couple course cousin cover coyote
+crack cradle craft cram crane crash crater crawl crazy cream credit creek
+crew cricket crime crisp critic crop cross crouch crowd crucial cruel cruise
+crumble crunch crush cry crystal cube culture cup cupboard curious current
+curtain curve cushion custom cute cycle dad damage damp dance danger daring
+dash daughter dawn day deal debate debris decade december decide decline
+decorate decrease deer defense define defy degree delay deliver demand
+demise denial dentist deny depart depend deposit depth deputy derive
+describe desert design desk despair destroy detail detect develop device
+devote diagram dial diamond diary dice diesel diet differ digital dignity
+dilemma dinner dinosaur direct dirt disagree discover disease dish dismiss
+disorder display distance divert divide divorce dizzy doctor document dog
+doll dolphin domain donate donkey donor door dose double dove draft dragon
+drama drastic draw dream dress drift drill drink drip drive drop drum dry
+duck dumb dune during dust dutch duty dwarf dynamic eager eagle early earn
+earth easily east easy echo ecology economy edge edit educate effort egg
+eight either elbow elder electric elegant element elephant elevator elite
+else embark embody embrace emerge emotion employ empower empty enable enact
+end endless endorse enemy energy enforce engage engine enhance enjoy enlist
+enough enrich enroll ensure enter entire entry envelope episode equal equip
+era erase erode erosion error erupt escape essay essence estate eternal
+ethics evidence evil evoke evolve exact example excess exchange excite
+exclude excuse execute exercise exhaust exhibit exile exist exit exotic
+expand expect expire explain expose express extend extra eye eyebrow fabric
+face faculty fade faint faith fall false fame family famous fan fancy
+fantasy farm fashion fat fatal father fatigue fault favorite feature
+february federal fee feed feel female fence festival fetch fever few fiber
+fiction field figure file film filter final find fine finger finish fire
+firm first fiscal fish fit fitness fix flag flame flash flat flavor flee
+flight flip float flock floor flower fluid flush fly foam focus fog foil
+fold follow food foot force forest forget fork fortune forum forward fossil
+foster found fox fragile frame frequent fresh friend fringe frog front frost
+frown frozen fruit fuel fun funny furnace fury future gadget gain galaxy
+gallery game gap garage garbage garden garlic garment gas gasp gate gather
+gauge gaze general genius genre gentle genuine gesture ghost giant gift
+giggle ginger giraffe girl give glad glance glare glass glide glimpse globe
+gloom glory glove glow glue goat goddess gold good goose gorilla gospel
+gossip govern gown grab grace grain grant grape grass gravity great green
+grid grief grit grocery group grow grunt guard guess guide guilt guitar gun
+gym habit hair half hammer hamster hand happy harbor hard harsh harvest hat
+have hawk hazard head health heart heavy hedgehog height hello helmet help
+hen hero hidden high hill hint hip hire history hobby hockey hold hole
+holiday hollow home honey hood hope horn horror horse hospital host hotel
+hour hover hub huge human humble humor hundred hungry hunt hurdle hurry hurt
+husband hybrid ice icon idea identify idle ignore ill illegal illness image
+imitate immense immune impact impose improve impulse inch include income
+increase index indicate indoor industry infant inflict inform inhale inherit
+initial inject injury inmate inner innocent input inquiry insane insect
+inside inspire install intact interest into invest invite involve iron
+island isolate issue item ivory jacket jaguar jar jazz jealous jeans jelly
+jewel job join joke journey joy judge juice jump jungle junior junk just
+kangaroo keen keep ketchup key kick kid kidney kind kingdom kiss kit kitchen
+kite kitten kiwi knee knife knock know lab label labor ladder lady lake lamp
+language laptop large later latin laugh laundry lava law lawn lawsuit layer
+lazy leader leaf learn leave lecture left leg legal legend leisure lemon
+lend length lens leopard lesson letter level liar liberty library license
+life lift light like limb limit link lion liquid list little live lizard
+load loan lobster local lock logic lonely long loop lottery loud lounge love
+loyal lucky luggage lumber lunar lunch luxury lyrics machine mad magic
+magnet maid mail main major make mammal man manage mandate mango mansion
+manual maple marble march margin marine market marriage mask mass master
+match material math matrix matter maximum maze meadow mean measure meat
+mechanic medal media melody melt member memory mention menu mercy merge
+merit merry mesh message metal method middle midnight milk million mimic
+mind minimum minor minute miracle mirror misery miss mistake mix mixed
+mixture mobile model modify mom moment monitor monkey monster month moon
+moral more morning mosquito mother motion motor mountain mouse move movie
+much muffin mule multiply muscle museum mushroom music must mutual myself
+mystery myth naive name napkin narrow nasty nation nature near neck need
+negative neglect neither nephew nerve nest net network neutral never news
+next nice night noble noise nominee noodle normal north nose notable note
+nothing notice novel now nuclear number nurse nut oak obey object oblige
+obscure observe obtain obvious occur ocean october odor off offer office
+often oil okay old olive olympic omit once one onion online only open opera
+opinion oppose option orange orbit orchard order ordinary organ orient
+original orphan ostrich other outdoor outer output outside oval oven over
+own owner oxygen oyster ozone pact paddle page pair palace palm panda panel
+panic panther paper parade parent park parrot party pass patch path patient
+patrol pattern pause pave payment peace peanut pear peasant pelican pen
+penalty pencil people pepper perfect permit person pet phone photo phrase
+physical piano picnic picture piece pig pigeon pill pilot pink pioneer pipe
+pistol pitch pizza place planet plastic plate play please pledge pluck plug
+plunge poem poet point polar pole police pond pony pool popular portion
+position possible post potato pottery poverty powder power practice praise
+predict prefer prepare present pretty prevent price pride primary print
+priority prison private prize problem process produce profit program project
+promote proof property prosper protect proud provide public pudding pull
+pulp pulse pumpkin punch pupil puppy purchase purity purpose purse push put
+puzzle pyramid quality quantum quarter question quick quit quiz quote rabbit
+raccoon race rack radar radio rail rain raise rally ramp ranch random range
+rapid rare rate rather raven raw razor ready real reason rebel rebuild
+recall receive recipe record recycle reduce reflect reform refuse region
+regret regular reject relax release relief rely remain remember remind
+remove render renew rent reopen repair repeat replace report require rescue
+resemble resist resource response result retire retreat return reunion
+reveal review reward rhythm rib ribbon rice rich ride ridge rifle right
+rigid ring riot ripple risk ritual rival river road roast robot robust
+rocket romance roof rookie room rose rotate rough round route royal rubber
+rude rug rule run runway rural sad saddle sadness safe sail salad salmon
+salon salt salute same sample sand satisfy satoshi sauce sausage save say
+scale scan scare scatter scene scheme school science scissors scorpion scout
+scrap screen script scrub sea search season seat second secret section
+security seed seek segment select sell seminar senior sense sentence series
+service session settle setup seven shadow shaft shallow share shed shell
+sheriff shield shift shine ship shiver shock shoe shoot shop short shoulder
+shove shrimp shrug shuffle shy sibling sick side siege sight sign silent
+silk silly silver similar simple since sing siren sister situate six size
+skate sketch ski skill skin skirt skull slab slam sleep slender slice slide
+slight slim slogan slot slow slush small smart smile smoke smooth snack
+snake snap sniff snow soap soccer social sock soda soft solar soldier solid
+solution solve someone song soon sorry sort soul sound soup source south
+space spare spatial spawn speak special speed spell spend sphere spice
+spider spike spin spirit split spoil sponsor spoon sport spot spray spread
+spring spy square squeeze squirrel stable stadium staff stage stairs stamp
+stand start state stay steak steel stem step stereo stick still sting stock
+stomach stone stool story stove strategy street strike strong struggle
+student stuff stumble style subject submit subway success such sudden suffer
+sugar suggest suit summer sun sunny sunset super supply supreme sure surface
+surge surprise surround survey suspect sustain swallow swamp swap swarm
+swear sweet swift swim swing switch sword symbol symptom syrup system table
+tackle tag tail talent talk tank tape target task taste tattoo taxi teach
+team tell ten tenant tennis tent term test text thank that theme then theory
+there they thing this thought three thrive throw thumb thunder ticket tide
+tiger tilt timber time tiny tip tired tissue title toast tobacco today
+toddler toe together toilet token tomato tomorrow tone tongue tonight tool
+tooth top topic topple torch tornado tortoise toss total tourist toward
+tower town toy track trade traffic tragic train transfer trap trash travel
+tray treat tree trend trial tribe trick trigger trim trip trophy trouble
+truck true truly trumpet trust truth try tube tuition tumble tuna tunnel
+turkey turn turtle twelve twenty twice twin twist two type typical ugly
+umbrella unable unaware uncle uncover under undo unfair unfold unhappy
+uniform unique unit universe unknown unlock until unusual unveil update
+upgrade uphold upon upper upset urban urge usage use used useful useless
+usual utility vacant vacuum vague valid valley valve van vanish vapor
+various vast vault vehicle velvet vendor venture venue verb verify version
+very vessel veteran viable vibrant vicious victory video view village
+vintage violin virtual virus visa visit visual vital vivid vocal voice void
+volcano volume vote voyage wage wagon wait walk wall walnut want warfare
+warm warrior wash wasp waste water wave way wealth weapon wear weasel
+weather web wedding weekend weird welcome west wet whale what wheat wheel
+when where whip whisper wide width wife wild will win window wine wing wink
+winner winter wire wisdom wise wish witness wolf woman wonder wood wool word
+work world worry worth wrap wreck wrestle wrist write wrong yard year yellow
+you young youth zebra zero zone zoo
+""".split())
+
+MNEMONIC_LENGTHS = (24, 21, 18, 15, 12)
+MAX_WORD_LEN = 8
+MAX_GAP = 16  # separator bytes between two words of a run
+# upper bound for a 24-word run incl. numbering and separators
+MAX_MNEMONIC_SPAN = 24 * MAX_WORD_LEN + 23 * MAX_GAP
+
+# tokens are runs of letters; a gap between them of up to MAX_GAP printable
+# non-letters (whitespace, numbering, punctuation, JSON/ini/XML syntax) is
+# skipped, while a longer gap or a control byte is a token of its own that
+# is no word and so breaks the run
+_TOKEN_STR = re.compile(r'[^\W\d_]+|[\W\d_]{%d,}|[\x00-\x08\x0e-\x1f\x7f]' % (MAX_GAP + 1))
+_TOKEN_BYTES = re.compile(rb'[A-Za-z]+|[^A-Za-z]{%d,}|[\x00-\x08\x0e-\x1f\x7f-\xff]' % (MAX_GAP + 1))
+# letters only: runs over these are a superset, checked first because it is cheaper
+_LETTERS_STR = re.compile(r'[^\W\d_]+')
+_LETTERS_BYTES = re.compile(rb'[A-Za-z]+')
+
+# token classes from has_candidate(): 1 = word, 0 = anything else
+_CANDIDATE_RUN = re.compile(rb'\x01{%d}' % MNEMONIC_LENGTHS[-1])
+
+# Electrum 2.x+ seed version prefixes: standard, segwit, 2fa, 2fa-segwit
+ELECTRUM_PREFIXES = ('01', '100', '101', '102')
+
+
+def load_wordlist(path):
+    """Read a newline separated wordlist file (e.g. Electrum's old_mnemonic list)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return tuple(w.strip().lower() for w in f if w.strip())
+
+
+def bip39_checksum_valid(words, wordlist=ENGLISH):
+    """Return True if the word sequence carries a valid BIP39 checksum."""
+    if len(words) not in MNEMONIC_LENGTHS:
+        return False
+    index = {w: i for i, w in enumerate(wordlist)} if wordlist is not ENGLISH else _ENGLISH_INDEX
+    try:
+        value = 0
+        for w in words:
+            value = (value << 11) | index[w]
+    except KeyError:
+        return False
+    total_bits = len(words) * 11
+    cs_bits = total_bits // 33
+    ent_bits = total_bits - cs_bits
+    entropy = (value >> cs_bits).to_bytes(ent_bits // 8, 'big')
+    checksum = value & ((1 << cs_bits) - 1)
+    return hashlib.sha256(entropy).digest()[0] >> (8 - cs_bits) == checksum
+
+
+def electrum_seed_valid(words):
+    """Return True if the words form an Electrum 2.x+ seed (version prefix check)."""
+    seed = ' '.join(words)
+    digest = hmac.new(b'Seed version', seed.encode('utf-8'), hashlib.sha512).hexdigest()
+    return digest.startswith(ELECTRUM_PREFIXES)
+
+
+class MnemonicMatch:
+    """Minimal match object compatible with re.Match start()/end()/group()."""
+
+    def __init__(self, data, start, end, words, wordlist):
+        self._data = data
+        self._start = start
+        self._end = end
+        self.words = words
+        self.wordlist = wordlist
+
+    def start(self):
+        return self._start
+
+    def end(self):
+        return self._end
+
+    def span(self):
+        return self._start, self._end
+
+    def group(self, index=0):
+        return self._data[self._start:self._end]
+
+
+class MnemonicDetector:
+    """Find mnemonic-length runs of wordlist words in a single pass.
+
+    Drop-in for a compiled regex in CONTENT_PATTERNS: exposes ``pattern``,
+    ``search()`` and ``finditer()``, plus the ``sensitive`` flag.
+    """
+
+    sensitive = True
+    max_match_len = MAX_MNEMONIC_SPAN
+
+    def __init__(self, wordlists=None, verify_checksum=False):
+        self.pattern = 'bip39-mnemonic' + (':checksum' if verify_checksum else '')
+        self.verify_checksum = verify_checksum
+        # (name, wordlist, str-set, bytes-set); English is always first
+        self.wordlists = [('bip39-english', ENGLISH)]
+        for i, wl in enumerate(wordlists or ()):
+            self.wordlists.append(('extra-%d' % (i + 1), tuple(wl)))
+        self._sets = []
+        for name, wl in self.wordlists:
+            self._sets.append((name, wl, frozenset(wl), frozenset(w.encode('ascii', 'ignore') for w in wl)))
+        # fingerprint for scan indexes/caches: pattern plus every wordlist
+        h = hashlib.sha256(self.pattern.encode('utf-8'))
+        for name, wl in self.wordlists:
+            h.update(' '.join(wl).encode('utf-8'))
+        self.version = 'MnemonicDetector/' + h.hexdigest()[:16]
+        self._union_str = frozenset().union(*[sset for _, _, sset, _ in self._sets])
+        self._union_bytes = frozenset().union(*[bset for _, _, _, bset in self._sets])
+
+    def has_candidate(self, data):
+        """Cheap pre-check: is there any run of 12+ wordlist words at all?
+
+        Splits and classifies tokens with C-level helpers and looks for a run
+        with a bytes regex, so buffers without candidates skip the slower
+        offset-tracking pass in finditer(). Runs are looked for over letters
+        only first and then with the gap limit.
+        """
+        is_str = isinstance(data, str)
+        if not is_str and not isinstance(data, bytes):
+            data = bytes(data)
+        words = self._union_str if is_str else self._union_bytes
+        # classify each distinct token once; text repeats tokens heavily
+        classes = {}
+        for token_re in ((_LETTERS_STR, _TOKEN_STR) if is_str else (_LETTERS_BYTES, _TOKEN_BYTES)):
+            tokens = token_re.findall(data)
+            for t in set(tokens).difference(classes):
+                classes[t] = 1 if len(t) <= MAX_WORD_LEN and t.lower() in words else 0
+            if _CANDIDATE_RUN.search(bytes(map(classes.__getitem__, tokens))) is None:
+                return False
+        return True
+
+    def search(self, data):
+        for m in self.finditer(data):
+            return m
+        return None
+
+    def finditer(self, data):
+        if not self.has_candidate(data):
+            return
+        is_str = isinstance(data, str)
+        token_re = _TOKEN_STR if is_str else _TOKEN_BYTES
+        nsets = len(self._sets)
+        # per wordlist: list of (start, end, word) in the current run
+        runs = [[] for _ in range(nsets)]
+        for tok in token_re.finditer(data):
+            t = tok.group()
+            word = t.lower() if len(t) <= MAX_WORD_LEN else None
+            start, end = tok.span()
+            for k in range(nsets):
+                name, wl, sset, bset = self._sets[k]
+                if word is not None and word in (sset if is_str else bset):
+                    runs[k].append((start, end, word if is_str else word.decode('ascii')))
+                    continue
+                if len(runs[k]) >= MNEMONIC_LENGTHS[-1]:
+                    m = self._best_window(data, runs[k], wl)
+                    if m:
+                        yield m
+                runs[k] = []
+        for k in range(nsets):
+            if len(runs[k]) >= MNEMONIC_LENGTHS[-1]:
+                m = self._best_window(data, runs[k], self._sets[k][1])
+                if m:
+                    yield m
+
+    def _best_window(self, data, run, wordlist):
+        n = len(run)
+        if not self.verify_checksum:
+            length = next(l for l in MNEMONIC_LENGTHS if l <= n)
+            window = run[:length]
+            return MnemonicMatch(data, window[0][0], window[-1][1], [w for _, _, w in window], wordlist)
+        bip39 = wordlist is ENGLISH
+        for length in MNEMONIC_LENGTHS:
+            for first in range(0, n - length + 1):
+                window = run[first:first + length]
+                words = [w for _, _, w in window]
+                if bip39 and (bip39_checksum_valid(words) or electrum_seed_valid(words)):
+                    return MnemonicMatch(data, window[0][0], window[-1][1], words, wordlist)
+                if not bip39 and length == 12:
+                    # Electrum 1.x seeds have no checksum
+                    return MnemonicMatch(data, window[0][0], window[-1][1], words, wordlist)
+        return None
+
+
+_ENGLISH_INDEX = {w: i for i, w in enumerate(ENGLISH)}
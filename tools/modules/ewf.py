@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Read-only EWF (EnCase .E01) evidence container reader.
+- Follows the section chain of every segment (.E01, .E02, ... .EAA)
+- Builds the chunk offset table from the 'table' sections
+- Decompresses zlib chunks on demand through a thread-safe LRU chunk cache
+- A small thread pool prefetches the next chunks during sequential reads
+  (zlib releases the GIL, so decompression really runs in parallel)
+- EwfImage is a seekable, read-only file object and also offers pread()
+- Verifies the media against the MD5/SHA1 stored in the 'hash'/'digest' sections
+Usage:
+  python3 tools/modules/ewf.py image.E01
+  python3 tools/modules/ewf.py --verify image.E01
+Notes:
+- Uses only standard library.
+"""
+import argparse
+import hashlib
+import io
+import os
+import struct
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+EVF_SIGNATURE = b'EVF\x09\x0d\x0a\xff\x00'
+FILE_HEADER_SIZE = 13
+SECTION_SIZE = 76
+
+CACHE_CHUNKS = 64       # decompressed chunks kept (2 MiB at 32 KiB chunks)
+PREFETCH_CHUNKS = 8     # chunks decoded ahead of a sequential reader
+PREFETCH_WORKERS = 2
+
+
+class EwfError(Exception):
+    pass
+
+
+def is_ewf(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(8) == EVF_SIGNATURE
+    except OSError:
+        return False
+
+
+def segment_name(first, number):
+    """Path of segment `number` given the first segment (.E01 -> .E02 ... .E99, .EAA ...)."""
+    stem, ext = os.path.splitext(first)
+    letter = ext[1:2] or 'E'
+    if number <= 99:
+        suffix = '%02d' % number
+    else:
+        n = number - 100
+        suffix = chr(ord('A') + n // 26 % 26) + chr(ord('A') + n % 26)
+        if ext[1:2].islower():
+            suffix = suffix.lower()
+    return stem + '.' + letter + suffix
+
+
+def _sections(f):
+    """Yield (type, offset, size) for each section of one segment file."""
+    offset = FILE_HEADER_SIZE
+    seen = set()
+    while offset not in seen:
+        seen.add(offset)
+        f.seek(offset)
+        desc = f.read(SECTION_SIZE)
+        if len(desc) < SECTION_SIZE:
+            return
+        stype = desc[:16].rstrip(b'\0').decode('ascii', errors='replace')
+        nxt, size = struct.unpack_from('<QQ', desc, 16)
+        yield stype, offset, size
+        if stype in ('next', 'done') or nxt <= offset:
+            return
+        offset = nxt
+
+
+class EwfImage(io.RawIOBase):
+    """Seekable read-only view of the media stored in an EWF image."""
+
+    def __init__(self, path, cache_chunks=CACHE_CHUNKS, prefetch=PREFETCH_CHUNKS,
+                 workers=PREFETCH_WORKERS):
+        super().__init__()
+        self.path = path
+        self.cache_chunks = cache_chunks
+        self.prefetch = prefetch
+        self.md5 = None
+        self.sha1 = None
+        self.chunk_size = None
+        self.size = None
+        self._files = []
+        self._chunks = []   # (file index, offset, stored size, compressed)
+        self._cache = OrderedDict()
+        self._inflight = {}
+        # RLock: a prefetch that finishes immediately runs its callback in the submitter
+        self._lock = threading.RLock()
+        self._pos = 0
+        self._last_chunk = -1
+        self._pool = ThreadPoolExecutor(max_workers=workers) if prefetch and workers else None
+        try:
+            self._open_segments()
+        except Exception:
+            self.close()
+            raise
+
+    # -- parsing
+
+    def _open_segments(self):
+        number = 1
+        path = self.path
+        while True:
+            f = open(path, 'rb')
+            self._files.append(f)
+            header = f.read(FILE_HEADER_SIZE)
+            if header[:8] != EVF_SIGNATURE:
+                raise EwfError('%s: not an EWF segment' % path)
+            last = self._parse_segment(len(self._files) - 1, f)
+            if last == 'done':
+                break
+            number += 1
+            path = segment_name(self.path, number)
+            if not os.path.exists(path):
+                raise EwfError('missing segment %s' % path)
+        if self.chunk_size is None:
+            raise EwfError('no volume section')
+        if len(self._chunks) * self.chunk_size < self.size:
+            raise EwfError('chunk table covers %d of %d bytes' % (len(self._chunks) * self.chunk_size, self.size))
+
+    def _parse_segment(self, index, f):
+        sectors_end = None
+        stype = None
+        for stype, offset, size in _sections(f):
+            data_offset = offset + SECTION_SIZE
+            if stype in ('volume', 'disk'):
+                f.seek(data_offset)
+                vol = f.read(24)
+                _, per_chunk, sector_size, sectors = struct.unpack_from('<4xIIIQ', vol)
+                self.chunk_size = per_chunk * sector_size
+                self.size = sectors * sector_size
+            elif stype == 'sectors':
+                sectors_end = offset + size
+            elif stype == 'table':
+                self._parse_table(index, f, data_offset, sectors_end or offset)
+            elif stype == 'hash':
+                f.seek(data_offset)
+                self.md5 = self.md5 or f.read(16).hex()
+            elif stype == 'digest':
+                f.seek(data_offset)
+                digest = f.read(36)
+                self.md5 = digest[:16].hex()
+                self.sha1 = digest[16:36].hex()
+        return stype
+
+    def _parse_table(self, index, f, data_offset, end):
+        f.seek(data_offset)
+        header = f.read(24)
+        count, base = struct.unpack_from('<I4xQ', header)
+        raw = f.read(4 * count)
+        if len(raw) < 4 * count:
+            raise EwfError('truncated table section')
+        entries = struct.unpack('<%dI' % count, raw)
+        offsets = [base + (e & 0x7FFFFFFF) for e in entries]
+        for i, e in enumerate(entries):
+            stop = offsets[i + 1] if i + 1 < count else end
+            self._chunks.append((index, offsets[i], stop - offsets[i], bool(e & 0x80000000)))
+
+    @property
+    def chunk_count(self):
+        return len(self._chunks)
+
+    @property
+    def segment_count(self):
+        return len(self._files)
+
+    # -- chunk access
+
+    def _load_chunk(self, n):
+        index, offset, stored, compressed = self._chunks[n]
+        f = self._files[index]
+        want = min(self.chunk_size, self.size - n * self.chunk_size)
+        if compressed:
+            data = zlib.decompressobj().decompress(os.pread(f.fileno(), stored, offset), want)
+        else:
+            # stored chunks carry a trailing adler32
+            data = os.pread(f.fileno(), want, offset)
+        if len(data) != want:
+            raise EwfError('chunk %d: expected %d bytes, got %d' % (n, want, len(data)))
+        return data
+
+    def chunk(self, n):
+        with self._lock:
+            data = self._cache.get(n)
+            if data is not None:
+                self._cache.move_to_end(n)
+                return data
+            future = self._inflight.get(n)
+        data = future.result() if future is not None else self._load_chunk(n)
+        with self._lock:
+            self._inflight.pop(n, None)
+            self._store(n, data)
+            sequential = n == self._last_chunk + 1
+            self._last_chunk = n
+        if sequential:
+            self.prefetch_chunks(n + 1, self.prefetch)
+        return data
+
+    def prefetch_chunks(self, first, count):
+        if self._pool is None:
+            return
+        with self._lock:
+            for n in range(first, min(first + count, len(self._chunks))):
+                if n not in self._cache and n not in self._inflight:
+                    future = self._pool.submit(self._load_chunk, n)
+                    self._inflight[n] = future
+                    future.add_done_callback(lambda fut, n=n: self._prefetched(n, fut))
+
+    def _prefetched(self, n, future):
+        # move finished prefetches into the cache so skipped ones do not pile up
+        with self._lock:
+            if self._inflight.get(n) is future:
+                del self._inflight[n]
+                if not future.cancelled() and future.exception() is None:
+                    self._store(n, future.result())
+
+    def _store(self, n, data):
+        self._cache[n] = data
+        self._cache.move_to_end(n)
+        while len(self._cache) > self.cache_chunks:
+            self._cache.popitem(last=False)
+
+    def readahead(self, offset, length):
+        if length > 0 and self.chunk_size:
+            first = offset // self.chunk_size
+            self.prefetch_chunks(first, (offset + length - 1) // self.chunk_size - first + 1)
+
+    def pread(self, length, offset):
+        """Media bytes [offset, offset + length), like os.pread."""
+        if offset >= self.size or length <= 0:
+            return b''
+        length = min(length, self.size - offset)
+        parts = []
+        while length > 0:
+            n, inner = divmod(offset, self.chunk_size)
+            piece = self.chunk(n)[inner:inner + length]
+            parts.append(piece)
+            offset += len(piece)
+            length -= len(piece)
+        return b''.join(parts)
+
+    # -- file object interface
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError('negative seek position')
+        self._pos = offset
+        return self._pos
+
+    def readinto(self, b):
+        data = self.pread(len(b), self._pos)
+        b[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        for f in self._files:
+            f.close()
+        self._files = []
+        super().close()
+
+    # -- verification
+
+    def verify(self, block=1048576):
+        """Hash the media; returns {algorithm: (stored, computed)} for stored digests."""
+        hashers = {'md5': hashlib.md5(), 'sha1': hashlib.sha1()}
+        for offset in range(0, self.size, block):
+            data = self.pread(block, offset)
+            for h in hashers.values():
+                h.update(data)
+        result = {}
+        for name, stored in (('md5', self.md5), ('sha1', self.sha1)):
+            if stored:
+                result[name] = (stored, hashers[name].hexdigest())
+        return result
+
+
+def main():
+    p = argparse.ArgumentParser(description='Inspect or verify an EWF (.E01) image')
+    p.add_argument('image')
+    p.add_argument('--verify', action='store_true', help='Check the media against the stored MD5/SHA1')
+    args = p.parse_args()
+    with EwfImage(args.image) as img:
+        print(f"Media size: {img.size} bytes, chunk size: {img.chunk_size}, "
+              f"chunks: {img.chunk_count}, segments: {img.segment_count}")
+        print(f"Stored MD5: {img.md5 or '-'}  SHA1: {img.sha1 or '-'}")
+        if not args.verify:
+            return 0
+        result = img.verify()
+    if not result:
+        print("No stored hashes to verify against.")
+        return 5
+    ok = True
+    for name, (stored, computed) in result.items():
+        state = 'OK' if stored == computed else 'MISMATCH'
+        ok = ok and stored == computed
+        print(f"{name.upper()}: {state} (stored {stored}, computed {computed})")
+    return 0 if ok else 4
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Structural extractors for wallet stores that a text regex cannot read.
+- Files are routed by their magic bytes (sniff), not by their names
+- Berkeley DB btree (Bitcoin Core wallet.dat): walks the leaf pages and
+  pulls out the key/ckey/mkey/wkey/hdchain/descriptor records
+- LevelDB tables (.ldb/.sst) and write-ahead logs (.log) as used for
+  browser extension storage (MetaMask): walks the blocks, decompresses
+  Snappy blocks and reports 'vault' entries
+- Electrum wallet files: JSON keystores, seeds and whole-file encrypted wallets
+Notes:
+- Extractors work on any buffer that supports slicing (bytes, mmap).
+- Each Record carries its byte offset in the file; for records inside a
+  compressed LevelDB block that is the offset of the block.
+- Snappy is decoded by a small pure-Python decoder.
+- Uses only standard library.
+"""
+import re
+import struct
+from collections import namedtuple
+
+PEEK = 4096
+
+# kind: wallet record type ('' for other decoded records, whose values
+# callers may still run the generic detectors over)
+Record = namedtuple('Record', 'offset kind key value')
+
+# wallet record kinds in reporting order; True marks (possibly encrypted) key material
+KINDS = (
+    ('mkey', True), ('ckey', True), ('key', True), ('wkey', True),
+    ('walletdescriptorckey', True), ('walletdescriptorkey', True),
+    ('seed', True), ('xprv', True), ('master_private_keys', True), ('keypairs', True),
+    ('vault', True), ('encrypted', True),
+    ('hdchain', False), ('walletdescriptor', False), ('keystore', False),
+)
+RANK = {kind: i for i, (kind, _) in enumerate(KINDS)}
+SENSITIVE = dict(KINDS)
+
+
+class ExtractError(Exception):
+    """A file looked like a known format but its structure is broken."""
+
+
+def _varint(buf, pos):
+    result = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+        if shift > 63:
+            raise ExtractError('varint too long')
+
+
+# -- Berkeley DB (Bitcoin Core wallet.dat)
+
+BDB_BTREE_MAGIC = 0x00053162
+BDB_PAGE_HEADER = 26
+P_LBTREE = 5
+B_KEYDATA = 1
+B_OVERFLOW = 3
+BDB_RECORDS = frozenset(kind for kind, _ in KINDS[:6]) | {'hdchain', 'walletdescriptor'}
+
+
+def _bdb_order(head):
+    for order in ('<', '>'):
+        if struct.unpack_from(order + 'I', head, 12)[0] == BDB_BTREE_MAGIC:
+            return order
+    return None
+
+
+def _bdb_item(buf, page, order, pagesize, off):
+    """Bytes of one leaf item (following overflow chains) and the offset of the item."""
+    pos = page + off
+    length, itype = struct.unpack_from(order + 'HB', buf, pos)
+    if itype & 0x7F == B_KEYDATA:
+        return bytes(buf[pos + 3:pos + 3 + length]), pos + 3
+    if itype & 0x7F != B_OVERFLOW:
+        return None, pos
+    # overflow item: the data sits on a chain of overflow pages
+    pgno, total = struct.unpack_from(order + 'II', buf, pos + 4)
+    parts = []
+    seen = set()
+    while pgno and total > 0 and pgno not in seen:
+        seen.add(pgno)
+        start = pgno * pagesize
+        nxt, used = struct.unpack_from(order + 'I2xH', buf, start + 16)
+        parts.append(bytes(buf[start + BDB_PAGE_HEADER:start + BDB_PAGE_HEADER + min(used, total)]))
+        total -= used
+        pgno = nxt
+    return b''.join(parts), pos
+
+
+def _bdb_type(key):
+    # keys start with the record type as a length-prefixed string
+    n = key[0] if key else 0
+    if n == 0 or n >= 253 or n + 1 > len(key):
+        return ''
+    try:
+        return key[1:1 + n].decode('ascii')
+    except UnicodeDecodeError:
+        return ''
+
+
+def iter_bdb(buf):
+    """Records from the btree leaf pages of a Berkeley DB file."""
+    order = _bdb_order(buf[:PEEK])
+    if order is None:
+        raise ExtractError('no btree metadata page')
+    pagesize, encrypt = struct.unpack_from(order + 'IB', buf, 20)
+    if pagesize < 512 or pagesize & (pagesize - 1):
+        raise ExtractError('bad page size %d' % pagesize)
+    if encrypt:
+        raise ExtractError('encrypted database')
+    for pgno in range(1, len(buf) // pagesize):
+        page = pgno * pagesize
+        entries, = struct.unpack_from(order + 'H', buf, page + 20)
+        if buf[page + 25] != P_LBTREE:
+            continue
+        index = struct.unpack_from(order + '%dH' % entries, buf, page + BDB_PAGE_HEADER)
+        # leaf items alternate key, value
+        for i in range(0, entries - 1, 2):
+            key, key_pos = _bdb_item(buf, page, order, pagesize, index[i])
+            value, _ = _bdb_item(buf, page, order, pagesize, index[i + 1])
+            if key is None or value is None:
+                continue
+            kind = _bdb_type(key)
+            yield Record(key_pos, kind if kind in BDB_RECORDS else '', key, value)
+
+
+# -- LevelDB (browser extension storage)
+
+LEVELDB_MAGIC = 0xdb4775248b80fb57
+LEVELDB_FOOTER = 48
+LOG_BLOCK = 32768
+LOG_HEADER = 7
+LOG_FULL, LOG_FIRST, LOG_MIDDLE, LOG_LAST = 1, 2, 3, 4
+_LOG_NAME = re.compile(r'^\d+\.log$')
+_VAULT = re.compile(rb'"vault"\s*:|\\"vault\\"\s*:')
+
+
+def snappy_decompress(data):
+    """Decode one raw Snappy block (no framing)."""
+    size, pos = _varint(data, 0)
+    out = bytearray()
+    end = len(data)
+    while pos < end:
+        tag = data[pos]
+        pos += 1
+        kind = tag & 3
+        if kind == 0:
+            length = tag >> 2
+            if length >= 60:
+                extra = length - 59
+                length = int.from_bytes(data[pos:pos + extra], 'little')
+                pos += extra
+            length += 1
+            if pos + length > end:
+                raise ExtractError('snappy literal past end of block')
+            out += data[pos:pos + length]
+            pos += length
+            continue
+        if kind == 1:
+            length = 4 + ((tag >> 2) & 7)
+            offset = ((tag >> 5) << 8) | data[pos]
+            pos += 1
+        elif kind == 2:
+            length = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + 2], 'little')
+            pos += 2
+        else:
+            length = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + 4], 'little')
+            pos += 4
+        if offset == 0 or offset > len(out):
+            raise ExtractError('snappy copy offset out of range')
+        if offset >= length:
+            start = len(out) - offset
+            out += out[start:start + length]
+        else:
+            # overlapping copy: the last `offset` bytes repeat
+            out += (out[-offset:] * (length // offset + 1))[:length]
+    if len(out) != size:
+        raise ExtractError('snappy block is %d bytes, header says %d' % (len(out), size))
+    return bytes(out)
+
+
+def _ldb_block(buf, offset, size):
+    """Contents of a table block and whether they are the raw file bytes."""
+    data = bytes(buf[offset:offset + size])
+    ctype = buf[offset + size]
+    if ctype == 0:
+        return data, True
+    if ctype == 1:
+        return snappy_decompress(data), False
+    raise ExtractError('unknown block compression %d' % ctype)
+
+
+def _block_entries(block):
+    """(entry offset, key, value) of a prefix-compressed table block."""
+    restarts, = struct.unpack_from('<I', block, len(block) - 4)
+    end = len(block) - 4 - 4 * restarts
+    pos = 0
+    key = b''
+    while pos < end:
+        start = pos
+        shared, pos = _varint(block, pos)
+        unshared, pos = _varint(block, pos)
+        vlen, pos = _varint(block, pos)
+        key = key[:shared] + block[pos:pos + unshared]
+        pos += unshared
+        yield start, key, block[pos:pos + vlen]
+        pos += vlen
+
+
+def _leveldb_record(offset, key, value):
+    kind = 'vault' if _VAULT.search(value) or key.lower().endswith(b'vault') else ''
+    return Record(offset, kind, key, value)
+
+
+def iter_ldb(buf):
+    """Records from the data blocks of a LevelDB table file."""
+    footer = len(buf) - LEVELDB_FOOTER
+    if footer < 0 or struct.unpack_from('<Q', buf, len(buf) - 8)[0] != LEVELDB_MAGIC:
+        raise ExtractError('no table footer')
+    _, pos = _varint(buf, footer)
+    _, pos = _varint(buf, pos)
+    index_offset, pos = _varint(buf, pos)
+    index_size, pos = _varint(buf, pos)
+    index, _ = _ldb_block(buf, index_offset, index_size)
+    for _, _, handle in _block_entries(index):
+        offset, pos = _varint(handle, 0)
+        size, _ = _varint(handle, pos)
+        if offset + size + 5 > footer:
+            raise ExtractError('block handle past the footer')
+        block, raw = _ldb_block(buf, offset, size)
+        for start, key, value in _block_entries(block):
+            # table keys carry an 8-byte sequence/type trailer
+            yield _leveldb_record(offset + start if raw else offset, key[:-8], value)
+
+
+def _log_records(buf):
+    """(offset, payload, single fragment) of each logical record in a LevelDB log."""
+    pending = []
+    first = None
+    pos = 0
+    end = len(buf)
+    while pos + LOG_HEADER <= end:
+        room = LOG_BLOCK - pos % LOG_BLOCK
+        if room < LOG_HEADER:
+            # block trailer padding
+            pos += room
+            continue
+        length, rtype = struct.unpack_from('<HB', buf, pos + 4)
+        if rtype == 0 and length == 0:
+            # preallocated, never written space
+            pos += room
+            continue
+        if rtype not in (LOG_FULL, LOG_FIRST, LOG_MIDDLE, LOG_LAST) or LOG_HEADER + length > room:
+            raise ExtractError('bad log record at %d' % pos)
+        payload = bytes(buf[pos + LOG_HEADER:pos + LOG_HEADER + length])
+        if rtype == LOG_FULL:
+            yield pos, payload, True
+            pending = []
+        elif rtype == LOG_FIRST:
+            first, pending = pos, [payload]
+        elif pending:
+            pending.append(payload)
+            if rtype == LOG_LAST:
+                yield first, b''.join(pending), False
+                pending = []
+        pos += LOG_HEADER + length
+
+
+def iter_log(buf):
+    """Records from the write batches in a LevelDB write-ahead log."""
+    for offset, batch, whole in _log_records(buf):
+        count, = struct.unpack_from('<I', batch, 8)
+        pos = 12
+        for _ in range(count):
+            tag = batch[pos]
+            start = pos
+            klen, pos = _varint(batch, pos + 1)
+            key = batch[pos:pos + klen]
+            pos += klen
+            if tag == 0:
+                # deletion
+                continue
+            vlen, pos = _varint(batch, pos)
+            value = batch[pos:pos + vlen]
+            pos += vlen
+            yield _leveldb_record(offset + LOG_HEADER + start if whole else offset, key, value)
+
+
+# -- Electrum
+
+ELECTRUM_ENCRYPTED = b'QklFMQ'   # base64 of the 'BIE1' magic
+_ELECTRUM_HEAD = re.compile(rb'^\s*\{.*?"(?:seed_version|wallet_type|addr_history|keystore)"\s*:', re.S)
+_ELECTRUM_KEYS = re.compile(rb'"(seed|xprv|master_private_keys|keypairs|keystore)"\s*:')
+
+
+def iter_electrum(buf):
+    """Key records of an Electrum wallet file (or one record for an encrypted file)."""
+    if bytes(buf[:len(ELECTRUM_ENCRYPTED)]) == ELECTRUM_ENCRYPTED:
+        yield Record(0, 'encrypted', b'', b'')
+        return
+    for m in _ELECTRUM_KEYS.finditer(buf):
+        yield Record(m.start(), m.group(1).decode('ascii'), m.group(1), b'')
+
+
+# -- dispatch
+
+EXTRACTORS = {
+    'bdb': iter_bdb,
+    'leveldb': iter_ldb,
+    'leveldb-log': iter_log,
+    'electrum': iter_electrum,
+}
+
+
+def sniff(f, name, size):
+    """Format of the seekable file f by its magic bytes, or None for the generic path."""
+    head = f.read(PEEK)
+    tail = b''
+    if size >= LEVELDB_FOOTER:
+        f.seek(size - 8)
+        tail = f.read(8)
+    f.seek(0)
+    if len(head) >= 512 and _bdb_order(head):
+        return 'bdb'
+    if len(tail) == 8 and struct.unpack('<Q', tail)[0] == LEVELDB_MAGIC:
+        return 'leveldb'
+    if _LOG_NAME.match(name) and len(head) >= LOG_HEADER + 12:
+        length, rtype = struct.unpack_from('<HB', head, 4)
+        if rtype in (LOG_FULL, LOG_FIRST) and LOG_HEADER + length <= LOG_BLOCK:
+            return 'leveldb-log'
+    if head.startswith(ELECTRUM_ENCRYPTED) or _ELECTRUM_HEAD.match(head):
+        return 'electrum'
+    return None
+
+
+def extract(fmt, buf):
+    """All records of a buffer in the given format; ExtractError if it cannot be parsed."""
+    try:
+        return list(EXTRACTORS[fmt](buf))
+    except (struct.error, IndexError, ValueError) as e:
+        raise ExtractError('%s: %s' % (fmt, e))
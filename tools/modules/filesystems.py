@@ -0,0 +1,627 @@
+#!/usr/bin/env python3
+"""
+Read-only filesystem readers for raw image scanning (no kernel mount).
+- FAT32, exFAT and NTFS
+- Directories are walked lazily; every file comes with its extent runs
+  (image offset, length), so contents are read straight from the image
+- NTFS files are enumerated by a sequential MFT pass instead of walking
+  the directory B-trees
+- free_ranges() lists unallocated clusters (FAT, exFAT allocation bitmap,
+  NTFS $Bitmap) and slack_ranges() the tails of files' last clusters, for carving
+Notes:
+- Paths use '/' and are relative to the filesystem root.
+- Deleted entries are skipped; NTFS compressed/encrypted files are listed
+  without content (runs is None).
+- Uses only standard library.
+"""
+import io
+import re
+import struct
+from collections import namedtuple
+
+# runs: list of (image offset, length), offset None for sparse (zero) runs
+# data: file content for NTFS resident files; both None = content unreadable
+FsFile = namedtuple('FsFile', 'path name size runs data')
+
+READ_CHUNK = 1048576
+
+NTFS_ROOT = 5
+NTFS_BITMAP = 6
+NTFS_FIRST_USER = 16      # records below are metadata files ($MFT, $Bitmap, ...)
+ATTR_ATTRIBUTE_LIST = 0x20
+ATTR_FILE_NAME = 0x30
+ATTR_DATA = 0x80
+ATTR_END = 0xFFFFFFFF
+
+
+def _u16(b, o):
+    return struct.unpack_from('<H', b, o)[0]
+
+
+def _u32(b, o):
+    return struct.unpack_from('<I', b, o)[0]
+
+
+def _u64(b, o):
+    return struct.unpack_from('<Q', b, o)[0]
+
+
+def merge_runs(runs):
+    """Coalesce adjacent runs."""
+    merged = []
+    for off, length in runs:
+        if merged:
+            last_off, last_len = merged[-1]
+            if off is None and last_off is None:
+                merged[-1] = (None, last_len + length)
+                continue
+            if off is not None and last_off is not None and last_off + last_len == off:
+                merged[-1] = (last_off, last_len + length)
+                continue
+        merged.append((off, length))
+    return merged
+
+
+def truncate_runs(runs, size):
+    out = []
+    left = size
+    for off, length in runs:
+        if left <= 0:
+            break
+        out.append((off, min(length, left)))
+        left -= length
+    return out
+
+
+def _coalesce(extents):
+    """Merge sorted (first, count) extents that touch."""
+    out = []
+    for first, count in extents:
+        if out and out[-1][0] + out[-1][1] == first:
+            out[-1] = (out[-1][0], out[-1][1] + count)
+        else:
+            out.append((first, count))
+    return out
+
+
+_FREE_BYTES = re.compile(b'\x00+|[^\x00\xff]')
+
+# a FAT32 entry is free when its low 28 bits are 0; allocated entries are
+# skipped 4 bytes at a time, so group 1 is an entry-aligned run of free ones
+_FAT_FREE_ENTRY = rb'\x00\x00\x00[\x00\x10\x20\x30\x40\x50\x60\x70\x80\x90\xa0\xb0\xc0\xd0\xe0\xf0]'
+_FAT_FREE = re.compile(rb'(?:(?!%s)....)*((?:%s)+)' % (_FAT_FREE_ENTRY, _FAT_FREE_ENTRY), re.S)
+
+
+def bitmap_free(bitmap, count):
+    """(first, count) extents of clear bits among the first count bits (LSB first)."""
+    extents = []
+    for m in _FREE_BYTES.finditer(bitmap, 0, -(-count // 8)):
+        if bitmap[m.start()] == 0:
+            extents.append((8 * m.start(), 8 * (m.end() - m.start())))
+            continue
+        b = bitmap[m.start()]
+        extents.extend((8 * m.start() + i, 1) for i in range(8) if not b >> i & 1)
+    return [(first, min(n, count - first)) for first, n in _coalesce(extents) if first < count]
+
+
+def slack_ranges(fs):
+    """(image offset, length) of the unused tail of every file's last cluster."""
+    out = []
+    for f in fs.walk():
+        runs = [r for r in f.runs or () if r[0] is not None]
+        if not runs:
+            continue
+        off, length = runs[-1]
+        slack = -length % fs.cluster_size
+        if slack:
+            out.append((off + length, slack))
+    return merge_runs(sorted(out))
+
+
+def iter_file_chunks(img, f, chunk_size=READ_CHUNK):
+    """Yield the content of an FsFile in order, reading runs with readahead."""
+    if f.data is not None:
+        yield f.data[:f.size]
+        return
+    runs = truncate_runs(f.runs or (), f.size)
+    for i, (off, length) in enumerate(runs):
+        if i + 1 < len(runs) and runs[i + 1][0] is not None:
+            # let the kernel fetch the next extent while this one is scanned
+            img.readahead(runs[i + 1][0], min(runs[i + 1][1], chunk_size))
+        pos = 0
+        while pos < length:
+            n = min(chunk_size, length - pos)
+            if off is None:
+                yield bytes(n)
+            else:
+                if n == chunk_size and pos + n < length:
+                    img.readahead(off + pos + n, min(chunk_size, length - pos - n))
+                data = img.read_direct(off + pos, n)
+                if not data:
+                    return
+                yield data
+            pos += n
+
+
+class FileReader(io.RawIOBase):
+    """Seekable read-only file object over an FsFile's content (for archive members)."""
+
+    def __init__(self, img, f):
+        super().__init__()
+        self.img = img
+        self.f = f
+        self.size = f.size
+        self.runs = truncate_runs(f.runs or (), f.size)
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.pos = max(0, offset)
+        return self.pos
+
+    def readinto(self, b):
+        n = min(len(b), self.size - self.pos)
+        if n <= 0:
+            return 0
+        if self.f.data is not None:
+            data = self.f.data[self.pos:self.pos + n]
+        else:
+            # locate the run holding pos; runs are few, a linear walk is fine
+            start = 0
+            data = b''
+            for off, length in self.runs:
+                if self.pos < start + length:
+                    inner = self.pos - start
+                    take = min(n, length - inner)
+                    data = bytes(take) if off is None else self.img.read_direct(off + inner, take)
+                    break
+                start += length
+        b[:len(data)] = data
+        self.pos += len(data)
+        return len(data)
+
+
+class FatFilesystem:
+    """FAT32 reader (long file names, cluster chains from the first FAT)."""
+
+    kind = 'fat32'
+
+    def __init__(self, img, part):
+        bs = img.read(part.start, 512)
+        self.img = img
+        bps = _u16(bs, 0x0B)
+        spc = bs[0x0D]
+        reserved = _u16(bs, 0x0E)
+        nfats = bs[0x10]
+        fat_size = _u32(bs, 0x24)
+        total = _u16(bs, 0x13) or _u32(bs, 0x20)
+        if not bps or not spc or not fat_size:
+            raise ValueError('not a FAT32 boot sector')
+        self.cluster_size = bps * spc
+        self.fat_offset = part.start + reserved * bps
+        self.data_offset = part.start + (reserved + nfats * fat_size) * bps
+        self.cluster_count = (total - reserved - nfats * fat_size) // spc
+        self.root_cluster = _u32(bs, 0x2C)
+
+    def _cluster_offset(self, c):
+        return self.data_offset + (c - 2) * self.cluster_size
+
+    def chain(self, first):
+        """Clusters of a chain; stops at end-of-chain, bad or out-of-range entries."""
+        c = first
+        seen = 0
+        while 2 <= c < self.cluster_count + 2 and seen <= self.cluster_count:
+            yield c
+            seen += 1
+            c = _u32(self.img.read(self.fat_offset + 4 * c, 4), 0) & 0x0FFFFFFF
+            if c >= 0x0FFFFFF7:
+                return
+
+    def runs(self, first, size):
+        runs = merge_runs((self._cluster_offset(c), self.cluster_size) for c in self.chain(first))
+        return truncate_runs(runs, size)
+
+    def free_ranges(self):
+        """Image ranges of clusters whose FAT entry is 0 (unallocated)."""
+        extents = []
+        total = self.cluster_count + 2
+        step = READ_CHUNK // 4
+        for first in range(0, total, step):
+            data = self.img.read_direct(self.fat_offset + 4 * first, 4 * min(step, total - first))
+            for m in _FAT_FREE.finditer(data):
+                if m.start(1) % 4:
+                    # no aligned match left: the search went on byte by byte
+                    break
+                c = max(first + m.start(1) // 4, 2)
+                n = first + m.end(1) // 4 - c
+                if n <= 0:
+                    continue
+                if extents and extents[-1][0] + extents[-1][1] == c:
+                    extents[-1] = (extents[-1][0], extents[-1][1] + n)
+                else:
+                    extents.append((c, n))
+        return [(self._cluster_offset(c), n * self.cluster_size) for c, n in extents]
+
+    def _dir_entries(self, cluster):
+        for c in self.chain(cluster):
+            data = self.img.read(self._cluster_offset(c), self.cluster_size)
+            for off in range(0, len(data) - 31, 32):
+                e = data[off:off + 32]
+                if e[0] == 0:
+                    return
+                yield e
+
+    def walk(self):
+        stack = [(self.root_cluster, '')]
+        seen = set()
+        while stack:
+            cluster, prefix = stack.pop()
+            if cluster in seen:
+                continue
+            seen.add(cluster)
+            subdirs = []
+            lfn = []
+            for e in self._dir_entries(cluster):
+                attr = e[0x0B]
+                if e[0] == 0xE5:
+                    lfn = []
+                    continue
+                if attr == 0x0F:
+                    if e[0] & 0x40:
+                        lfn = []
+                    lfn.append((e[0x0D], e[1:11] + e[14:26] + e[28:32]))
+                    continue
+                if attr & 0x08:
+                    lfn = []
+                    continue
+                name = self._name(e, lfn)
+                lfn = []
+                if name in ('.', '..'):
+                    continue
+                first = (_u16(e, 0x14) << 16) | _u16(e, 0x1A)
+                if attr & 0x10:
+                    subdirs.append((first, prefix + name + '/'))
+                    continue
+                size = _u32(e, 0x1C)
+                yield FsFile(prefix + name, name, size, self.runs(first, size) if size else [], None)
+            for item in reversed(subdirs):
+                stack.append(item)
+
+    @staticmethod
+    def _name(e, lfn):
+        raw = bytearray(e[:11])
+        if raw[0] == 0x05:
+            raw[0] = 0xE5
+        base = raw[:8].decode('cp437').rstrip()
+        ext = raw[8:11].decode('cp437').rstrip()
+        # Windows NT case flags for 8.3 names
+        if e[0x0C] & 0x08:
+            base = base.lower()
+        if e[0x0C] & 0x10:
+            ext = ext.lower()
+        short = base + ('.' + ext if ext else '')
+        if not lfn:
+            return short
+        checksum = 0
+        for b in e[:11]:
+            checksum = (((checksum & 1) << 7) + (checksum >> 1) + b) & 0xFF
+        if any(ck != checksum for ck, _ in lfn):
+            # stale long name left behind by a tool that only knows 8.3 names
+            return short
+        name = b''.join(chars for _, chars in reversed(lfn)).decode('utf-16-le', errors='replace')
+        return name.split('\0', 1)[0]
+
+
+class ExfatFilesystem:
+    """exFAT reader (file/stream/name entry sets, contiguous and FAT-chained files)."""
+
+    kind = 'exfat'
+
+    def __init__(self, img, part):
+        bs = img.read(part.start, 512)
+        self.img = img
+        bps = 1 << bs[0x6C]
+        self.cluster_size = bps << bs[0x6D]
+        self.fat_offset = part.start + _u32(bs, 0x50) * bps
+        self.heap_offset = part.start + _u32(bs, 0x58) * bps
+        self.cluster_count = _u32(bs, 0x5C)
+        self.root_cluster = _u32(bs, 0x60)
+
+    def _cluster_offset(self, c):
+        return self.heap_offset + (c - 2) * self.cluster_size
+
+    def chain(self, first, length=None, contiguous=False):
+        if contiguous:
+            count = -(-length // self.cluster_size)
+            for c in range(first, min(first + count, self.cluster_count + 2)):
+                yield c
+            return
+        c = first
+        seen = 0
+        while 2 <= c < self.cluster_count + 2 and seen <= self.cluster_count:
+            yield c
+            seen += 1
+            c = _u32(self.img.read(self.fat_offset + 4 * c, 4), 0)
+            if c >= 0xFFFFFFF7:
+                return
+
+    def runs(self, first, size, contiguous):
+        if not first or not size:
+            return []
+        clusters = self.chain(first, size, contiguous)
+        return truncate_runs(merge_runs((self._cluster_offset(c), self.cluster_size) for c in clusters), size)
+
+    def free_ranges(self):
+        """Image ranges of clusters marked free in the allocation bitmap."""
+        for e in self._dir_entries(self.root_cluster):
+            if e[0] == 0x81:
+                first, length = _u32(e, 0x14), _u64(e, 0x18)
+                break
+        else:
+            return []
+        bitmap = b''.join(self.img.read(self._cluster_offset(c), self.cluster_size)
+                          for c in self.chain(first))[:length]
+        extents = bitmap_free(bitmap, min(self.cluster_count, 8 * len(bitmap)))
+        return [(self._cluster_offset(c + 2), n * self.cluster_size) for c, n in extents]
+
+    def _dir_entries(self, first, length=None, contiguous=False):
+        for c in self.chain(first, length, contiguous):
+            data = self.img.read(self._cluster_offset(c), self.cluster_size)
+            for off in range(0, len(data) - 31, 32):
+                e = data[off:off + 32]
+                if e[0] == 0x00:
+                    return
+                yield e
+
+    def walk(self):
+        stack = [((self.root_cluster, None, False), '')]
+        while stack:
+            (first, length, contiguous), prefix = stack.pop()
+            subdirs = []
+            entries = self._dir_entries(first, length, contiguous)
+            for e in entries:
+                if e[0] != 0x85:
+                    # bitmap, upcase table, label, deleted or orphaned secondaries
+                    continue
+                secondary = e[1]
+                attrs = _u16(e, 4)
+                group = [next(entries, None) for _ in range(secondary)]
+                if not group or group[0] is None or group[0][0] != 0xC0:
+                    continue
+                stream = group[0]
+                name_len = stream[3]
+                name = b''.join(n[2:32] for n in group[1:] if n is not None and n[0] == 0xC1)
+                name = name.decode('utf-16-le', errors='replace')[:name_len]
+                contiguous_data = bool(stream[1] & 0x02)
+                first_cluster = _u32(stream, 0x14)
+                size = _u64(stream, 0x18)
+                if attrs & 0x10:
+                    subdirs.append(((first_cluster, size, contiguous_data), prefix + name + '/'))
+                    continue
+                yield FsFile(prefix + name, name, size, self.runs(first_cluster, size, contiguous_data), None)
+            for item in reversed(subdirs):
+                stack.append(item)
+
+
+def decode_runlist(buf, pos, cluster_size, base):
+    """Decode an NTFS mapping pairs array into (image offset | None, length) runs."""
+    runs = []
+    lcn = 0
+    while pos < len(buf):
+        header = buf[pos]
+        if header == 0:
+            break
+        len_size = header & 0x0F
+        off_size = header >> 4
+        length = int.from_bytes(buf[pos + 1:pos + 1 + len_size], 'little')
+        if off_size:
+            lcn += int.from_bytes(buf[pos + 1 + len_size:pos + 1 + len_size + off_size], 'little', signed=True)
+            runs.append((base + lcn * cluster_size, length * cluster_size))
+        else:
+            runs.append((None, length * cluster_size))
+        pos += 1 + len_size + off_size
+    return runs
+
+
+class NtfsFilesystem:
+    """NTFS reader: sequential MFT pass, paths from $FILE_NAME parent references."""
+
+    kind = 'ntfs'
+
+    def __init__(self, img, part):
+        bs = img.read(part.start, 512)
+        self.img = img
+        self.base = part.start
+        self.sector_size = _u16(bs, 0x0B)
+        spc = bs[0x0D]
+        if spc > 0x80:
+            spc = 1 << (256 - spc)
+        self.cluster_size = self.sector_size * spc
+        per_record = struct.unpack_from('<b', bs, 0x40)[0]
+        self.record_size = per_record * self.cluster_size if per_record > 0 else 1 << -per_record
+        if not self.cluster_size or self.record_size < 256:
+            raise ValueError('not an NTFS boot sector')
+        mft = self.base + _u64(bs, 0x30) * self.cluster_size
+        record0 = self._fixup(img.read(mft, self.record_size))
+        if record0 is None:
+            raise ValueError('unreadable $MFT record')
+        data = self._attributes(record0).get('data')
+        if not data or data[0] != 'runs':
+            raise ValueError('$MFT without a data run list')
+        self.mft_runs = truncate_runs(data[2], data[1])
+        self.cluster_total = _u64(bs, 0x28) // spc
+
+    def _fixup(self, rec):
+        """Apply the update sequence array; None if the record is torn or not a FILE record."""
+        if len(rec) < self.record_size or rec[:4] != b'FILE':
+            return None
+        usa_off = _u16(rec, 4)
+        usa_count = _u16(rec, 6)
+        rec = bytearray(rec)
+        usn = rec[usa_off:usa_off + 2]
+        stride = self.sector_size or 512
+        for i in range(1, usa_count):
+            end = i * stride
+            if end > len(rec) or rec[end - 2:end] != usn:
+                return None
+            rec[end - 2:end] = rec[usa_off + 2 * i:usa_off + 2 * i + 2]
+        return bytes(rec)
+
+    def _attributes(self, rec):
+        """Parse the attributes of interest: best file name, unnamed $DATA, attribute list flag."""
+        out = {}
+        pos = _u16(rec, 0x14)
+        while pos + 16 <= len(rec):
+            atype, alen = struct.unpack_from('<II', rec, pos)
+            if atype == ATTR_END or alen < 16 or pos + alen > len(rec):
+                break
+            non_resident = rec[pos + 8]
+            name_len = rec[pos + 9]
+            flags = _u16(rec, pos + 0x0C)
+            if atype == ATTR_FILE_NAME and not non_resident:
+                value = rec[pos + _u16(rec, pos + 0x14):]
+                parent = _u64(value, 0) & 0xFFFFFFFFFFFF
+                namespace = value[0x41]
+                name = value[0x42:0x42 + 2 * value[0x40]].decode('utf-16-le', errors='replace')
+                # prefer the Win32/POSIX name over the DOS 8.3 alias
+                if 'name' not in out or out['namespace'] == 2:
+                    out.update(name=name, parent=parent, namespace=namespace)
+            elif atype == ATTR_ATTRIBUTE_LIST:
+                out['attribute_list'] = True
+            elif atype == ATTR_DATA and name_len == 0:
+                if flags & 0x4001:
+                    # compressed or encrypted: not readable as plain runs
+                    out['data'] = ('opaque', _u64(rec, pos + 0x30) if non_resident else 0, None, 0)
+                elif not non_resident:
+                    vlen = _u32(rec, pos + 0x10)
+                    voff = _u16(rec, pos + 0x14)
+                    out['data'] = ('resident', vlen, rec[pos + voff:pos + voff + vlen], 0)
+                else:
+                    start_vcn = _u64(rec, pos + 0x10)
+                    runs = decode_runlist(rec[:pos + alen], pos + _u16(rec, pos + 0x20), self.cluster_size, self.base)
+                    out['data'] = ('runs', _u64(rec, pos + 0x30), runs, start_vcn)
+            pos += alen
+        return out
+
+    def free_ranges(self):
+        """Image ranges of clusters marked free in $Bitmap (MFT record 6)."""
+        pos = NTFS_BITMAP * self.record_size
+        rec = None
+        for off, length in self.mft_runs:
+            if pos < length:
+                rec = None if off is None else self._fixup(self.img.read(off + pos, self.record_size))
+                break
+            pos -= length
+        data = self._attributes(rec).get('data') if rec is not None else None
+        if not data or data[0] not in ('runs', 'resident'):
+            return []
+        if data[0] == 'resident':
+            bitmap = data[2]
+        else:
+            bitmap = b''.join(iter_file_chunks(self.img, FsFile('$Bitmap', '$Bitmap', data[1],
+                                                                truncate_runs(data[2], data[1]), None)))
+        extents = bitmap_free(bitmap, min(self.cluster_total, 8 * len(bitmap)))
+        return [(self.base + lcn * self.cluster_size, n * self.cluster_size) for lcn, n in extents]
+
+    def records(self):
+        """Yield (record number, fixed-up record) for every in-use MFT record."""
+        recno = 0
+        for off, length in self.mft_runs:
+            pos = 0
+            while pos < length:
+                n = min(READ_CHUNK, length - pos)
+                n -= n % self.record_size
+                if n <= 0:
+                    break
+                chunk = bytes(n) if off is None else self.img.read_direct(off + pos, n)
+                for i in range(0, len(chunk) - self.record_size + 1, self.record_size):
+                    rec = self._fixup(chunk[i:i + self.record_size])
+                    if rec is not None and _u16(rec, 0x16) & 0x01:
+                        yield recno, rec
+                    recno += 1
+                pos += n
+
+    def walk(self):
+        # pass 1: directory names and $DATA fragments held in extension records
+        dirs = {}
+        fragments = {}
+        for recno, rec in self.records():
+            base_ref = _u64(rec, 0x20) & 0xFFFFFFFFFFFF
+            if base_ref:
+                data = self._attributes(rec).get('data')
+                if data and data[0] == 'runs':
+                    fragments.setdefault(base_ref, []).append(data)
+                continue
+            if _u16(rec, 0x16) & 0x02:
+                attrs = self._attributes(rec)
+                if 'name' in attrs:
+                    dirs[recno] = (attrs['parent'], attrs['name'])
+        paths = {NTFS_ROOT: ''}
+
+        def dir_path(recno, depth=0):
+            if recno in paths:
+                return paths[recno]
+            if recno not in dirs or depth > 256:
+                return None
+            parent, name = dirs[recno]
+            prefix = dir_path(parent, depth + 1)
+            path = None if prefix is None else prefix + name + '/'
+            paths[recno] = path
+            return path
+
+        # pass 2: files
+        for recno, rec in self.records():
+            if recno < NTFS_FIRST_USER or _u64(rec, 0x20) & 0xFFFFFFFFFFFF or _u16(rec, 0x16) & 0x02:
+                continue
+            attrs = self._attributes(rec)
+            if 'name' not in attrs:
+                continue
+            prefix = dir_path(attrs['parent'])
+            if prefix is None:
+                prefix = '$Orphan/'
+            if prefix.startswith('$Extend/'):
+                continue
+            name = attrs['name']
+            data = attrs.get('data')
+            parts = ([data] if data else []) + fragments.get(recno, [])
+            runs_parts = sorted((p for p in parts if p[0] == 'runs'), key=lambda p: p[3])
+            if data and data[0] == 'resident':
+                yield FsFile(prefix + name, name, data[1], None, data[2])
+            elif runs_parts and runs_parts[0][3] == 0:
+                size = runs_parts[0][1]
+                runs = merge_runs(r for p in runs_parts for r in p[2])
+                yield FsFile(prefix + name, name, size, truncate_runs(runs, size), None)
+            else:
+                size = data[1] if data else 0
+                yield FsFile(prefix + name, name, size, [] if not size else None, None)
+
+
+def open_filesystem(img, part):
+    """Reader for the filesystem in a partition, or None if unsupported."""
+    bs = img.read(part.start, 512)
+    if len(bs) < 512:
+        return None
+    if bs[3:11] == b'NTFS    ':
+        cls = NtfsFilesystem
+    elif bs[3:11] == b'EXFAT   ':
+        cls = ExfatFilesystem
+    elif bs[0x52:0x5A] == b'FAT32   ':
+        cls = FatFilesystem
+    else:
+        return None
+    try:
+        return cls(img, part)
+    except (ValueError, struct.error, IndexError):
+        return None
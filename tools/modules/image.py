@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Raw disk image access for the wallet scanner (no losetup/mount needed).
+- Opens .dd/.img/.raw images (or block devices) read-only
+- Positional reads (os.pread) through a thread-safe LRU block cache
+- Parses MBR (including extended/logical partitions) and GPT tables
+- EWF (.E01) containers are read through tools/modules/ewf.py
+- Cheap empty-space checks: sparse holes via SEEK_DATA, all-zero blocks by
+  memcmp against a preallocated zero buffer
+Notes:
+- Partitions are numbered like the kernel does (p1-p4 primary, p5+ logical
+  for MBR; table order for GPT), so paths match what analyze.sh mounted.
+- Images without a partition table are treated as a single partition p0.
+- Uses only standard library.
+"""
+import errno
+import os
+import struct
+import threading
+import uuid
+import zlib
+from collections import OrderedDict, namedtuple
+
+try:
+    from tools.modules.ewf import EwfImage, is_ewf
+except ImportError:
+    # Fallback for direct execution
+    from ewf import EwfImage, is_ewf
+
+SECTOR_SIZE = 512
+BLOCK_SIZE = 65536       # cache granularity
+CACHE_BLOCKS = 256       # 16 MiB per image
+
+ZERO_BLOCK = bytes(16 * BLOCK_SIZE)  # compared against, never written
+
+MBR_EXTENDED = (0x05, 0x0F, 0x85)
+MBR_PROTECTIVE = 0xEE
+GPT_SIGNATURE = b'EFI PART'
+MAX_LOGICAL = 128        # guard against looping EBR chains
+
+Partition = namedtuple('Partition', 'index start size scheme type name')
+
+
+def is_zero(data):
+    """True if a bytes-like buffer holds only zero bytes (memcmp, no copies)."""
+    view = memoryview(data)
+    step = len(ZERO_BLOCK)
+    for pos in range(0, len(view), step):
+        if not ZERO_BLOCK.startswith(view[pos:pos + step]):
+            return False
+    return True
+
+
+class RawImage:
+    """Read-only disk image with positional reads; safe to share between threads.
+
+    Raw images and block devices are read with os.pread, EWF containers
+    through EwfImage; callers see the same interface either way.
+    """
+
+    def __init__(self, path, block_size=BLOCK_SIZE, cache_blocks=CACHE_BLOCKS):
+        self.path = path
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.fd = None
+        self.ewf = None
+        if is_ewf(path):
+            self.ewf = EwfImage(path)
+            self.size = self.ewf.size
+            self._pread = self.ewf.pread
+        else:
+            self.fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+            # lseek also works for block devices, where st_size is 0
+            self.size = os.lseek(self.fd, 0, os.SEEK_END)
+            self._pread = self._pread_fd
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        if self.ewf is not None:
+            self.ewf.close()
+            self.ewf = None
+
+    def _pread_fd(self, length, offset):
+        return os.pread(self.fd, length, offset)
+
+    def _block(self, n):
+        with self._lock:
+            data = self._cache.get(n)
+            if data is not None:
+                self._cache.move_to_end(n)
+                self.cache_hits += 1
+                return data
+        data = self._pread(self.block_size, n * self.block_size)
+        with self._lock:
+            self.cache_misses += 1
+            self._cache[n] = data
+            if len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+        return data
+
+    def read(self, offset, length):
+        """Cached read for metadata (partition tables, filesystem structures)."""
+        if offset >= self.size or length <= 0:
+            return b''
+        length = min(length, self.size - offset)
+        first = offset // self.block_size
+        last = (offset + length - 1) // self.block_size
+        if first == last:
+            start = offset - first * self.block_size
+            return self._block(first)[start:start + length]
+        parts = [self._block(n) for n in range(first, last + 1)]
+        start = offset - first * self.block_size
+        return b''.join(parts)[start:start + length]
+
+    def readahead(self, offset, length):
+        """Start fetching a range that will be read next (kernel hint or EWF prefetch)."""
+        if self.ewf is not None:
+            self.ewf.readahead(offset, length)
+        elif hasattr(os, 'posix_fadvise') and length > 0:
+            try:
+                os.posix_fadvise(self.fd, offset, length, os.POSIX_FADV_WILLNEED)
+            except OSError:
+                pass
+
+    def next_data(self, offset):
+        """First offset >= offset that may hold data; sparse holes are skipped (SEEK_DATA).
+
+        Returns offset itself when holes cannot be detected (EWF, block
+        devices, filesystems without SEEK_DATA) and size past the last data.
+        """
+        if self.fd is None or not hasattr(os, 'SEEK_DATA') or offset >= self.size:
+            return offset
+        try:
+            return min(os.lseek(self.fd, offset, os.SEEK_DATA), self.size)
+        except OSError as e:
+            return self.size if e.errno == errno.ENXIO else offset
+
+    def read_direct(self, offset, length):
+        """Uncached read for bulk content; keeps big scans from evicting metadata."""
+        if offset >= self.size or length <= 0:
+            return b''
+        return self._pread(min(length, self.size - offset), offset)
+
+
+def parse_mbr(img, sector_size=SECTOR_SIZE):
+    """Return MBR partitions, or None if sector 0 has no valid table."""
+    mbr = img.read(0, sector_size)
+    if len(mbr) < 512 or mbr[510:512] != b'\x55\xaa':
+        return None
+    entries = [struct.unpack_from('<B3xB3xII', mbr, 446 + 16 * i) for i in range(4)]
+    # a boot sector of a partitionless FAT/NTFS volume also ends in 55AA
+    if any(status not in (0x00, 0x80) for status, _, _, _ in entries):
+        return None
+    parts = []
+    extended = None
+    for i, (_, ptype, lba, count) in enumerate(entries):
+        if ptype == 0 or count == 0:
+            continue
+        if ptype == MBR_PROTECTIVE:
+            return [Partition(i + 1, lba * sector_size, count * sector_size, 'mbr', '0x%02x' % ptype, '')]
+        if ptype in MBR_EXTENDED:
+            extended = lba
+            continue
+        parts.append(Partition(i + 1, lba * sector_size, count * sector_size, 'mbr', '0x%02x' % ptype, ''))
+    if extended is not None:
+        parts.extend(_parse_ebr_chain(img, extended, sector_size))
+    return parts
+
+
+def _parse_ebr_chain(img, ext_lba, sector_size):
+    parts = []
+    ebr_lba = ext_lba
+    for n in range(MAX_LOGICAL):
+        ebr = img.read(ebr_lba * sector_size, sector_size)
+        if len(ebr) < 512 or ebr[510:512] != b'\x55\xaa':
+            break
+        _, ptype, lba, count = struct.unpack_from('<B3xB3xII', ebr, 446)
+        if ptype and count:
+            # logical partition start is relative to this EBR
+            parts.append(Partition(5 + n, (ebr_lba + lba) * sector_size, count * sector_size,
+                                   'mbr', '0x%02x' % ptype, ''))
+        _, ntype, nlba, _ = struct.unpack_from('<B3xB3xII', ebr, 462)
+        if ntype not in MBR_EXTENDED or nlba == 0:
+            break
+        # next EBR is relative to the start of the extended partition
+        ebr_lba = ext_lba + nlba
+    return parts
+
+
+def _gpt_header(img, lba, sector_size):
+    hdr = img.read(lba * sector_size, sector_size)
+    if hdr[:8] != GPT_SIGNATURE:
+        return None
+    hsize = struct.unpack_from('<I', hdr, 12)[0]
+    if hsize < 92 or hsize > sector_size:
+        return None
+    crc = struct.unpack_from('<I', hdr, 16)[0]
+    if zlib.crc32(hdr[:16] + b'\0\0\0\0' + hdr[20:hsize]) & 0xffffffff != crc:
+        return None
+    entries_lba, count, esize, ecrc = struct.unpack_from('<QIII', hdr, 72)
+    table = img.read(entries_lba * sector_size, count * esize)
+    if zlib.crc32(table) & 0xffffffff != ecrc:
+        return None
+    return table, count, esize
+
+
+def parse_gpt(img, sector_size=SECTOR_SIZE):
+    """Return GPT partitions, or None if neither primary nor backup header is valid."""
+    found = _gpt_header(img, 1, sector_size)
+    if found is None and img.size >= sector_size:
+        # primary header damaged: fall back to the backup in the last sector
+        found = _gpt_header(img, img.size // sector_size - 1, sector_size)
+    if found is None:
+        return None
+    table, count, esize = found
+    parts = []
+    for i in range(count):
+        entry = table[i * esize:(i + 1) * esize]
+        type_guid = entry[:16]
+        if type_guid == b'\0' * 16:
+            continue
+        first, last = struct.unpack_from('<QQ', entry, 32)
+        name = entry[56:128].decode('utf-16-le', errors='ignore').rstrip('\0')
+        parts.append(Partition(i + 1, first * sector_size, (last - first + 1) * sector_size,
+                               'gpt', str(uuid.UUID(bytes_le=type_guid)), name))
+    return parts
+
+
+def partitions(img):
+    """Partitions of an image: GPT, then MBR, else the whole image as p0."""
+    mbr = parse_mbr(img)
+    protective = '0x%02x' % MBR_PROTECTIVE
+    if not mbr or mbr[0].type == protective:
+        for sector_size in (SECTOR_SIZE, 4096):
+            gpt = parse_gpt(img, sector_size)
+            if gpt is not None:
+                return _clamp(img, gpt)
+    if mbr and mbr[0].type != protective:
+        return _clamp(img, mbr)
+    return [Partition(0, 0, img.size, 'none', '', '')]
+
+
+def _clamp(img, parts):
+    # truncated images: keep what is actually there
+    return [p._replace(size=min(p.size, img.size - p.start)) for p in parts if p.start < img.size]
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Known-file hash set: files whose SHA-256 is on a known-good list are skipped.
+- Imports SHA-256 lists: NSRL RDS v3 (SQLite), CSV with a sha256 column,
+  sha256sum output or any text with one 64-hex digest per line
+- In-house sets can be built from reference directories (--from-dir);
+  these also record each file's size and a partial hash of its head
+- On disk a set is three files next to each other:
+    <base>.bloom   Bloom filter over the digests (about 0.1% false positives)
+    <base>.hashes  exact, sorted digests (binary search on confirmation)
+    <base>.sizes   sorted (size, partial hash) records for the pre-check
+- All three are memory-mapped, so a set is shared between worker processes
+  through the page cache and costs no start-up time
+Usage:
+  python3 tools/modules/knownfiles.py --out case/known NSRLFile.db hashes.txt
+  python3 tools/modules/knownfiles.py --out case/known --from-dir /mnt/reference
+  python3 tools/modules/knownfiles.py --check case/known some/file
+Notes:
+- Building sorts externally in runs of RUN_RECORDS, so memory stays bounded
+  for lists of any size.
+- Lists without file sizes or partial hashes (NSRL records sizes only)
+  are not pre-checked; their files are still searched, hashed in the same
+  pass and only dropped from the results once their hash is known.
+- Uses only standard library.
+"""
+import argparse
+import bisect
+import csv
+import hashlib
+import heapq
+import itertools
+import math
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import sys
+import tempfile
+
+HASH_MAGIC = b'KNOWNH01'
+BLOOM_MAGIC = b'KNOWNB01'
+SIZES_MAGIC = b'KNOWNS01'
+HASH_HEADER = struct.Struct('<8sQ16s')   # magic, count, set id
+BLOOM_HEADER = struct.Struct('<8sIxxxxQ')  # magic, hash functions, bits
+SIZES_HEADER = struct.Struct('<8sQ')     # magic, count
+SIZE_RECORD = struct.Struct('>QQ')       # big-endian: byte order sorts numerically
+
+PARTIAL_SIZE = 65536       # head bytes behind the partial hash
+FALSE_POSITIVES = 0.001
+RUN_RECORDS = 1000000      # records sorted in memory per run while building
+READ_CHUNK = 1048576
+
+_HEX64 = re.compile(r'(?<![0-9a-fA-F])[0-9a-fA-F]{64}(?![0-9a-fA-F])')
+
+
+class KnownSetError(Exception):
+    pass
+
+
+def partial_hash(head):
+    """Partial hash of the first PARTIAL_SIZE bytes of a file (never 0, which means 'not recorded')."""
+    return int.from_bytes(hashlib.sha256(head[:PARTIAL_SIZE]).digest()[:8], 'big') or 1
+
+
+def _bloom_bits(digest, k, m):
+    # the digest is uniform already: double hashing over two 64-bit halves
+    h1, h2 = struct.unpack_from('<QQ', digest)
+    h2 |= 1
+    return [(h1 + i * h2) % m for i in range(k)]
+
+
+class _Records:
+    """Fixed-width records of a memory-mapped file, as a sequence for bisect."""
+
+    def __init__(self, mm, offset, width, count):
+        self.mm = mm
+        self.offset = offset
+        self.width = width
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        start = self.offset + i * self.width
+        return self.mm[start:start + self.width]
+
+    def __contains__(self, record):
+        i = bisect.bisect_left(self, record)
+        return i < self.count and self[i] == record
+
+
+def _map(path, magic):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise KnownSetError('%s: empty file' % path)
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:len(magic)] != magic:
+        mm.close()
+        raise KnownSetError('%s: not a known-file set' % path)
+    return mm
+
+
+def set_id(base):
+    """Identifier of a built set (changes whenever its content does)."""
+    try:
+        with open(base + '.hashes', 'rb') as f:
+            magic, _, ident = HASH_HEADER.unpack(f.read(HASH_HEADER.size))
+    except (OSError, struct.error):
+        raise KnownSetError('%s.hashes: cannot read known-file set' % base)
+    if magic != HASH_MAGIC:
+        raise KnownSetError('%s.hashes: not a known-file set' % base)
+    return ident.hex()
+
+
+class KnownSet:
+    """Read-only view of a built set; cheap to open, safe to use from several processes."""
+
+    def __init__(self, base):
+        self.base = base
+        self._maps = []
+        try:
+            hashes = self._open(base + '.hashes', HASH_MAGIC)
+            _, count, ident = HASH_HEADER.unpack_from(hashes)
+            self.id = ident.hex()
+            self.hashes = _Records(hashes, HASH_HEADER.size, 32, count)
+            bloom = self._open(base + '.bloom', BLOOM_MAGIC)
+            _, self.k, self.m = BLOOM_HEADER.unpack_from(bloom)
+            self.bloom = bloom
+            sizes = self._open(base + '.sizes', SIZES_MAGIC)
+            self.sizes = _Records(sizes, SIZES_HEADER.size, SIZE_RECORD.size, SIZES_HEADER.unpack_from(sizes)[1])
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self, path, magic):
+        mm = _map(path, magic)
+        self._maps.append(mm)
+        return mm
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for mm in self._maps:
+            mm.close()
+        self._maps = []
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, sha256):
+        """Exact membership of a hex or raw SHA-256 digest (Bloom filter first)."""
+        digest = bytes.fromhex(sha256) if isinstance(sha256, str) else sha256
+        if self.m == 0:
+            return False
+        for bit in _bloom_bits(digest, self.k, self.m):
+            if not self.bloom[BLOOM_HEADER.size + bit // 8] & (1 << bit % 8):
+                return False
+        return digest in self.hashes
+
+    @property
+    def sized(self):
+        """True if any entry carries a file size, i.e. pre-checks can skip files."""
+        return len(self.sizes) > 0
+
+    def has_size(self, size):
+        i = bisect.bisect_left(self.sizes, SIZE_RECORD.pack(size, 0))
+        return i < len(self.sizes) and SIZE_RECORD.unpack(self.sizes[i])[0] == size
+
+    def has_partial(self, size):
+        """True if an entry records a partial hash for files of this size."""
+        i = bisect.bisect_left(self.sizes, SIZE_RECORD.pack(size, 1))
+        return i < len(self.sizes) and SIZE_RECORD.unpack(self.sizes[i])[0] == size
+
+    def candidate(self, size, partial):
+        """Is this size and partial hash recorded? (size-only entries say too little to hash up front)"""
+        return SIZE_RECORD.pack(size, partial) in self.sizes
+
+
+# -- building
+
+class _Runs:
+    """Fixed-width records collected into sorted temporary runs."""
+
+    def __init__(self, width, tmpdir):
+        self.width = width
+        self.tmpdir = tmpdir
+        self.files = []
+        self._batch = []
+
+    def add(self, record):
+        self._batch.append(record)
+        if len(self._batch) >= RUN_RECORDS:
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        self._batch.sort()
+        f = tempfile.TemporaryFile(dir=self.tmpdir)
+        f.write(b''.join(self._batch))
+        f.seek(0)
+        self.files.append(f)
+        self._batch = []
+
+
+def _read_run(f, width):
+    while True:
+        record = f.read(width)
+        if len(record) < width:
+            return
+        yield record
+
+
+def _merged(runs):
+    """Sorted, de-duplicated records from sorted runs."""
+    runs.flush()
+    last = None
+    for record in heapq.merge(*(_read_run(f, runs.width) for f in runs.files)):
+        if record != last:
+            yield record
+            last = record
+    for f in runs.files:
+        f.close()
+
+
+def _write_hashes(base, runs):
+    count = 0
+    ident = hashlib.sha256()
+    tmp = base + '.hashes.tmp'
+    with open(tmp, 'wb') as out:
+        out.write(HASH_HEADER.pack(HASH_MAGIC, 0, b'\0' * 16))
+        for digest in _merged(runs):
+            out.write(digest)
+            ident.update(digest)
+            count += 1
+        out.seek(0)
+        out.write(HASH_HEADER.pack(HASH_MAGIC, count, ident.digest()[:16]))
+    # a second pass over the unique digests fills the Bloom filter
+    m = max(8, int(math.ceil(-count * math.log(FALSE_POSITIVES) / math.log(2) ** 2))) if count else 0
+    m = (m + 7) // 8 * 8
+    k = max(1, int(round(m / count * math.log(2)))) if count else 0
+    bits = bytearray(m // 8)
+    with open(tmp, 'rb') as f:
+        f.seek(HASH_HEADER.size)
+        for digest in _read_run(f, 32):
+            for bit in _bloom_bits(digest, k, m):
+                bits[bit // 8] |= 1 << bit % 8
+    with open(base + '.bloom.tmp', 'wb') as out:
+        out.write(BLOOM_HEADER.pack(BLOOM_MAGIC, k, m))
+        out.write(bits)
+    return count, tmp
+
+
+def _write_sizes(base, runs):
+    count = 0
+    tmp = base + '.sizes.tmp'
+    with open(tmp, 'wb') as out:
+        out.write(SIZES_HEADER.pack(SIZES_MAGIC, 0))
+        for record in _merged(runs):
+            out.write(record)
+            count += 1
+        out.seek(0)
+        out.write(SIZES_HEADER.pack(SIZES_MAGIC, count))
+    return count, tmp
+
+
+def build(base, entries, tmpdir=None):
+    """Build a set from (sha256 hex, size or None, partial hash or 0) entries.
+
+    The files are replaced atomically; returns (digests, size records).
+    """
+    tmpdir = tmpdir or os.path.dirname(os.path.abspath(base))
+    os.makedirs(tmpdir, exist_ok=True)
+    hash_runs = _Runs(32, tmpdir)
+    size_runs = _Runs(SIZE_RECORD.size, tmpdir)
+    for sha256, size, partial in entries:
+        hash_runs.add(bytes.fromhex(sha256))
+        if size is not None:
+            size_runs.add(SIZE_RECORD.pack(size, partial))
+    count, hashes_tmp = _write_hashes(base, hash_runs)
+    sized, sizes_tmp = _write_sizes(base, size_runs)
+    os.replace(base + '.bloom.tmp', base + '.bloom')
+    os.replace(sizes_tmp, base + '.sizes')
+    # .hashes last: it carries the set id that scans key their config on
+    os.replace(hashes_tmp, base + '.hashes')
+    return count, sized
+
+
+def _nsrl_entries(path):
+    # NSRL RDS v3: FILE(sha256, sha1, md5, crc32, file_name, file_size, package_id)
+    db = sqlite3.connect('file:%s?mode=ro' % path, uri=True)
+    try:
+        for sha256, size in db.execute('SELECT sha256, file_size FROM FILE'):
+            if sha256 and _HEX64.fullmatch(sha256):
+                yield sha256.lower(), size, 0
+    finally:
+        db.close()
+
+
+def _csv_entries(f, header):
+    cols = [c.strip().strip('"').lower().replace('-', '').replace('_', '') for c in header]
+    hcol = next(i for i, c in enumerate(cols) if c == 'sha256')
+    scol = next((i for i, c in enumerate(cols) if c in ('size', 'filesize')), None)
+    for row in csv.reader(f):
+        if len(row) <= hcol or not _HEX64.fullmatch(row[hcol].strip()):
+            continue
+        size = None
+        if scol is not None and scol < len(row) and row[scol].strip().isdigit():
+            size = int(row[scol])
+        yield row[hcol].strip().lower(), size, 0
+
+
+def iter_list(path):
+    """(sha256, size or None, 0) entries of one hash list file."""
+    with open(path, 'rb') as f:
+        is_sqlite = f.read(16) == b'SQLite format 3\0'
+    if is_sqlite:
+        yield from _nsrl_entries(path)
+        return
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        first = f.readline()
+        header = next(csv.reader([first]), [])
+        if any(c.strip().strip('"').lower().replace('-', '').replace('_', '') == 'sha256' for c in header):
+            yield from _csv_entries(f, header)
+            return
+        for line in itertools.chain([first], f):
+            m = _HEX64.search(line)
+            if m:
+                yield m.group(0).lower(), None, 0
+
+
+def file_entry(path):
+    """(sha256, size, partial hash) of a reference file."""
+    h = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        head = f.read(PARTIAL_SIZE)
+        h.update(head)
+        size += len(head)
+        for chunk in iter(lambda: f.read(READ_CHUNK), b''):
+            h.update(chunk)
+            size += len(chunk)
+    return h.hexdigest(), size, partial_hash(head)
+
+
+def iter_dir(root):
+    """Entries for every regular file below a reference directory."""
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            if os.path.isfile(path) and not os.path.islink(path):
+                try:
+                    yield file_entry(path)
+                except OSError as e:
+                    print(f"Warning: {path}: {e}", file=sys.stderr)
+
+
+def main():
+    p = argparse.ArgumentParser(description='Build or query a known-file (known-good) hash set')
+    p.add_argument('--out', metavar='BASE', help='Set to build: writes BASE.bloom, BASE.hashes and BASE.sizes')
+    p.add_argument('--from-dir', action='append', default=[], metavar='DIR',
+                   help='Hash the files below a reference directory (records sizes and partial hashes)')
+    p.add_argument('--check', metavar='BASE', help='Look the given files up in an existing set')
+    p.add_argument('paths', nargs='*', help='Hash lists to import (NSRL RDS v3, CSV, sha256sum), or files with --check')
+    args = p.parse_args()
+    if args.check:
+        with KnownSet(args.check) as known:
+            for path in args.paths:
+                sha256 = file_entry(path)[0]
+                state = 'known' if sha256 in known else 'unknown'
+                print(f"{state}\t{sha256}\t{path}")
+        return 0
+    if not args.out:
+        p.error('--out or --check is required')
+
+    def entries():
+        for path in args.paths:
+            yield from iter_list(path)
+        for root in args.from_dir:
+            yield from iter_dir(root)
+
+    count, sized = build(args.out, entries())
+    print(f"Known-file set {args.out}: {count} digests, {sized} size records (id {set_id(args.out)})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
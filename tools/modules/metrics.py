@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Scan metrics for the wallet scanner: phase timers and counters.
+- Phases (walk, stat, read, hash, rules, mask, extract, write, finalize)
+  accumulate wall-clock seconds and call counts
+- Counters (files, dirs, bytes_read, windows, ...) are plain integers
+- Detector statistics per plan stage: evaluations, evaluations skipped by
+  the literal gate, hits and seconds
+- One Metrics object per process (METRICS); worker processes hand theirs
+  back with every result (drain/merge), so the scanning process sees the
+  totals of the whole run
+- write_metrics() stores a run as scan_metrics_<ts>.json next to the results
+- profile_run() wraps a call in cProfile and tracemalloc and dumps
+  scan_profile_<ts>.pstats/.txt and scan_memory_<ts>.txt (--profile)
+Notes:
+- Timers use time.perf_counter; with worker processes phase seconds are
+  summed over the workers and can exceed the wall time of the scan.
+- Pages of mmap'ed files are read in on first touch, which is the hashing
+  pass: for large files read time shows up under 'hash'.
+- Uses only standard library.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+
+clock = time.perf_counter
+
+PROFILE_LINES = 40     # functions listed in the profile text report
+MEMORY_LINES = 25      # allocation sites listed in the memory report
+TRACEMALLOC_FRAMES = 8
+
+
+class Metrics:
+    """Phase timers, counters and detector statistics of one process."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.phases = {}     # name -> [seconds, calls]
+        self.counters = {}   # name -> int
+        self.detectors = {}  # stage label -> [evaluations, gated, hits, seconds]
+
+    def phase(self, name, seconds, calls=1):
+        entry = self.phases.get(name)
+        if entry is None:
+            self.phases[name] = [seconds, calls]
+        else:
+            entry[0] += seconds
+            entry[1] += calls
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def detector(self, label, seconds, hits=0, gated=False):
+        entry = self.detectors.get(label)
+        if entry is None:
+            entry = self.detectors[label] = [0, 0, 0, 0.0]
+        if gated:
+            entry[1] += 1
+        else:
+            entry[0] += 1
+        entry[2] += hits
+        entry[3] += seconds
+
+    def timed(self, name):
+        """Context manager timing one phase (for coarse phases; hot paths call phase())."""
+        return _Timer(self, name)
+
+    def snapshot(self):
+        return {'phases': self.phases, 'counters': self.counters, 'detectors': self.detectors}
+
+    def drain(self):
+        """Snapshot and reset (worker side)."""
+        snap = self.snapshot()
+        self.reset()
+        return snap
+
+    def merge(self, snap):
+        """Add a drained snapshot of another process."""
+        for name, (seconds, calls) in snap['phases'].items():
+            self.phase(name, seconds, calls)
+        for name, n in snap['counters'].items():
+            self.count(name, n)
+        for label, (evaluations, gated, hits, seconds) in snap['detectors'].items():
+            entry = self.detectors.setdefault(label, [0, 0, 0, 0.0])
+            entry[0] += evaluations
+            entry[1] += gated
+            entry[2] += hits
+            entry[3] += seconds
+
+    def report(self, **info):
+        """JSON-ready report; info (run parameters, totals) goes first."""
+        report = dict(info)
+        report['phases'] = {name: {'seconds': round(seconds, 6), 'calls': calls}
+                            for name, (seconds, calls) in sorted(self.phases.items())}
+        report['counters'] = dict(sorted(self.counters.items()))
+        report['detectors'] = {label: {'evaluations': e, 'gated': g, 'hits': h, 'seconds': round(s, 6)}
+                               for label, (e, g, h, s) in self.detectors.items()}
+        return report
+
+
+class _Timer:
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.phase(self.name, clock() - self.started)
+
+
+# metrics of this process; scan() resets it, workers drain it with every result
+METRICS = Metrics()
+
+
+def write_metrics(path, metrics, **info):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(metrics.report(**info), f, indent=2)
+
+
+def profile_run(fn, outdir):
+    """Call fn() under cProfile and tracemalloc and dump the statistics into outdir.
+
+    Writes scan_profile_<ts>.pstats (load with pstats or snakeviz),
+    scan_profile_<ts>.txt (top functions by cumulative time) and
+    scan_memory_<ts>.txt (peak traced memory and top allocation sites).
+    Only this process is profiled, not worker processes.
+    """
+    timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    base = os.path.join(outdir, 'scan_profile_%s' % timestamp)
+    memory_path = os.path.join(outdir, 'scan_memory_%s.txt' % timestamp)
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return fn()
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        profiler.dump_stats(base + '.pstats')
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
+        with open(memory_path, 'w', encoding='utf-8') as f:
+            f.write('traced memory: current %d bytes, peak %d bytes\n\n' % (current, peak))
+            for stat in snapshot.statistics('lineno')[:MEMORY_LINES]:
+                f.write('%s\n' % stat)
+        print(f"Profile: {base}.pstats, {base}.txt, {memory_path}")
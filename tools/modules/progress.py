@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Progress reporting for the wallet scanner.
+- Emits progress events following C_api_spec/docs/api_spec.md
+  (event, case, progress, files_scanned, hits_found, timestamp) plus
+  bytes_scanned, throughput and an ETA
+- Events are rate-limited and appended to <case>/logs/process.log; the
+  latest one replaces <case>/logs/status.json (same files as log_event.sh)
+- Percent and ETA need totals from an optional pre-count walk
+- bytes_skipped counts bytes not searched: empty (all-zero or sparse)
+  ones and the content of files on the known-good hash set (files_known)
+- Files whose detection ran over its CPU budget are collected in
+  slow_files (path, size, CPU seconds, mode) and listed in the final event
+- Without a case directory the reporter only counts (scan statistics)
+Notes:
+- status.json is replaced atomically so readers never see a partial file.
+- Uses only standard library.
+"""
+import json
+import os
+import time
+from datetime import datetime
+
+PROGRESS_INTERVAL = 2.0  # seconds between events
+
+
+def rfc3339_now():
+    return datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def precount(files):
+    """Total (files, bytes) of an iterable of walk_files() entries."""
+    count = 0
+    total = 0
+    for _, _, _, st in files:
+        count += 1
+        total += st.st_size
+    return count, total
+
+
+class ProgressReporter:
+    """Collects per-file progress and writes rate-limited events to the case logs."""
+
+    def __init__(self, case_dir, case=None, total_files=None, total_bytes=None,
+                 interval=PROGRESS_INTERVAL):
+        self.log_dir = None
+        if case_dir:
+            self.log_dir = os.path.join(case_dir, 'logs')
+            os.makedirs(self.log_dir, exist_ok=True)
+        self.case = case or case_dir
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.files_scanned = 0
+        self.bytes_scanned = 0
+        self.bytes_skipped = 0
+        self.files_known = 0
+        self.hits_found = 0
+        self.slow_files = []
+        self.done = False
+        self._started = time.monotonic()
+        self._last_emit = self._started
+
+    def file_done(self, size, hit=False, skipped=0, known=False):
+        self.files_known += int(known)
+        self.advance(files=1, nbytes=size, hits=int(hit), skipped=skipped)
+
+    def slow_file(self, path, size, seconds, mode):
+        self.slow_files.append({'path': path, 'filesize': size, 'seconds': seconds, 'mode': mode})
+
+    def advance(self, files=0, nbytes=0, hits=0, skipped=0):
+        self.files_scanned += files
+        self.bytes_scanned += nbytes
+        self.bytes_skipped += skipped
+        self.hits_found += hits
+        now = time.monotonic()
+        if now - self._last_emit >= self.interval:
+            self.emit(now)
+
+    def percent(self):
+        if self.done:
+            return 100
+        if self.total_bytes:
+            done, total = self.bytes_scanned, self.total_bytes
+        elif self.total_files:
+            done, total = self.files_scanned, self.total_files
+        else:
+            return None
+        return min(100, int(100 * done / total))
+
+    def event(self, now=None):
+        now = time.monotonic() if now is None else now
+        elapsed = max(now - self._started, 1e-6)
+        throughput = self.bytes_scanned / elapsed
+        eta = None
+        if self.done:
+            eta = 0
+        elif self.total_bytes and throughput > 0:
+            eta = max(0, int((self.total_bytes - self.bytes_scanned) / throughput))
+        return {
+            'event': 'progress',
+            'case': self.case,
+            'progress': self.percent(),
+            'files_scanned': self.files_scanned,
+            'bytes_scanned': self.bytes_scanned,
+            'bytes_skipped': self.bytes_skipped,
+            'files_known': self.files_known,
+            'files_slow': len(self.slow_files),
+            'hits_found': self.hits_found,
+            'throughput_bps': int(throughput),
+            'eta_seconds': eta,
+            'timestamp': rfc3339_now(),
+        }
+
+    def emit(self, now=None, message=None, final=False):
+        event = self.event(now)
+        if final:
+            event['slow_files'] = self.slow_files
+        self._last_emit = time.monotonic() if now is None else now
+        if self.log_dir is None:
+            return event
+        if message is None:
+            message = 'Scanning: %d files, %.1f MB, %d hits' % (
+                self.files_scanned, self.bytes_scanned / 1e6, self.hits_found)
+        # same line layout as log_event.sh, extended with the event fields
+        entry = {'timestamp': event['timestamp'], 'level': 'info', 'message': message}
+        entry.update(event)
+        with open(os.path.join(self.log_dir, 'process.log'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        status = {'last_event': message, 'level': 'info'}
+        status.update(event)
+        tmp = os.path.join(self.log_dir, 'status.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(status, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(self.log_dir, 'status.json'))
+        return event
+
+    def finish(self):
+        """Write the final event (100%) regardless of the rate limit."""
+        self.done = True
+        return self.emit(message='Scan complete: %d files, %d hits' % (self.files_scanned, self.hits_found),
+                         final=True)
+
+
+def read_status(case_dir):
+    """Latest status.json of a case, or {} if missing or unreadable."""
+    try:
+        with open(os.path.join(case_dir, 'logs', 'status.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
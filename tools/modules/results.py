@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Streaming result writer for the wallet scanner.
+- Hits are appended to scan_results_<ts>.jsonl as they are found
+- Each line follows the hit schema in C_api_spec/docs/api_spec.md
+  (case, path, filesize, pattern, snippet, sha256, timestamp, scanner_version)
+  plus the scanner's own fields
+- Buffered lines are flushed after a bounded count or interval and fsynced
+  periodically, so readers can follow a running scan and a crash loses at
+  most the last few seconds
+- The final JSON and CSV reports are rebuilt from the stream at the end
+Notes:
+- Uses only standard library.
+"""
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+FLUSH_LINES = 256       # buffered records before a write
+FLUSH_INTERVAL = 1.0    # seconds before buffered records are written anyway
+FSYNC_INTERVAL = 5.0    # seconds between fsyncs
+
+# api_spec envelope fields; stripped again when the JSON/CSV reports are built
+ENVELOPE = ('case', 'pattern', 'timestamp', 'scanner_version')
+
+CSV_COLUMNS = ['path', 'filename', 'filesize', 'filename_pattern', 'content_pattern',
+               'content_offset', 'sensitive', 'snippet']
+
+
+def rfc3339_now():
+    return datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def hit_record(result, case, scanner_version):
+    """Wrap a scan result in the api_spec hit envelope."""
+    if result['content_pattern']:
+        pattern = 'content:' + result['content_pattern']
+    else:
+        pattern = 'filename:' + result['filename_pattern']
+    record = {'case': case, 'pattern': pattern}
+    record.update(result)
+    record['timestamp'] = rfc3339_now()
+    record['scanner_version'] = scanner_version
+    return record
+
+
+class JsonlWriter:
+    """Append-only JSONL writer with bounded buffering; use as a context manager.
+
+    A new writer truncates path (a rerun within the same second reuses the
+    file name); append=True continues an existing stream.
+    """
+
+    def __init__(self, path, flush_lines=FLUSH_LINES, flush_interval=FLUSH_INTERVAL,
+                 fsync_interval=FSYNC_INTERVAL, append=False):
+        self.path = path
+        self.flush_lines = flush_lines
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._buffer = []
+        self._unsynced = False
+        self._f = open(path, 'a' if append else 'w', encoding='utf-8')
+        now = time.monotonic()
+        self._last_flush = now
+        self._last_fsync = now
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, record):
+        self._buffer.append(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
+        if len(self._buffer) >= self.flush_lines:
+            self.flush()
+        else:
+            self.tick()
+
+    def tick(self):
+        """Flush/fsync if the intervals have passed; cheap to call per file."""
+        now = time.monotonic()
+        if self._buffer and now - self._last_flush >= self.flush_interval:
+            self.flush()
+        elif self._unsynced and now - self._last_fsync >= self.fsync_interval:
+            self.flush()
+
+    def flush(self, sync=False):
+        if self._buffer:
+            self._f.write(''.join(self._buffer))
+            self._buffer = []
+            self._unsynced = True
+        self._f.flush()
+        now = time.monotonic()
+        self._last_flush = now
+        if self._unsynced and (sync or now - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._f.fileno())
+            self._unsynced = False
+            self._last_fsync = now
+
+    def close(self):
+        if self._f is not None:
+            self.flush(sync=True)
+            self._f.close()
+            self._f = None
+
+
+def iter_jsonl(path):
+    """Yield records from a JSONL file; a truncated last line is skipped."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def strip_envelope(record):
+    return {k: v for k, v in record.items() if k not in ENVELOPE}
+
+
+def write_json(records, path):
+    """Stream records into a JSON array (same layout as json.dump(indent=2))."""
+    with open(path, 'w') as jf:
+        first = True
+        for record in records:
+            body = json.dumps(record, indent=2).replace('\n', '\n  ')
+            jf.write(('[\n  ' if first else ',\n  ') + body)
+            first = False
+        jf.write('[]' if first else '\n]')
+
+
+def write_csv(records, path, extra_digests=()):
+    extra = list(extra_digests)
+    with open(path, 'w', newline='') as cf:
+        writer = csv.writer(cf)
+        # sha256 stays the last column; extra digests go right before it
+        writer.writerow(CSV_COLUMNS + extra + ['sha256'])
+        for r in records:
+            offset = '' if r['content_offset'] is None else r['content_offset']
+            writer.writerow([r['path'], r['filename'], r['filesize'], r['filename_pattern'],
+                             r['content_pattern'], offset, str(r['sensitive']), r['snippet']]
+                            + [r.get(k, '') for k in extra] + [r['sha256']])
+
+
+def finalize(jsonl_path, json_path, csv_path, extra_digests=()):
+    """Build the JSON and CSV reports from a finished JSONL stream."""
+    write_json((strip_envelope(r) for r in iter_jsonl(jsonl_path)), json_path)
+    write_csv((strip_envelope(r) for r in iter_jsonl(jsonl_path)), csv_path, extra_digests)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Persistent per-case scan index (SQLite).
+- Stores the content verdict and digests of every scanned file
+- Keyed on (device, inode, size, mtime_ns) so unchanged files are skipped
+- Entries are only reused when the detector plan/config version matches
+- Checkpointed (committed) periodically, so an interrupted scan resumes
+- Verdicts from the reduced modes of a file over its CPU budget are not
+  stored, so a rerun with a larger budget scans those files again
+Notes:
+- The device number of the scan root is stored as 0. Loop devices get new
+  numbers on every mount, and this keeps the index valid across remounts of
+  the same image.
+- Uses only standard library.
+"""
+import json
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    plan_version TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    scanned_at REAL NOT NULL,
+    PRIMARY KEY (dev, ino, size, mtime_ns)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+CHECKPOINT_INTERVAL = 5.0  # seconds between commits
+
+
+class ScanIndex:
+    """Verdict store for one case; use as a context manager."""
+
+    def __init__(self, path, plan_version, root_dev=None, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.plan_version = plan_version
+        self.root_dev = root_dev
+        self.checkpoint_interval = checkpoint_interval
+        self.hits = 0
+        self.stored = 0
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('plan_version', ?)", (plan_version,))
+        self.db.commit()
+        self._last_checkpoint = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _key(self, st):
+        dev = 0 if st.st_dev == self.root_dev else st.st_dev
+        return (dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def lookup(self, st):
+        """Return the stored verdict for an unchanged file, or None."""
+        row = self.db.execute(
+            'SELECT plan_version, verdict FROM files WHERE dev=? AND ino=? AND size=? AND mtime_ns=?',
+            self._key(st)).fetchone()
+        if row is None or row[0] != self.plan_version:
+            return None
+        self.hits += 1
+        return json.loads(row[1])
+
+    def store(self, st, verdict):
+        if verdict.get('slow', {}).get('mode', 'full') != 'full':
+            # fallback or filename-only verdict: incomplete, not worth keeping
+            return
+        self.db.execute(
+            'INSERT OR REPLACE INTO files (dev, ino, size, mtime_ns, plan_version, verdict, scanned_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            self._key(st) + (self.plan_version, json.dumps(verdict), time.time()))
+        self.stored += 1
+        self.checkpoint()
+
+    def checkpoint(self, force=False):
+        """Commit pending verdicts if the checkpoint interval has passed (or force)."""
+        now = time.monotonic()
+        if force or now - self._last_checkpoint >= self.checkpoint_interval:
+            self.db.commit()
+            self._last_checkpoint = now
+
+    def close(self):
+        if self.db is not None:
+            self.db.commit()
+            self.db.close()
+            self.db = None
@@ -2,8 +2,34 @@
 """
 Recursive scanner for likely wallet artifacts (safe mode, stronger masking).
 - Scans filenames for suspicious names
-- Scans file contents for patterns such as JSON keystore markers
-- Produces reports (CSV + JSON)
+- Scans raw file bytes for patterns such as JSON keystore markers
+  (no text decoding; reported offsets are byte offsets in the file)
+- Streams hits to JSONL while scanning, then produces reports (CSV + JSON)
+- Optionally fans detection and hashing out to worker processes (--workers)
+- Scans raw disk images partition by partition without mounting (--image),
+  reading FAT32/exFAT/NTFS file by file and other partitions raw
+- Carves unallocated space, file slack or the whole image for deleted
+  keystores and seed phrases (--carve), reporting image byte offsets
+- Looks inside zip/tar/gz/bz2/xz archives (nested up to --archive-depth),
+  reporting members as 'archive.zip!/inner/path'
+- Routes Berkeley DB wallet.dat, LevelDB (.ldb/.log) and Electrum wallet
+  files, recognised by magic bytes, to structural extractors that report
+  their key/vault records (e.g. content pattern 'bdb:mkey')
+- Skips files on a known-good hash set (--known, see knownfiles.py); a
+  size + partial-hash pre-check decides which files get hashed first
+- Resolves files already seen in other cases from a shared verdict cache
+  keyed by content SHA-256 (--verdict-cache, see verdict_cache.py)
+- Triage mode (--triage) probes well-known wallet locations first and
+  walks the rest best-first, optionally cut off by --time-budget
+- Evaluates YARA-style rules (--rules, see yara_lite.py) in the same read
+  pass; matching rules are reported as content pattern 'yara:<rule>'
+- Gives each file's detection a CPU-time budget (--file-budget); files
+  running over it are redone with the literal-gated detectors only and
+  listed in scan_slow_files_<ts>.json, so one file never stalls the scan
+- Times its phases (walk, stat, read, hash, detectors, rules, masking,
+  output) and counts detector evaluations and hits into
+  scan_metrics_<ts>.json (see metrics.py); --profile adds cProfile and
+  tracemalloc reports
 Notes:
 - This script masks sensitive sequences strongly and marks 'sensitive' flags.
 - Uses only standard library.
@@ -11,12 +37,55 @@ Notes:
 import os
 import sys
 import argparse
-import json
-import csv
+import copy
 import hashlib
+import heapq
+import io
+import itertools
+import json
 import re
+import mmap
+import signal
+import stat
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+try:
+    from tools.modules.detectors import compile_plan, literal_plan
+    from tools.modules.bip39 import MnemonicDetector, load_wordlist
+    from tools.modules.scan_index import ScanIndex
+    from tools.modules.results import JsonlWriter, hit_record, finalize, FLUSH_LINES
+    from tools.modules.progress import ProgressReporter, precount
+    from tools.modules.image import RawImage, partitions, is_zero
+    from tools.modules.filesystems import open_filesystem, iter_file_chunks, slack_ranges, FileReader
+    from tools.modules.archives import iter_members, ArchiveError, MAX_DEPTH
+    from tools.modules.extractors import sniff, extract, ExtractError, RANK, SENSITIVE
+    from tools.modules.knownfiles import KnownSet, set_id, partial_hash, PARTIAL_SIZE
+    from tools.modules.verdict_cache import VerdictCache, open_reader, lookup, MAX_BYTES
+    from tools.modules.triage import probe, dir_priority
+    from tools.modules.yara_lite import load_rules, RuleError
+    from tools.modules.metrics import METRICS, clock, write_metrics, profile_run
+except ImportError:
+    # Fallback for direct execution
+    from detectors import compile_plan, literal_plan
+    from bip39 import MnemonicDetector, load_wordlist
+    from scan_index import ScanIndex
+    from results import JsonlWriter, hit_record, finalize, FLUSH_LINES
+    from progress import ProgressReporter, precount
+    from image import RawImage, partitions, is_zero
+    from filesystems import open_filesystem, iter_file_chunks, slack_ranges, FileReader
+    from archives import iter_members, ArchiveError, MAX_DEPTH
+    from extractors import sniff, extract, ExtractError, RANK, SENSITIVE
+    from knownfiles import KnownSet, set_id, partial_hash, PARTIAL_SIZE
+    from verdict_cache import VerdictCache, open_reader, lookup, MAX_BYTES
+    from triage import probe, dir_priority
+    from yara_lite import load_rules, RuleError
+    from metrics import METRICS, clock, write_metrics, profile_run
+
+SCANNER_VERSION = '1.1.0'
+
 FILENAME_PATTERNS = [
     re.compile(r'wallet', re.IGNORECASE),
     re.compile(r'keystore', re.IGNORECASE),
@@ -31,9 +100,196 @@ CONTENT_PATTERNS = [
     re.compile(r'"crypto"\s*:', re.IGNORECASE),
     re.compile(r'"address"\s*:', re.IGNORECASE),
     re.compile(r'(?:(?:[a-f0-9]{64})\b)', re.IGNORECASE),  # 64 hex
-    re.compile(r'([a-z]+(\s+[a-z]+){11,24})', re.IGNORECASE),  # mnemonic-like
+    MnemonicDetector(),  # 12-24 BIP39 words, single linear pass
 ]
 
+# literal gates + one combined regex, evaluated in CONTENT_PATTERNS order
+CONTENT_PLAN = compile_plan(CONTENT_PATTERNS)
+
+def build_plan(verify_checksum=False, wordlist_paths=()):
+    """Compile a content plan, optionally with checksum-verified mnemonics and extra wordlists."""
+    if not verify_checksum and not wordlist_paths:
+        return CONTENT_PLAN
+    wordlists = [load_wordlist(path) for path in wordlist_paths]
+    detectors = [p for p in CONTENT_PATTERNS if not isinstance(p, MnemonicDetector)]
+    detectors.append(MnemonicDetector(wordlists=wordlists, verify_checksum=verify_checksum))
+    return compile_plan(detectors)
+
+# defaults for reading file contents
+MAX_FULL_READ = 2000000   # files up to this size are read in one go
+HEAD_SIZE = 100000        # bytes inspected per large file in 'head' mode
+WINDOW_SIZE = 1048576     # mmap window for large files in 'full' mode
+HASH_CHUNK = 1048576      # read size when only hashing is left to do
+DIGESTS = ('sha256',)     # sha256 is always computed; md5/sha1 on request
+EXTRACT_MAX = 268435456   # larger files inside images/archives stay on the generic path
+FILE_BUDGET = 10.0        # CPU seconds of detection per file, per started BUDGET_UNIT of content
+BUDGET_UNIT = 67108864
+
+class ScanConfig:
+    """Settings shared by the walker and every worker process."""
+
+    def __init__(self, plan=None, max_full_read=MAX_FULL_READ, large_files='full',
+                 head_size=HEAD_SIZE, window_size=WINDOW_SIZE, digests=DIGESTS,
+                 archive_depth=MAX_DEPTH, extractors=True, known=None, cache=None, rules=None,
+                 file_budget=FILE_BUDGET):
+        self.plan = plan or CONTENT_PLAN
+        # compiled yara_lite RuleSet evaluated alongside the plan (None: no rules)
+        self.rules = rules
+        # window overlap: no plan match or rule string may be split between windows
+        self.overlap = max(self.plan.max_match_len, rules.max_match_len if rules else 0)
+        # digests computed in the same read pass as detection
+        self.digests = ('sha256',) + tuple(d for d in digests if d != 'sha256')
+        self.max_full_read = max_full_read
+        # 'full': scan large files completely through mmap windows, 'head': first head_size bytes only
+        self.large_files = large_files
+        self.head_size = head_size
+        # a window must hold at least two overlaps to make progress
+        self.window_size = max(window_size, 2 * self.overlap)
+        # nested archive levels entered; 0 scans archives as opaque files
+        self.archive_depth = archive_depth
+        # route wallet stores recognised by magic bytes to structural extractors
+        self.extractors = extractors
+        # base path of a known-good hash set; its id keys the index entries
+        self.known = known
+        self.known_id = set_id(known) if known else None
+        # path of the shared verdict cache (workers open it read-only)
+        self.cache = cache
+        # CPU seconds per file (and BUDGET_UNIT) before the fallback mode takes over; None: unlimited
+        self.file_budget = file_budget
+        self._fallback = None
+
+    def version(self, known_id=True):
+        """Fingerprint of everything that influences a file's verdict."""
+        return '%s-%s' % (self.plan.version, hashlib.sha256(repr((
+            self.max_full_read, self.large_files, self.head_size,
+            self.window_size, self.digests, self.archive_depth,
+            self.extractors, self.known_id if known_id else None,
+            self.rules.version if self.rules else None)).encode('utf-8')).hexdigest()[:8])
+
+    def cache_version(self):
+        """Verdict cache key: like version(), but shared by cases with different known sets."""
+        return self.version(known_id=False)
+
+    def budget(self, size):
+        """CPU seconds the detection of a file of this size may take (None: unlimited)."""
+        if not self.file_budget:
+            return None
+        return self.file_budget * max(1, -(-size // BUDGET_UNIT))
+
+    def fallback(self):
+        """Cheaper settings for files over budget: literal-gated detectors, no rules, extractors or archives."""
+        if self._fallback is None:
+            cheap = copy.copy(self)
+            cheap.plan = literal_plan(self.plan)
+            cheap.overlap = cheap.plan.max_match_len
+            cheap.rules = None
+            cheap.extractors = False
+            cheap.archive_depth = 0
+            self._fallback = cheap
+        return self._fallback
+
+# config used by scan_file(); replaced per process by _init_worker()
+_CONFIG = ScanConfig()
+
+def _init_worker(config):
+    global _CONFIG
+    _CONFIG = config
+    _install_watchdog()
+
+def _init_pool_worker(config):
+    # forked workers start with a copy of the parent's metrics; only their own work is handed back
+    METRICS.reset()
+    _init_worker(config)
+
+class BudgetExceeded(BaseException):
+    """A file's detection ran over its CPU budget.
+
+    A BaseException, so the detectors' and parsers' own error handling
+    does not swallow it.
+    """
+
+_WATCHDOG = None  # True once the CPU-time alarm handler is installed in this process
+
+def _budget_alarm(signum, frame):
+    raise BudgetExceeded()
+
+def _install_watchdog():
+    global _WATCHDOG
+    try:
+        signal.signal(signal.SIGVTALRM, _budget_alarm)
+        _WATCHDOG = True
+    except (AttributeError, ValueError):
+        # no SIGVTALRM (Windows) or not the main thread: budgets are measured, not enforced
+        _WATCHDOG = False
+
+def _run_budgeted(detect, seconds):
+    """detect() under a CPU-time alarm (ITIMER_VIRTUAL); raises BudgetExceeded when it fires."""
+    if _WATCHDOG is None:
+        _install_watchdog()
+    if not seconds or not _WATCHDOG:
+        return detect()
+    signal.setitimer(signal.ITIMER_VIRTUAL, seconds)
+    try:
+        return detect()
+    finally:
+        signal.setitimer(signal.ITIMER_VIRTUAL, 0)
+
+def _unpinned(exc):
+    """exc without its traceback: the interrupted frames' views of an mmap would keep it from closing."""
+    return exc.with_traceback(None)
+
+def _watched(detect, size):
+    """Run detect() within the file's CPU budget.
+
+    A file over budget is detected again with _CONFIG.fallback(); if that
+    runs over as well only the filename counts. Either way (and when the
+    budget could only be measured) verdict['slow'] records the CPU time
+    and the mode the verdict came from.
+    """
+    global _CONFIG
+    config = _CONFIG
+    budget = config.budget(size)
+    started = time.process_time()
+    try:
+        verdict = _run_budgeted(detect, budget)
+        mode = 'full'
+    except BudgetExceeded:
+        _CONFIG = config.fallback()
+        try:
+            verdict = _run_budgeted(detect, budget)
+            mode = 'fallback'
+        except BudgetExceeded:
+            verdict = _verdict(None, None, '', {})
+            mode = 'filename'
+        finally:
+            _CONFIG = config
+    seconds = time.process_time() - started
+    if verdict is not None and (mode != 'full' or (budget and seconds > budget)):
+        verdict['slow'] = {'seconds': round(seconds, 3), 'mode': mode}
+    return verdict
+
+_KNOWN = None  # (base, KnownSet) mapped in this process
+
+def _known_set():
+    global _KNOWN
+    if _CONFIG.known is None:
+        return None
+    if _KNOWN is None or _KNOWN[0] != _CONFIG.known:
+        _KNOWN = (_CONFIG.known, KnownSet(_CONFIG.known))
+    return _KNOWN[1]
+
+_CACHE = None  # (path, read-only connection) to the verdict cache in this process
+
+def _cache_reader():
+    global _CACHE
+    if _CONFIG.cache is None:
+        return None
+    if _CACHE is None or _CACHE[0] != _CONFIG.cache or _CACHE[1] is None:
+        _CACHE = (_CONFIG.cache, open_reader(_CONFIG.cache))
+    return _CACHE[1]
+
+MNEMONIC_MASKER = MnemonicDetector()
+
 def mask_hex(s):
     # keep first 6 and last 4 chars, mask the rest
     def repl(m):
@@ -50,9 +306,20 @@ def mask_mnemonic(s):
         return '***'
     return words[0] + ' ' + '***' + ' ' + words[-1]
 
+def mask_mnemonics(s):
+    # replace every mnemonic-length word run found by the BIP39 detector
+    parts = []
+    pos = 0
+    for m in MNEMONIC_MASKER.finditer(s):
+        parts.append(s[pos:m.start()])
+        parts.append(mask_mnemonic(m.group(0)))
+        pos = m.end()
+    parts.append(s[pos:])
+    return ''.join(parts)
+
 def mask_text(s):
     s = mask_hex(s)
-    s = re.sub(r'([a-z]+(\s+[a-z]+){11,24})', lambda m: mask_mnemonic(m.group(0)), s, flags=re.IGNORECASE)
+    s = mask_mnemonics(s)
     # limit length
     if len(s) > 120:
         return s[:56] + ' ... ' + s[-56:]
@@ -68,81 +335,1311 @@ def file_sha256(path):
     except Exception:
         return ''
 
-def scan(root, outdir):
-    results = []
-    for dirpath, dirnames, filenames in os.walk(root):
-        for fn in filenames:
-            full = os.path.join(dirpath, fn)
-            rel = os.path.relpath(full, root)
+def walk_files(root, stats=None):
+    """Yield (full, rel, filename, stat) for every regular file below root.
+
+    Built on os.scandir and streamed: a directory's files are yielded while
+    it is being read, so huge directories are never materialised. Each file
+    costs one lstat (DirEntry caches it); the result is reused downstream
+    (size for the workers, identity for the scan index). Files with several
+    hardlinks and directories reached twice (bind mounts) are visited once.
+    FIFOs, sockets and device nodes are skipped without being opened.
+    Symlinks are not followed: targets inside the tree are scanned as
+    files, and absolute links on a mounted image would resolve on the host.
+    Order is depth-first with subdirectories sorted; files keep directory
+    order, which is stable for a given filesystem.
+    Optional stats dict counts 'hardlinks', 'special', 'symlinks', 'loops'
+    and 'errors'.
+    """
+    if stats is None:
+        stats = {}
+    for key in ('hardlinks', 'special', 'symlinks', 'loops', 'errors'):
+        stats.setdefault(key, 0)
+    seen_files = set()
+    seen_dirs = set()
+    try:
+        st = os.stat(root)
+    except OSError:
+        stats['errors'] += 1
+        return
+    seen_dirs.add((st.st_dev, st.st_ino))
+    stack = [(root, '')]
+    while stack:
+        dirpath, reldir = stack.pop()
+        subdirs = []
+        yield from _list_dir(dirpath, reldir, stats, seen_files, seen_dirs, subdirs)
+        # reversed so the stack pops subdirectories in sorted order
+        subdirs.sort()
+        for _, path, relsub in reversed(subdirs):
+            stack.append((path, relsub))
+
+def walk_triage(root, stats=None):
+    """walk_files() in triage order: known wallet locations first, then best-first.
+
+    Paths from the triage table (triage.probe) are visited first, probed
+    directories completely. The rest of the tree follows with directories
+    ranked by triage.dir_priority(): wallet-looking paths, user homes,
+    other directories, system directories. Entry handling, stats and the
+    yielded tuples are those of walk_files(); nothing is visited twice.
+    """
+    if stats is None:
+        stats = {}
+    for key in ('hardlinks', 'special', 'symlinks', 'loops', 'errors'):
+        stats.setdefault(key, 0)
+    seen_files = set()
+    seen_dirs = set()
+    probed = set()  # (dev, ino) of files and directories the probe covered
+    try:
+        st = os.stat(root)
+    except OSError:
+        stats['errors'] += 1
+        return
+    root_key = (st.st_dev, st.st_ino)
+    seen_dirs.add(root_key)
+    for path in probe(root):
+        rel = os.path.relpath(path, root)
+        try:
+            st = os.lstat(path)
+        except OSError:
+            stats['errors'] += 1
+            continue
+        key = (st.st_dev, st.st_ino)
+        if stat.S_ISREG(st.st_mode):
+            if key not in probed:
+                probed.add(key)
+                yield path, rel, os.path.basename(path), st
+            continue
+        if not stat.S_ISDIR(st.st_mode) or key in seen_dirs:
+            continue
+        seen_dirs.add(key)
+        stack = [(path, rel + os.sep)]
+        while stack:
+            dirpath, reldir = stack.pop()
+            subdirs = []
+            for item in _list_dir(dirpath, reldir, stats, seen_files, seen_dirs, subdirs, probed):
+                probed.add((item[3].st_dev, item[3].st_ino))
+                yield item
+            subdirs.sort()
+            for _, sub, relsub in reversed(subdirs):
+                stack.append((sub, relsub))
+    # directories walked by the probe are skipped silently from here on
+    probed.update(seen_dirs)
+    probed.discard(root_key)
+    heap = [(dir_priority(''), '', root)]
+    while heap:
+        _, reldir, dirpath = heapq.heappop(heap)
+        subdirs = []
+        yield from _list_dir(dirpath, reldir, stats, seen_files, seen_dirs, subdirs, probed)
+        for _, sub, relsub in subdirs:
+            heapq.heappush(heap, (dir_priority(relsub), relsub, sub))
+
+def _list_dir(dirpath, reldir, stats, seen_files, seen_dirs, subdirs, probed=None):
+    """Yield the regular files of one directory; new subdirectories are appended to subdirs.
+
+    Files whose (device, inode) is in probed are left out silently.
+    """
+    started = clock()
+    try:
+        it = os.scandir(dirpath)
+    except OSError:
+        stats['errors'] += 1
+        return
+    finally:
+        METRICS.phase('walk', clock() - started)
+    METRICS.count('dirs')
+    with it:
+        while True:
+            # directory reads only; lstat calls count as 'stat'
+            started = clock()
+            try:
+                entry = next(it)
+            except StopIteration:
+                break
+            except OSError:
+                stats['errors'] += 1
+                break
+            finally:
+                METRICS.phase('walk', clock() - started)
+            rel = reldir + entry.name if reldir else entry.name
             try:
-                stat = os.lstat(full)
-            except Exception:
+                if entry.is_symlink():
+                    stats['symlinks'] += 1
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    st = _stat(entry)
+                    key = (st.st_dev, st.st_ino)
+                    if probed and key in probed:
+                        continue
+                    if key in seen_dirs:
+                        stats['loops'] += 1
+                    else:
+                        seen_dirs.add(key)
+                        subdirs.append((entry.name, entry.path, rel + os.sep))
+                    continue
+                st = _stat(entry)
+            except OSError:
+                # entry vanished during the walk
+                stats['errors'] += 1
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                # FIFO, socket or device node
+                stats['special'] += 1
+                continue
+            if st.st_nlink > 1:
+                key = (st.st_dev, st.st_ino)
+                if key in seen_files:
+                    stats['hardlinks'] += 1
+                    continue
+                seen_files.add(key)
+            if probed and (st.st_dev, st.st_ino) in probed:
+                # already yielded by the triage probe
                 continue
+            METRICS.count('files')
+            yield entry.path, rel, entry.name, st
 
-            fname_match = None
-            for p in FILENAME_PATTERNS:
-                if p.search(fn):
-                    fname_match = p.pattern
-                    break
+def _stat(entry):
+    started = clock()
+    try:
+        return entry.stat(follow_symlinks=False)
+    finally:
+        METRICS.phase('stat', clock() - started)
 
-            content_match = None
-            snippet = ''
-            sensitive = False
-            try:
-                size = os.path.getsize(full)
-                if size <= 2000000:  # smaller limit to avoid reading huge files
-                    with open(full, 'r', errors='ignore') as f:
-                        data = f.read()
+def iter_windows(size, window, overlap):
+    """Yield (start, end) windows covering [0, size) with the given overlap."""
+    step = window - overlap
+    start = 0
+    while True:
+        end = min(start + window, size)
+        yield start, end
+        if end >= size:
+            return
+        start += step
+
+SNIPPET_CONTEXT = 40  # bytes of context kept on each side of a hit
+
+def _snippet(data, start, end):
+    # only this small window is decoded; mask_text() works on text
+    raw = data[max(start-SNIPPET_CONTEXT, 0):min(end+SNIPPET_CONTEXT, len(data))]
+    return bytes(raw).decode('utf-8', errors='ignore')
+
+def _read(f, n):
+    started = clock()
+    data = f.read(n)
+    METRICS.phase('read', clock() - started)
+    METRICS.count('bytes_read', len(data))
+    return data
+
+def _metered_chunks(chunks):
+    """Iterate chunks, timing the reads behind them."""
+    chunks = iter(chunks)
+    while True:
+        started = clock()
+        chunk = next(chunks, None)
+        METRICS.phase('read', clock() - started)
+        if chunk is None:
+            return
+        METRICS.count('bytes_read', len(chunk))
+        yield chunk
+
+def _hash(hashers, data):
+    started = clock()
+    for _, h in hashers:
+        h.update(data)
+    METRICS.phase('hash', clock() - started)
+
+def _feed_rules(rules, data, base=0):
+    started = clock()
+    rules.feed(data, base)
+    METRICS.phase('rules', clock() - started)
+
+def read_and_detect(full, size, config, filename_hit=False, digests=None):
+    """One read pass per file feeding the detector plan, the rules and the hashers.
+
+    Returns (hit, offset, snippet text, digests, skipped, rule hits) where
+    offset is the byte offset of the match in the file, digests maps each
+    configured algorithm to its hex digest, skipped counts all-zero bytes
+    that were hashed but not searched and rule hits lists the matching
+    rules of config.rules. In head mode the remainder of a large file is
+    only read (for hashing) when the file is a hit. Digests computed
+    before the pass (known-set pre-check, cache lookup) are passed in and
+    returned as they are; the file is not hashed again.
+    """
+    plan = config.plan
+    hashers = [] if digests is not None else [(name, hashlib.new(name)) for name in config.digests]
+    hit, offset, raw = None, None, ''
+    skipped = 0
+    rules = config.rules.scanner() if config.rules else None
+    with open(full, 'rb') as f:
+        if size <= config.max_full_read or config.large_files == 'head':
+            limit = size if size <= config.max_full_read else config.head_size
+            data = _read(f, limit)
+            hit, offset, raw, skipped = _search_buffer(data, plan, rules)
+            rule_hits = rules.finish(size) if rules else []
+            if size > limit and (digests is not None or not (hit or rule_hits or filename_hit)):
+                return hit, offset, raw, digests or {}, skipped, rule_hits
+            _hash(hashers, data)
+            if size > limit:
+                for chunk in iter(lambda: _read(f, HASH_CHUNK), b''):
+                    _hash(hashers, chunk)
+        else:
+            # large-file mode: fixed-size mmap windows, memory stays bounded
+            searching = True
+            hashed = 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for start, end in iter_windows(size, config.window_size, config.overlap):
+                        METRICS.count('windows')
+                        _hash(hashers, view[hashed:end])
+                        fresh = end - hashed
+                        hashed = end
+                        if not (searching or rules):
+                            continue
+                        if is_zero(view[start:end]):
+                            skipped += fresh
+                            continue
+                        data = mm[start:end]
+                        if rules:
+                            _feed_rules(rules, data, start)
+                        if not searching:
+                            continue
+                        found = plan.search(data)
+                        if found and (hit is None or found.index < hit.index):
+                            hit, offset = found, start + found.start
+                            raw = _snippet(mm, offset, start + found.end)
+                            # nothing can outrank the first detector; only rules and hashes need the rest
+                            searching = found.index != 0
+                except BudgetExceeded as e:
+                    raise _unpinned(e)
+                finally:
+                    view.release()
+            METRICS.count('bytes_read', size)
+            rule_hits = rules.finish(size) if rules else []
+    if digests is None:
+        digests = {name: h.hexdigest() for name, h in hashers}
+    return hit, offset, raw, digests, skipped, rule_hits
+
+def detect_buffer(data, config, digests):
+    """read_and_detect() for a whole file already read (and hashed) for the cache lookup."""
+    rules = config.rules.scanner() if config.rules else None
+    hit, offset, raw, skipped = _search_buffer(data, config.plan, rules)
+    rule_hits = rules.finish(len(data)) if rules else []
+    return hit, offset, raw, digests, skipped, rule_hits
+
+def _search_buffer(data, plan, rules):
+    """(hit, offset, snippet text, skipped) for one buffer searched as a whole; rules are fed too."""
+    if is_zero(data):
+        return None, None, '', len(data)
+    hit = plan.search(data)
+    if rules:
+        _feed_rules(rules, data)
+    if hit is None:
+        return None, None, '', 0
+    return hit, hit.start, _snippet(data, hit.start, hit.end), 0
+
+def detect_chunks(chunks, size, config, filename_hit=False, digests=None):
+    """read_and_detect() for content that arrives as ordered chunks (image extents).
+
+    Same semantics: files up to max_full_read (and heads in head mode) are
+    searched as one buffer, larger ones window by window with overlap.
+    """
+    plan = config.plan
+    hashers = [] if digests is not None else [(name, hashlib.new(name)) for name in config.digests]
+    hit, offset, raw = None, None, ''
+    skipped = 0
+    rules = config.rules.scanner() if config.rules else None
+    chunks = _metered_chunks(chunks)
+    if size <= config.max_full_read or config.large_files == 'head':
+        limit = size if size <= config.max_full_read else config.head_size
+        buf = bytearray()
+        leftover = b''
+        for chunk in chunks:
+            need = limit - len(buf)
+            buf += chunk[:need]
+            if len(chunk) >= need:
+                leftover = chunk[need:]
+                break
+        data = bytes(buf)
+        hit, offset, raw, skipped = _search_buffer(data, plan, rules)
+        rule_hits = rules.finish(size) if rules else []
+        if size > limit and (digests is not None or not (hit or rule_hits or filename_hit)):
+            return hit, offset, raw, digests or {}, skipped, rule_hits
+        _hash(hashers, data)
+        _hash(hashers, leftover)
+        for chunk in chunks:
+            _hash(hashers, chunk)
+    else:
+        overlap = config.overlap
+        searching = True
+        tail = b''
+        base = 0  # content offset of tail[0]
+        for chunk in chunks:
+            METRICS.count('windows')
+            _hash(hashers, chunk)
+            if not (searching or rules):
+                continue
+            if is_zero(chunk):
+                # zeros cannot extend a match, so the tail has been searched in full
+                skipped += len(chunk)
+                base += len(tail) + len(chunk)
+                tail = b''
+                continue
+            data = tail + chunk
+            if rules:
+                _feed_rules(rules, data, base)
+            if searching:
+                found = plan.search(data)
+                if found and (hit is None or found.index < hit.index):
+                    hit, offset = found, base + found.start
+                    raw = _snippet(data, found.start, found.end)
+                    searching = found.index != 0
+            tail = data[-overlap:] if overlap else b''
+            base += len(data) - len(tail)
+        rule_hits = rules.finish(size) if rules else []
+    if digests is None:
+        digests = {name: h.hexdigest() for name, h in hashers}
+    return hit, offset, raw, digests, skipped, rule_hits
+
+def match_filename(fn):
+    for p in FILENAME_PATTERNS:
+        if p.search(fn):
+            return p.pattern
+    return None
+
+def detect_file(full, size, filename_hit=False):
+    """Content verdict for one file (JSON-serialisable, stored in the scan index).
+
+    Returns None when the file could not be read. Detection runs within
+    the file's CPU budget (see _watched).
+    """
+    return _watched(lambda: _detect_file(full, size, filename_hit), size)
+
+def _detect_file(full, size, filename_hit):
+    try:
+        with open(full, 'rb') as f:
+            verdict, digests = _precheck_known(f, size)
+            if verdict is not None:
+                return verdict
+            verdict, digests, data = _cached_verdict(f, size, digests)
+            if verdict is not None:
+                return verdict
+            verdict = _extract_file(f, os.path.basename(full), size, digests)
+            if verdict is None and data is not None:
+                verdict = _verdict(*detect_buffer(data, _CONFIG, digests))
+            elif verdict is None:
+                verdict = _verdict(*read_and_detect(full, size, _CONFIG, filename_hit or _known_size(size),
+                                                    digests))
+            if digests:
+                verdict['digests'] = digests
+            if _is_known(verdict, size):
+                return verdict
+            _scan_members(f, os.path.basename(full), size, verdict)
+        return verdict
+    except Exception:
+        return None
+
+def _known_verdict(digests, size):
+    verdict = _verdict(None, None, '', digests, skipped=size)
+    verdict['known'] = True
+    return verdict
+
+def _precheck_known(f, size):
+    """(known-file verdict or None, digests or None); f is left at offset 0.
+
+    Only files whose size and partial hash of the head match a recorded
+    entry are hashed up front; on a miss their digests are kept for the
+    detection pass. All others, including matches of size-only entries
+    (NSRL), go straight to the single detection pass, which hashes them
+    in full and is checked against the set afterwards (_is_known).
+    """
+    known = _known_set()
+    if known is None or not known.has_partial(size):
+        return None, None
+    head = _read(f, PARTIAL_SIZE)
+    if not known.candidate(size, partial_hash(head)):
+        f.seek(0)
+        return None, None
+    digests = _digest_file(f, head)
+    if digests['sha256'] in known:
+        return _known_verdict(digests, size), None
+    return None, digests
+
+def _known_size(size):
+    """True if files of this size may be on the known set (they are hashed in full, even in head mode)."""
+    known = _known_set()
+    return known is not None and known.has_size(size)
+
+def _digest_file(f, head=b''):
+    """Digests of the rest of f after the already read head; f is left at offset 0."""
+    hashers = [(name, hashlib.new(name, head)) for name in _CONFIG.digests]
+    for chunk in iter(lambda: _read(f, HASH_CHUNK), b''):
+        _hash(hashers, chunk)
+    f.seek(0)
+    return {name: h.hexdigest() for name, h in hashers}
+
+def _cached_verdict(f, size, digests=None):
+    """(verdict from the shared cache or None, digests or None, content or None).
+
+    With a cache, files up to max_full_read are read once here: the
+    digests come from that buffer (or from the pre-check) and on a miss
+    the buffer goes on to detection (detect_buffer), so a miss costs no
+    second read. Larger files are not looked up; they are hashed in the
+    detection pass and their verdict is stored afterwards. A digest on
+    the known set is caught here as well.
+    """
+    db = _cache_reader()
+    if db is None or (digests is None and size > _CONFIG.max_full_read):
+        return None, digests, None
+    data = None
+    if digests is None:
+        data = _read(f, size)
+        digests = _digest_file(f, data)
+        known = _known_set()
+        if known is not None and digests['sha256'] in known:
+            return _known_verdict(digests, size), None, None
+    verdict = lookup(db, digests['sha256'], _CONFIG.cache_version())
+    if verdict is None:
+        return None, digests, data
+    # the writer touches the entry (LRU) when it sees this flag
+    verdict['cached'] = True
+    verdict['digests'] = digests
+    return verdict, None, None
+
+def _is_known(verdict, size):
+    """Mark a verdict whose digest is on the known set (entries without sizes are only found here)."""
+    known = _known_set()
+    sha256 = verdict['digests'].get('sha256')
+    if known is None or not sha256 or sha256 not in known:
+        return False
+    verdict.update(_known_verdict(verdict['digests'], size))
+    return True
+
+def _extract_file(f, name, size, digests=None):
+    """Verdict from a structural extractor, or None when f is not a known wallet store.
+
+    Digests already computed (pre-check, cache lookup) are reused.
+    """
+    if not _CONFIG.extractors or size == 0:
+        return None
+    fmt = sniff(f, name, size)
+    if fmt is None:
+        return None
+    METRICS.count('extracted')
+    try:
+        if isinstance(getattr(f, 'raw', None), io.FileIO):
+            # a regular file: parse straight from the page cache
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                try:
+                    return extract_verdict(mm, fmt, _CONFIG, digests)
+                except BudgetExceeded as e:
+                    raise _unpinned(e)
+        if size > EXTRACT_MAX:
+            return None
+        data = _read(f, -1)
+        f.seek(0)
+        return extract_verdict(data, fmt, _CONFIG, digests)
+    except ExtractError:
+        # damaged or misdetected: the generic detectors still get the file
+        f.seek(0)
+        return None
+
+def extract_verdict(buf, fmt, config, digests=None):
+    """Verdict for a wallet store from its extracted records.
+
+    The highest ranked wallet record (see extractors.KINDS) becomes the
+    content pattern '<format>:<kind>' at the record's offset; without
+    wallet records the generic detectors run over the decoded record
+    values and, if those do not match, over the raw file (so routing a
+    file to an extractor never loses a hit of the generic path). Record
+    counts go into verdict['records'], matching rules (scanned over the
+    raw file) into verdict['rules']. The store is only hashed when no
+    digests are passed in.
+    """
+    started = clock()
+    records = extract(fmt, buf)
+    METRICS.phase('extract', clock() - started)
+    if digests is None:
+        hashers = [(name, hashlib.new(name)) for name in config.digests]
+        view = memoryview(buf)
+        try:
+            for pos in range(0, len(view), HASH_CHUNK):
+                _hash(hashers, view[pos:pos + HASH_CHUNK])
+        finally:
+            view.release()
+        digests = {name: h.hexdigest() for name, h in hashers}
+    counts = {}
+    best = None
+    for r in records:
+        if r.kind:
+            counts[r.kind] = counts.get(r.kind, 0) + 1
+            if best is None or RANK[r.kind] < RANK[best.kind]:
+                best = r
+    rule_hits = []
+    if config.rules:
+        rules = config.rules.scanner()
+        rules.feed(buf)
+        rule_hits = rules.finish(len(buf))
+    # detector hits and wallet records below take over the content pattern; the rule names stay
+    verdict = _verdict(None, None, '', digests, rule_hits=rule_hits)
+    verdict['format'] = fmt
+    if best is not None:
+        verdict['records'] = counts
+        verdict['content_pattern'] = '%s:%s' % (fmt, best.kind)
+        verdict['content_offset'] = best.offset
+        verdict['sensitive'] = SENSITIVE[best.kind]
+        # record types and counts only; the records themselves stay out of the report
+        verdict['snippet'] = ', '.join('%s x%d' % (k, counts[k]) for k in sorted(counts, key=RANK.get))
+        return verdict
+    hit = None
+    for r in records:
+        found = config.plan.search(r.value) if r.value else None
+        if found and (hit is None or found.index < hit[0].index):
+            hit = (found, r)
+    if hit:
+        found, r = hit
+        verdict.update(_verdict(found, r.offset, _snippet(r.value, found.start, found.end),
+                                verdict['digests']))
+        return verdict
+    found = config.plan.search(buf)
+    if found:
+        verdict.update(_verdict(found, found.start, _snippet(buf, found.start, found.end), verdict['digests']))
+    return verdict
+
+def _scan_members(f, name, size, verdict):
+    """Run archive members through the detector/hash pipeline; hits go into verdict['members']."""
+    if _CONFIG.archive_depth <= 0:
+        return
+    members = []
+    try:
+        for m in iter_members(f, name, size, _CONFIG.archive_depth):
+            fname_match = match_filename(m.name)
+            msize = m.size
+            mverdict = None
+            if m.stream is not None:
+                # single-file streams (.gz) have no size up front: force window mode
+                hint = m.size if m.size is not None else _CONFIG.max_full_read + 1
+                mverdict = _verdict(*detect_chunks(m.stream, hint, _CONFIG, bool(fname_match)))
+                m.stream.drain()
+                if msize is None:
+                    msize = m.stream.consumed
+            if fname_match or (mverdict and mverdict['content_pattern']):
+                members.append({'path': m.path, 'name': m.name, 'size': msize,
+                                'filename_pattern': fname_match or '', 'verdict': mverdict})
+    except ArchiveError as e:
+        verdict['archive_error'] = str(e)
+    if members:
+        verdict['members'] = members
+
+def _member_results(rel, verdict, digest_names):
+    """Output records for the archive members stored in a container's verdict."""
+    for m in (verdict or {}).get('members', ()):
+        yield make_result(rel + '!/' + m['path'], m['name'], m['size'], m['filename_pattern'],
+                          m['verdict'], digest_names)
+
+def _verdict(hit, offset, raw, digests, skipped=0, rule_hits=()):
+    verdict = {'content_pattern': '', 'content_offset': None, 'sensitive': False, 'snippet': '', 'digests': digests}
+    if skipped:
+        # all-zero bytes hashed but not searched, for the scan statistics
+        verdict['skipped'] = skipped
+    if hit:
+        verdict['content_pattern'] = hit.pattern
+        verdict['content_offset'] = offset
+        # mnemonic or long hex detectors mark the hit sensitive
+        verdict['sensitive'] = hit.sensitive
+        verdict['snippet'] = _mask(raw)
+    _rule_verdict(verdict, rule_hits)
+    return verdict
+
+def _mask(text):
+    started = clock()
+    masked = mask_text(text)
+    METRICS.phase('mask', clock() - started)
+    return masked
+
+def _rule_verdict(verdict, rule_hits):
+    """Record matching rules; without a detector hit the first rule becomes the content pattern."""
+    if not rule_hits:
+        return
+    verdict['rules'] = [r.name for r in rule_hits]
+    if verdict['content_pattern']:
+        return
+    first = rule_hits[0]
+    verdict['content_pattern'] = 'yara:' + first.name
+    verdict['content_offset'] = first.offset
+    verdict['sensitive'] = first.sensitive
+    verdict['snippet'] = _mask(first.snippet.decode('utf-8', errors='ignore'))
+
+def make_result(rel, fn, size, fname_match, verdict, digest_names=DIGESTS):
+    """Build the output record for a hit, or return None if nothing matched."""
+    verdict = verdict or {}
+    if verdict.get('known'):
+        # on the known-good hash set: never reported, not even by name
+        return None
+    content_match = verdict.get('content_pattern', '')
+    if not (fname_match or content_match):
+        return None
+    sensitive = verdict.get('sensitive', False)
+    digests = verdict.get('digests', {})
+    res = {
+        'path': rel,
+        'filename': fn,
+        'filesize': size,
+        'filename_pattern': fname_match or '',
+        'content_pattern': content_match,
+        'content_offset': verdict.get('content_offset'),
+        'sensitive': sensitive,
+        'snippet': verdict.get('snippet', '') if not sensitive else 'REDACTED: sensitive content (masked)',
+        'sha256': digests.get('sha256', ''),
+    }
+    for name in digest_names:
+        if name != 'sha256':
+            res[name] = digests.get(name, '')
+    if verdict.get('records'):
+        # wallet store read by a structural extractor: record counts per type
+        res['format'] = verdict['format']
+        res['records'] = verdict['records']
+    if verdict.get('rules'):
+        res['rules'] = verdict['rules']
+    if verdict.get('slow'):
+        # detected in a reduced mode (or only just in time): CPU seconds and mode
+        res['slow'] = verdict['slow']
+    return res
+
+def scan_file(full, rel, fn, size):
+    """Run filename/content detection and hashing for one file.
+
+    Returns the result dict for a hit, otherwise None.
+    """
+    fname_match = match_filename(fn)
+    verdict = detect_file(full, size, filename_hit=bool(fname_match))
+    return make_result(rel, fn, size, fname_match, verdict, _CONFIG.digests)
+
+def _detect_batch(batch):
+    # worker entry point: one submission per batch keeps IPC overhead low
+    return [detect_file(*task) for task in batch]
+
+def _batched(tasks, size):
+    batch = []
+    for task in tasks:
+        batch.append(task)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _plan_jobs(root, index, walk=walk_files):
+    """Walk root and attach the filename match and any reusable indexed verdict."""
+    for full, rel, fn, st in walk(root):
+        fname_match = match_filename(fn)
+        cached = index.lookup(st) if index is not None else None
+        if cached is not None and fname_match and not cached['digests']:
+            # indexed without digests (head mode, no hit) but now reportable
+            cached = None
+        yield full, rel, fn, st, fname_match, cached
+
+def _run_ordered(fn, items, workers, config, queue_depth=4):
+    """Yield (key, fn(arg)) for (key, arg) items, in submission order.
+
+    With workers > 1 calls go to a process pool with at most
+    workers * queue_depth in flight; an arg of None skips the call.
+    Each worker hands back its metrics with the result; they are merged
+    into this process's METRICS.
+    """
+    if workers <= 1:
+        _init_worker(config)
+        try:
+            for key, arg in items:
+                yield key, (fn(arg) if arg is not None else None)
+        finally:
+            # pool workers drop their image with the process, a serial scan closes it here
+            _close_image()
+        return
+    max_pending = workers * queue_depth
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker, initargs=(config,)) as pool:
+        pending = deque()
+        for key, arg in items:
+            pending.append((key, pool.submit(_metered_call, fn, arg) if arg is not None else None))
+            if len(pending) >= max_pending:
+                key, future = pending.popleft()
+                yield key, _merged(future)
+        while pending:
+            key, future = pending.popleft()
+            yield key, _merged(future)
+
+def _metered_call(fn, arg):
+    # worker side of _run_ordered: the result plus this process's metrics since the last call
+    return fn(arg), METRICS.drain()
+
+def _merged(future):
+    if future is None:
+        return None
+    result, metrics = future.result()
+    METRICS.merge(metrics)
+    return result
+
+def _remember(verdict, cache):
+    """Record a fresh verdict in the VerdictCache (or touch the entry it came from)."""
+    if cache is None or verdict is None:
+        return
+    if verdict.pop('cached', False):
+        cache.touch(verdict['digests']['sha256'])
+    else:
+        cache.store(verdict)
+
+def _report_slow(rel, size, slow, progress):
+    print(f"Warning: {rel}: detection took {slow['seconds']:.1f}s CPU ({slow['mode']} mode)", file=sys.stderr)
+    if progress is not None:
+        progress.slow_file(rel, size, slow['seconds'], slow['mode'])
+
+def iter_scan(root, workers=1, batch_size=64, queue_depth=4, config=None, index=None, progress=None,
+              cache=None, triage=False, deadline=None):
+    """Yield scan hits below root in walk order.
+
+    With workers > 1 the walker feeds batches into a process pool. Results
+    are consumed in submission order, so the output is identical to the
+    serial path. Files with a current verdict in the optional ScanIndex are
+    not read. Fresh verdicts go into the optional VerdictCache (opened on
+    config.cache). An optional ProgressReporter is told about every
+    finished file. triage walks known wallet locations first (walk_triage);
+    past deadline (time.monotonic()) no further files are handed out and
+    the batches in flight are finished.
+    """
+    config = config or ScanConfig()
+    walked = [0]
+
+    def batches():
+        for jobs in _batched(_plan_jobs(root, index, walk_triage if triage else walk_files), batch_size):
+            if deadline is not None and time.monotonic() >= deadline:
+                message = 'Time budget reached: walk stopped after %d files' % walked[0]
+                print(f"Warning: {message}", file=sys.stderr)
+                if progress is not None:
+                    progress.emit(message=message)
+                return
+            walked[0] += len(jobs)
+            todo = [(job[0], job[3].st_size, bool(job[4])) for job in jobs if job[5] is None]
+            yield jobs, (todo or None)
+
+    try:
+        for jobs, verdicts in _run_ordered(_detect_batch, batches(), workers, config, queue_depth):
+            computed = iter(verdicts or ())
+            for full, rel, fn, st, fname_match, cached in jobs:
+                skipped = 0
+                if cached is None:
+                    verdict = next(computed)
+                    if verdict is not None:
+                        skipped = verdict.pop('skipped', 0)
+                        _remember(verdict, cache)
+                        if index is not None:
+                            index.store(st, verdict)
                 else:
-                    with open(full, 'r', errors='ignore') as f:
-                        data = f.read(100000)
-                for p in CONTENT_PATTERNS:
-                    m = p.search(data)
-                    if m:
-                        content_match = p.pattern
-                        start = max(m.start()-40, 0)
-                        end = min(m.end()+40, len(data))
-                        raw = data[start:end]
-                        # If pattern is a mnemonic or long hex, mark sensitive
-                        if p.pattern.find('{64}') != -1 or p.pattern.find('mnemonic') != -1 or p.pattern.find('{11,24}') != -1 or 'mnemonic' in p.pattern.lower():
-                            sensitive = True
-                        snippet = mask_text(raw)
-                        break
-            except Exception:
-                data = ''
-
-            if fname_match or content_match:
-                res = {
-                    'path': rel,
-                    'filename': fn,
-                    'filesize': os.path.getsize(full),
-                    'filename_pattern': fname_match or '',
-                    'content_pattern': content_match or '',
-                    'sensitive': sensitive,
-                    'snippet': snippet if not sensitive else 'REDACTED: sensitive content (masked)',
-                    'sha256': file_sha256(full),
-                }
-                results.append(res)
+                    verdict = cached
+                res = make_result(rel, fn, st.st_size, fname_match, verdict, config.digests)
+                members = list(_member_results(rel, verdict, config.digests))
+                if progress is not None:
+                    progress.file_done(st.st_size, res is not None, skipped, bool(verdict and verdict.get('known')))
+                    progress.advance(hits=len(members))
+                if verdict and verdict.get('archive_error') and cached is None:
+                    print(f"Warning: {rel}: {verdict['archive_error']}", file=sys.stderr)
+                if verdict and verdict.get('slow') and cached is None:
+                    _report_slow(rel, st.st_size, verdict['slow'], progress)
+                if res:
+                    yield res
+                yield from members
+    finally:
+        if index is not None:
+            index.checkpoint(force=True)
+
+TRIAGE_BATCH = 4  # small batches so early hits come back quickly
+
+IMAGE_CHUNK = 16 * WINDOW_SIZE  # bytes of a partition handed to one worker call
+
+_IMAGE = None  # (path, RawImage) of the image open in this process
 
+def _open_image(path):
+    global _IMAGE
+    if _IMAGE is None or _IMAGE[0] != path:
+        _close_image()
+        _IMAGE = (path, RawImage(path))
+    return _IMAGE[1]
+
+def _close_image():
+    global _IMAGE
+    if _IMAGE is not None:
+        _IMAGE[1].close()
+        _IMAGE = None
+
+def detect_region(task):
+    """Scan bytes [start, end) of one partition of a raw image.
+
+    Reads run up to max_match_len past end so matches crossing the chunk
+    border are found; every hit is reported once, by the chunk (and
+    window) it starts in. Returns ([(partition offset, verdict), ...],
+    bytes skipped as empty).
+    """
+    image_path, part_start, part_size, start, end = task
+    img = _open_image(image_path)
+    found = []
+    skipped = _scan_range(img, part_start + start, part_start + end, part_start + part_size, found, part_start)
+    return found, skipped
+
+def _read_window(img, offset, length):
+    """Bytes of a window, or None if it lies in a sparse hole or is all zeros."""
+    if img.next_data(offset) >= offset + length:
+        return None
+    started = clock()
+    data = img.read_direct(offset, length)
+    METRICS.phase('read', clock() - started)
+    METRICS.count('bytes_read', length)
+    return None if is_zero(data) else data
+
+def _owned(ws, we, length, step, limit):
+    # bytes of window [ws, we) that no later window covers, clipped to [0, limit)
+    return max(0, min(we if we >= length else ws + step, limit) - ws)
+
+def _region_verdict(data, hit, offset):
+    return {
+        'content_pattern': hit.pattern,
+        'content_offset': offset,
+        'sensitive': hit.sensitive,
+        'snippet': _mask(_snippet(data, hit.start, hit.end)),
+        'digests': {},
+    }
+
+def detect_extents(task):
+    """Content verdict for a file inside an image, read by its extent runs (within its CPU budget)."""
+    image_path, f, filename_hit = task
+    if f.runs is None and f.data is None:
+        # NTFS compressed/encrypted content: filename match only
+        return None
+    return _watched(lambda: _detect_extents(image_path, f, filename_hit), f.size)
+
+def _detect_extents(image_path, f, filename_hit):
+    try:
+        img = _open_image(image_path)
+        chunks = iter_file_chunks(img, f, _CONFIG.window_size)
+        with io.BufferedReader(FileReader(img, f), HASH_CHUNK) as reader:
+            verdict, digests = _precheck_known(reader, f.size)
+            if verdict is not None:
+                return verdict
+            verdict, digests, data = _cached_verdict(reader, f.size, digests)
+            if verdict is not None:
+                return verdict
+            verdict = _extract_file(reader, f.name, f.size, digests)
+            if verdict is None and data is not None:
+                verdict = _verdict(*detect_buffer(data, _CONFIG, digests))
+            elif verdict is None:
+                verdict = _verdict(*detect_chunks(chunks, f.size, _CONFIG, filename_hit or _known_size(f.size),
+                                                  digests))
+            if digests:
+                verdict['digests'] = digests
+            if _is_known(verdict, f.size):
+                return verdict
+            _scan_members(reader, f.name, f.size, verdict)
+        return verdict
+    except Exception:
+        return None
+
+def carve_region(task):
+    """Report every hit in a batch of image byte ranges.
+
+    Each range is (start, end, stop): hits starting in [start, end) are
+    reported, and reading continues up to max_match_len past end (but not
+    beyond stop, the end of the contiguous free run) so matches crossing
+    a block border are complete. Returns ([(image offset, verdict), ...],
+    bytes skipped as empty).
+    """
+    image_path, ranges = task
+    img = _open_image(image_path)
+    found = []
+    skipped = 0
+    for start, end, stop in ranges:
+        skipped += _scan_range(img, start, end, stop, found)
+    return found, skipped
+
+def _scan_range(img, start, end, stop, found, base=0):
+    """Append every hit starting in image bytes [start, end) to found; returns bytes skipped as empty.
+
+    Offsets are reported relative to base (a partition start, or 0).
+    """
+    overlap = _CONFIG.plan.max_match_len
+    step = _CONFIG.window_size - overlap
+    length = min(end + overlap, stop) - start
+    img.readahead(start, length)
+    skipped = 0
+    covered = start  # end of the last reported match; overlap re-reads it
+    for ws, we in iter_windows(length, _CONFIG.window_size, overlap):
+        data = _read_window(img, start + ws, we - ws)
+        if data is None:
+            skipped += _owned(ws, we, length, step, end - start)
+            continue
+        for hit in _CONFIG.plan.finditer(data):
+            pos = start + ws + hit.start
+            if pos >= end or (we < length and hit.start >= step):
+                # owned by the next window or range, which sees the whole match
+                break
+            if pos < covered:
+                continue
+            covered = start + ws + hit.end
+            found.append((pos - base, _region_verdict(data, hit, pos - base)))
+    return skipped
+
+def _image_task(task):
+    # worker entry point for image scans: a raw region, carving ranges or a batch of files
+    if task[0] == 'region':
+        return detect_region(task[1])
+    if task[0] == 'carve':
+        return carve_region(task[1])
+    return [detect_extents(t) for t in task[1]]
+
+def image_totals(img, parts):
+    """(files, bytes) an image scan will cover, for progress percentages."""
+    files = total = 0
+    for part in parts:
+        fs = open_filesystem(img, part)
+        if fs is None:
+            total += part.size
+            continue
+        for f in fs.walk():
+            files += 1
+            total += f.size
+    return files, total
+
+def iter_image_scan(image_path, workers=1, batch_size=64, queue_depth=4, config=None,
+                    progress=None, parts=None, cache=None):
+    """Yield hits from every partition of a raw image, without mounting.
+
+    Partitions with a FAT32, exFAT or NTFS filesystem are walked file by
+    file ('p<N>/<path>'); files are read from the image by their extent
+    runs. Other partitions are scanned raw in IMAGE_CHUNK pieces and hits
+    are reported as 'p<N>@<offset>' with the byte offset in the partition.
+    File verdicts go into the optional VerdictCache like in iter_scan().
+    """
+    config = config or ScanConfig()
+    with RawImage(image_path) as img:
+        if parts is None:
+            parts = partitions(img)
+
+        def jobs():
+            for part in parts:
+                fs = open_filesystem(img, part)
+                if fs is None:
+                    for start in range(0, part.size, IMAGE_CHUNK):
+                        end = min(start + IMAGE_CHUNK, part.size)
+                        yield ('region', part, end - start), ('region', (image_path, part.start, part.size, start, end))
+                    continue
+                for files in _batched(fs.walk(), batch_size):
+                    matched = [(f, match_filename(f.name)) for f in files]
+                    yield ('files', part, matched), ('files', [(image_path, f, bool(m)) for f, m in matched])
+
+        for (kind, part, info), result in _run_ordered(_image_task, jobs(), workers, config, queue_depth):
+            if kind == 'region':
+                found, skipped = result
+                if progress is not None:
+                    progress.advance(nbytes=info, hits=len(found), skipped=skipped)
+                for offset, verdict in found:
+                    yield make_result('p%d@%d' % (part.index, offset), '', part.size, None, verdict, config.digests)
+                continue
+            for (f, fname_match), verdict in zip(info, result):
+                _remember(verdict, cache)
+                rel = 'p%d/%s' % (part.index, f.path)
+                res = make_result(rel, f.name, f.size, fname_match, verdict, config.digests)
+                members = list(_member_results(rel, verdict, config.digests))
+                if progress is not None:
+                    progress.file_done(f.size, res is not None, (verdict or {}).get('skipped', 0),
+                                       bool(verdict and verdict.get('known')))
+                    progress.advance(hits=len(members))
+                if verdict and verdict.get('archive_error'):
+                    print(f"Warning: {rel}: {verdict['archive_error']}", file=sys.stderr)
+                if verdict and verdict.get('slow'):
+                    _report_slow(rel, f.size, verdict['slow'], progress)
+                if res:
+                    yield res
+                yield from members
+
+CARVE_MODES = ('unallocated', 'all')
+
+def carve_ranges(img, parts, mode='unallocated'):
+    """Image byte ranges (start, end) to carve.
+
+    'all' is the whole image. 'unallocated' is what a file-by-file scan
+    never reads: free clusters and file slack of FAT32/exFAT/NTFS
+    partitions, plus space outside every partition (deleted or
+    overwritten tables). Partitions without a supported filesystem are
+    already scanned raw and are left out.
+    """
+    if mode == 'all':
+        return [(0, img.size)] if img.size else []
+    ranges = []
+    pos = 0
+    for part in sorted(parts, key=lambda p: p.start):
+        if part.start > pos:
+            ranges.append((pos, part.start))
+        pos = max(pos, part.start + part.size)
+        fs = open_filesystem(img, part)
+        if fs is None:
+            continue
+        end = part.start + part.size
+        for off, length in fs.free_ranges() + slack_ranges(fs):
+            if off < end:
+                ranges.append((off, min(off + length, end)))
+    if pos < img.size:
+        ranges.append((pos, img.size))
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        elif end > start:
+            merged.append((start, end))
+    return merged
+
+def _carve_tasks(ranges, block=IMAGE_CHUNK):
+    """Cut ranges at block-aligned image offsets and batch them into ~block-sized tasks."""
+    batch = []
+    size = 0
+    for start, end in ranges:
+        pos = start
+        while pos < end:
+            cut = min(end, (pos // block + 1) * block)
+            batch.append((pos, cut, end))
+            size += cut - pos
+            pos = cut
+            if size >= block:
+                yield batch, size
+                batch = []
+                size = 0
+    if batch:
+        yield batch, size
+
+def iter_carve(image_path, mode='unallocated', workers=1, queue_depth=4, config=None,
+               progress=None, parts=None):
+    """Yield every hit in the carved ranges of an image ('image@<offset>').
+
+    Ranges are read in IMAGE_CHUNK blocks aligned to image offsets and
+    spread over the worker processes; like the raw scan of partitions
+    without a supported filesystem, every match in a window is reported.
+    """
+    config = config or ScanConfig()
+    with RawImage(image_path) as img:
+        if parts is None:
+            parts = partitions(img)
+        ranges = carve_ranges(img, parts, mode)
+        image_size = img.size
+    jobs = ((size, ('carve', (image_path, batch))) for batch, size in _carve_tasks(ranges))
+    for size, (found, skipped) in _run_ordered(_image_task, jobs, workers, config, queue_depth):
+        if progress is not None:
+            progress.advance(nbytes=size, hits=len(found), skipped=skipped)
+        for offset, verdict in found:
+            yield make_result('image@%d' % offset, '', image_size, None, verdict, config.digests)
+
+def resolve_workers(workers):
+    # 0 (or negative) means "use every core"
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+def scan(root, outdir, workers=1, config=None, index_path=None, case=None,
+         case_dir=None, precount_files=False, image_path=None, carve=None, cache_size=MAX_BYTES,
+         triage=False, time_budget=None):
+    """Scan root (or a raw image) and write scan_results_<ts>.jsonl/.json/.csv into outdir.
+
+    Hits are streamed to the JSONL file while the scan runs; the JSON and
+    CSV reports are built from it once the walk has finished. With
+    case_dir, progress events go to its logs/process.log and status.json;
+    precount_files adds a metadata-only walk so they carry percent and ETA.
+    With image_path, the partitions of the image are scanned directly
+    (root and index_path are ignored); carve ('unallocated' or 'all')
+    then also carves that part of the image for deleted content. With
+    config.cache, verdicts are shared through that cache (at most
+    cache_size bytes). Files over their CPU budget are listed in
+    scan_slow_files_<ts>.json; phase timings and detector statistics of
+    the run go into scan_metrics_<ts>.json. triage walks known wallet locations first and
+    writes every hit through at once; time_budget (seconds) stops handing
+    out files once it has passed.
+    """
+    METRICS.reset()
+    started = clock()
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+    config = config or ScanConfig()
+    workers = resolve_workers(workers)
+    # case identifier for the api_spec envelope: the case dir holding reports/
+    case = case or case_dir or os.path.dirname(os.path.abspath(outdir))
     timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    jsonl_path = os.path.join(outdir, f'scan_results_{timestamp}.jsonl')
+    slow_path = os.path.join(outdir, f'scan_slow_files_{timestamp}.json')
+    metrics_path = os.path.join(outdir, f'scan_metrics_{timestamp}.json')
     json_path = os.path.join(outdir, f'scan_results_{timestamp}.json')
     csv_path = os.path.join(outdir, f'scan_results_{timestamp}.csv')
-    with open(json_path, 'w') as jf:
-        json.dump(results, jf, indent=2)
-    with open(csv_path, 'w', newline='') as cf:
-        writer = csv.writer(cf)
-        writer.writerow(['path','filename','filesize','filename_pattern','content_pattern','sensitive','snippet','sha256'])
-        for r in results:
-            writer.writerow([r['path'], r['filename'], r['filesize'], r['filename_pattern'], r['content_pattern'], str(r['sensitive']), r['snippet'], r['sha256']])
-    print(f"Scan complete. JSON: {json_path} CSV: {csv_path}")
+
+    parts = None
+    image_total = (None, None)
+    if image_path:
+        with RawImage(image_path) as img:
+            parts = partitions(img)
+            for part in parts:
+                fs = open_filesystem(img, part)
+                table = ' '.join(x for x in (part.scheme, part.type) if x and x != 'none') or 'no table'
+                print(f"Partition p{part.index}: offset {part.start}, {part.size} bytes "
+                      f"({table}, {fs.kind if fs else 'raw scan'})")
+            if case_dir and precount_files:
+                image_total = image_totals(img, parts)
+                if carve:
+                    files, total = image_total
+                    image_total = (files, total + sum(e - s for s, e in carve_ranges(img, parts, carve)))
+
+    # without a case dir the reporter only keeps the scan statistics
+    total_files = total_bytes = None
+    if case_dir:
+        if parts is not None:
+            total_files, total_bytes = image_total
+        elif precount_files:
+            total_files, total_bytes = precount(walk_files(root))
+    progress = ProgressReporter(case_dir, case, total_files, total_bytes)
+    progress.emit(message='Scan started: %s' % (image_path or root))
+    index = None
+    if index_path and not image_path:
+        index = ScanIndex(index_path, config.version(), root_dev=os.stat(root).st_dev)
+    cache = None
+    if config.cache:
+        cache = VerdictCache(config.cache, config.cache_version(), max_bytes=cache_size)
+    try:
+        if image_path:
+            results = iter_image_scan(image_path, workers=workers, config=config,
+                                      progress=progress, parts=parts, cache=cache)
+            if carve:
+                results = itertools.chain(results, iter_carve(image_path, carve, workers=workers, config=config,
+                                                              progress=progress, parts=parts))
+        else:
+            results = iter_scan(root, workers=workers, config=config, index=index, progress=progress,
+                                cache=cache, triage=triage, deadline=deadline,
+                                batch_size=TRIAGE_BATCH if triage else 64)
+        # triage partners follow the JSONL live: no buffering
+        with JsonlWriter(jsonl_path, flush_lines=1 if triage else FLUSH_LINES) as writer:
+            for res in results:
+                written = clock()
+                writer.write(hit_record(res, case, SCANNER_VERSION))
+                METRICS.phase('write', clock() - written)
+    finally:
+        if index is not None:
+            index.close()
+        if cache is not None:
+            cache.close()
+
+    with METRICS.timed('finalize'):
+        finalize(jsonl_path, json_path, csv_path, config.digests[1:])
+    if progress.slow_files:
+        with open(slow_path, 'w', encoding='utf-8') as f:
+            json.dump({'file_budget': config.file_budget, 'budget_unit': BUDGET_UNIT,
+                       'slow_files': progress.slow_files}, f, indent=2)
+    progress.finish()
+    write_metrics(metrics_path, METRICS, scanner_version=SCANNER_VERSION, source=image_path or root,
+                  workers=workers, wall_seconds=round(clock() - started, 6),
+                  files_scanned=progress.files_scanned, bytes_scanned=progress.bytes_scanned,
+                  bytes_skipped=progress.bytes_skipped, hits_found=progress.hits_found,
+                  files_slow=len(progress.slow_files))
+    print(f"Scanned {progress.files_scanned} files, {progress.bytes_scanned} bytes "
+          f"({progress.bytes_skipped} bytes hashed but not searched, {progress.files_known} known files), "
+          f"{progress.hits_found} hits")
+    if cache is not None:
+        print(f"Verdict cache: {cache.hits} files resolved, {cache.stored} verdicts stored, {cache.evicted} evicted")
+    if progress.slow_files:
+        print(f"Slow files: {len(progress.slow_files)} over the CPU budget, see {slow_path}")
+    print(f"Scan complete. JSON: {json_path} CSV: {csv_path} JSONL: {jsonl_path} Metrics: {metrics_path}")
 
 def main():
     p = argparse.ArgumentParser(description='Search filesystem for wallet artifacts (safe mode)')
-    p.add_argument('--root', required=True, help='Root directory to scan (mounted image)')
+    source = p.add_mutually_exclusive_group(required=True)
+    source.add_argument('--root', help='Root directory to scan (mounted image)')
+    source.add_argument('--image', metavar='PATH',
+                        help='Raw (.dd/.img/.raw) or EWF (.E01) disk image scanned directly, partition by partition, without mounting')
     p.add_argument('--outdir', required=True, help='Directory for reports')
+    p.add_argument('--carve', choices=CARVE_MODES,
+                   help="With --image: also carve deleted content, from free clusters, slack and "
+                        "unpartitioned space ('unallocated') or the whole image ('all')")
+    p.add_argument('--workers', type=int, default=1,
+                   help='Worker processes for detection and hashing (default: 1, 0 = all cores)')
+    p.add_argument('--verify-checksum', action='store_true',
+                   help='Only report mnemonics with a valid BIP39 checksum or Electrum seed version')
+    p.add_argument('--wordlist', action='append', default=[],
+                   help='Additional mnemonic wordlist file (e.g. Electrum 1.x), may be repeated')
+    p.add_argument('--max-full-read', type=int, default=MAX_FULL_READ,
+                   help=f'Files up to this many bytes are read in one go (default: {MAX_FULL_READ})')
+    p.add_argument('--large-files', choices=['full', 'head'], default='full',
+                   help="Larger files: 'full' scans them completely via mmap windows, 'head' only the first --head-size bytes")
+    p.add_argument('--head-size', type=int, default=HEAD_SIZE,
+                   help=f'Bytes inspected per large file in head mode (default: {HEAD_SIZE})')
+    p.add_argument('--window-size', type=int, default=WINDOW_SIZE,
+                   help=f'mmap window size for large files in full mode (default: {WINDOW_SIZE})')
+    p.add_argument('--digests', default='sha256',
+                   help='Comma-separated digests computed in the read pass, e.g. sha256,md5,sha1 (sha256 is always included)')
+    p.add_argument('--archive-depth', type=int, default=MAX_DEPTH,
+                   help=f'Nested zip/tar/gz/bz2/xz levels scanned in place (default: {MAX_DEPTH}, 0 = off)')
+    p.add_argument('--known', metavar='BASE',
+                   help='Known-good hash set built with knownfiles.py; matching files are skipped')
+    p.add_argument('--verdict-cache', metavar='PATH',
+                   help='Shop-wide SQLite verdict cache; files seen in other cases skip the detectors')
+    p.add_argument('--verdict-cache-size', type=int, default=MAX_BYTES,
+                   help=f'Bytes of verdicts kept before least recently used ones are evicted (default: {MAX_BYTES})')
+    p.add_argument('--rules', action='append', default=[], metavar='PATH',
+                   help='YARA rule file or directory of *.yar files, evaluated in the same read pass; may be repeated')
+    p.add_argument('--file-budget', type=float, default=FILE_BUDGET, metavar='SECONDS',
+                   help=f'CPU seconds of detection per file and started {BUDGET_UNIT // 1048576} MiB before the '
+                        f'cheaper fallback mode takes over (default: {FILE_BUDGET}, 0 = unlimited)')
+    p.add_argument('--no-extractors', dest='extractors', action='store_false',
+                   help='Scan wallet.dat/LevelDB/Electrum files with the generic detectors only')
+    p.add_argument('--triage', action='store_true',
+                   help='Probe well-known wallet locations first, then walk user homes before system directories')
+    p.add_argument('--time-budget', type=float, metavar='SECONDS',
+                   help='Stop handing out files after this many seconds; hits found so far are reported')
+    p.add_argument('--index', metavar='PATH',
+                   help='Per-case SQLite scan index; unchanged files are skipped and interrupted scans resume')
+    p.add_argument('--case-dir', metavar='PATH',
+                   help='Case directory; progress events go to its logs/process.log and logs/status.json')
+    p.add_argument('--precount', action='store_true',
+                   help='Count files and bytes first so progress events carry percent and ETA')
+    p.add_argument('--profile', action='store_true',
+                   help='Run under cProfile and tracemalloc and write their reports next to the results '
+                        '(profiles the scanning process only; combine with --workers 1)')
     args = p.parse_args()
+    digests = [d.strip().lower() for d in args.digests.split(',') if d.strip()]
+    unknown = [d for d in digests if d not in hashlib.algorithms_available]
+    if unknown:
+        p.error('unsupported digest(s): ' + ', '.join(unknown))
+    if args.carve and not args.image:
+        p.error('--carve requires --image')
+    if args.image and (args.triage or args.time_budget is not None):
+        p.error('--triage and --time-budget require --root')
+    rules = None
+    if args.rules:
+        try:
+            rules = load_rules(args.rules)
+        except (RuleError, OSError) as e:
+            p.error('cannot load rules: %s' % e)
     os.makedirs(args.outdir, exist_ok=True)
-    scan(args.root, args.outdir)
+    config = ScanConfig(
+        plan=build_plan(verify_checksum=args.verify_checksum, wordlist_paths=args.wordlist),
+        max_full_read=args.max_full_read,
+        large_files=args.large_files,
+        head_size=args.head_size,
+        window_size=args.window_size,
+        digests=digests,
+        archive_depth=args.archive_depth,
+        extractors=args.extractors,
+        known=args.known,
+        cache=args.verdict_cache,
+        rules=rules,
+        file_budget=args.file_budget or None,
+    )
+    run = lambda: scan(args.root, args.outdir, workers=args.workers, config=config, index_path=args.index,
+                       case_dir=args.case_dir, precount_files=args.precount, image_path=args.image,
+                       carve=args.carve, cache_size=args.verdict_cache_size, triage=args.triage,
+                       time_budget=args.time_budget)
+    if args.profile:
+        if args.workers != 1:
+            print("Warning: --profile only covers the scanning process, not its workers", file=sys.stderr)
+        profile_run(run, args.outdir)
+    else:
+        run()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Triage ordering for the wallet scanner: known wallet locations first.
+- A curated table of wallet paths and filename globs for Linux, Windows
+  and macOS profiles (Bitcoin Core, Electrum, Ethereum keystores, Exodus,
+  browser extension storage of MetaMask and other wallet extensions)
+- probe() expands the table below a scan root; '*' matches one path
+  component, '**' any number of them, always case-insensitively
+- dir_priority() ranks directories for the best-first walk that follows:
+  wallet-looking paths, then user homes, then everything else, then
+  system directories
+Notes:
+- Paths are relative to the scan root (the mounted filesystem root), so
+  profile prefixes such as Users/* or home/* match any user name.
+- Uses only standard library.
+"""
+import fnmatch
+import os
+import re
+
+# extension ids of browser wallets (Local Extension Settings/<id>)
+WALLET_EXTENSIONS = (
+    'nkbihfbeogaeaoehlefnkodbefgpgknn',  # MetaMask
+    'bfnaelmomeimhlpmgjnjophhpkkoljpa',  # Phantom
+    'hnfanknocfeofbddgcijnmhnfnkdnaad',  # Coinbase Wallet
+    'fhbohimaelbohpjbbldcngcnapndodjp',  # Binance Wallet
+    'egjidjbpglichdcondbcbdnbeeppgdph',  # Trust Wallet
+    'ibnejdfjmmkpcnlpebklmnkoeoihofec',  # TronLink
+)
+
+_BROWSER_PROFILES = (
+    # Linux
+    'home/*/.config/google-chrome/*', 'home/*/.config/chromium/*',
+    'home/*/.config/BraveSoftware/Brave-Browser/*', 'home/*/.config/microsoft-edge/*',
+    # Windows
+    'Users/*/AppData/Local/Google/Chrome/User Data/*', 'Users/*/AppData/Local/Chromium/User Data/*',
+    'Users/*/AppData/Local/BraveSoftware/Brave-Browser/User Data/*',
+    'Users/*/AppData/Local/Microsoft/Edge/User Data/*',
+    # macOS
+    'Users/*/Library/Application Support/Google/Chrome/*',
+    'Users/*/Library/Application Support/BraveSoftware/Brave-Browser/*',
+    'Users/*/Library/Application Support/Microsoft Edge/*',
+)
+
+# wallet data locations, most specific first
+TRIAGE_PATHS = (
+    # Bitcoin Core (and forks sharing the layout)
+    'home/*/.bitcoin/wallet.dat', 'home/*/.bitcoin/wallets/**',
+    'root/.bitcoin/wallet.dat', 'root/.bitcoin/wallets/**',
+    'Users/*/AppData/Roaming/Bitcoin/wallet.dat', 'Users/*/AppData/Roaming/Bitcoin/wallets/**',
+    'Documents and Settings/*/Application Data/Bitcoin/wallet.dat',
+    'Users/*/Library/Application Support/Bitcoin/wallet.dat',
+    'Users/*/Library/Application Support/Bitcoin/wallets/**',
+    'home/*/.litecoin/wallet.dat', 'home/*/.dogecoin/wallet.dat',
+    'Users/*/AppData/Roaming/Litecoin/wallet.dat', 'Users/*/AppData/Roaming/Dogecoin/wallet.dat',
+    # Electrum
+    'home/*/.electrum/wallets/*', 'root/.electrum/wallets/*',
+    'Users/*/AppData/Roaming/Electrum/wallets/*', 'Users/*/.electrum/wallets/*',
+    # Ethereum keystores (geth, parity, Mist)
+    'home/*/.ethereum/keystore/*', 'home/*/.local/share/io.parity.ethereum/keys/**',
+    'Users/*/AppData/Roaming/Ethereum/keystore/*', 'Users/*/AppData/Roaming/Parity/Ethereum/keys/**',
+    'Users/*/Library/Ethereum/keystore/*',
+    'home/*/.config/Mist/**', 'Users/*/AppData/Roaming/Mist/**',
+    # Exodus, Atomic, Monero
+    'home/*/.config/Exodus/exodus.wallet/**', 'Users/*/AppData/Roaming/Exodus/exodus.wallet/**',
+    'Users/*/Library/Application Support/Exodus/exodus.wallet/**',
+    'Users/*/AppData/Roaming/atomic/Local Storage/leveldb/*',
+    'home/*/Monero/wallets/**', 'Users/*/Documents/Monero/wallets/**',
+) + tuple(
+    '%s/Local Extension Settings/%s/*' % (profile, ext)
+    for profile in _BROWSER_PROFILES for ext in WALLET_EXTENSIONS
+) + (
+    # wallet-looking file names in user homes
+    'home/*/**/UTC--*', 'Users/*/**/UTC--*',
+    'home/*/**/*wallet*.dat', 'Users/*/**/*wallet*.dat',
+    'home/*/**/*.wallet', 'Users/*/**/*.wallet',
+)
+
+MAX_GLOB_DEPTH = 12  # components a '**' may span
+
+HOME_DIRS = ('home', 'users', 'documents and settings')
+SYSTEM_DIRS = frozenset((
+    'windows', 'program files', 'program files (x86)', 'programdata', '$recycle.bin',
+    'system volume information', 'usr', 'lib', 'lib32', 'lib64', 'bin', 'sbin', 'boot',
+    'proc', 'sys', 'dev', 'run', 'snap', 'opt', 'etc', 'system', 'applications',
+    'library', 'private', 'cores',
+))
+WALLET_HINTS = re.compile(
+    r'wallet|bitcoin|electrum|ethereum|keystore|exodus|metamask|monero|litecoin|'
+    r'local extension settings|' + '|'.join(WALLET_EXTENSIONS), re.IGNORECASE)
+
+
+def dir_priority(rel):
+    """Walk rank of a directory relative to the root (lower is visited first)."""
+    if WALLET_HINTS.search(rel):
+        return 0
+    parts = rel.replace(os.sep, '/').strip('/').lower().split('/')
+    if parts[0] in HOME_DIRS or parts[0] == 'root':
+        return 1
+    if parts[0] in SYSTEM_DIRS:
+        return 3
+    return 2
+
+
+def _match(pattern, name):
+    return fnmatch.fnmatchcase(name.lower(), pattern.lower())
+
+
+def _expand(path, parts, listings, depth=0):
+    """Paths below path matching the remaining pattern components."""
+    if not parts:
+        yield path
+        return
+    head, rest = parts[0], parts[1:]
+    if head == '**':
+        # zero components, or one more directory and '**' again
+        yield from _expand(path, rest, listings, depth)
+        if depth >= MAX_GLOB_DEPTH:
+            return
+        for name, child, is_dir in _children(path, listings):
+            if is_dir:
+                yield from _expand(child, parts, listings, depth + 1)
+        return
+    # literal components too: 'Users' and 'users' may both exist on case-sensitive filesystems
+    for name, child, is_dir in _children(path, listings):
+        if (is_dir or not rest) and _match(head, name):
+            yield from _expand(child, rest, listings, depth)
+
+
+def _children(path, listings):
+    """Sorted (name, path, is_dir) entries of a directory, symlinks skipped; listed once per probe."""
+    entries = listings.get(path)
+    if entries is not None:
+        return entries
+    entries = []
+    try:
+        with os.scandir(path) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                try:
+                    if entry.is_symlink():
+                        continue
+                    entries.append((entry.name, entry.path, entry.is_dir(follow_symlinks=False)))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    listings[path] = entries
+    return entries
+
+
+def probe(root, patterns=TRIAGE_PATHS):
+    """Yield existing files and directories below root that match the triage table, in table order."""
+    seen = set()
+    listings = {}
+    for pattern in patterns:
+        for path in _expand(root, pattern.split('/'), listings):
+            if path not in seen:
+                seen.add(path)
+                yield path
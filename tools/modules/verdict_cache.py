@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Shop-wide verdict cache shared between cases (SQLite).
+- Maps (content SHA-256, detector plan/config version) to the content verdict,
+  so a file already seen in another case is resolved without the detectors
+- Size-bounded: least recently used entries are evicted past max_bytes
+- Verdicts of files that ran over their CPU budget are not shared
+- Snippets of sensitive hits are never stored (reports redact them anyway);
+  other snippets are stored masked, as they appear in the reports
+- One writer (the scanning process) with periodic commits; worker processes
+  look verdicts up through read-only connections (WAL mode)
+Notes:
+- Hits are reported back by the workers and touched by the writer, so the
+  LRU order also reflects lookups.
+- Uses only standard library.
+"""
+import json
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    sha256 TEXT NOT NULL,
+    plan_version TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (sha256, plan_version)
+);
+CREATE INDEX IF NOT EXISTS verdicts_lru ON verdicts (last_used);
+"""
+
+MAX_BYTES = 256 * 1024 * 1024  # stored verdict JSON before eviction
+CHECKPOINT_INTERVAL = 5.0      # seconds between commits
+BUSY_TIMEOUT = 30.0
+
+
+def scrub(verdict):
+    """Copy of a verdict that is safe to share between cases."""
+    clean = {k: v for k, v in verdict.items() if k not in ('skipped', 'cached')}
+    if clean.get('sensitive'):
+        clean['snippet'] = ''
+    if 'members' in clean:
+        clean['members'] = [dict(m, verdict=scrub(m['verdict'])) if m.get('verdict') else m
+                            for m in clean['members']]
+    return clean
+
+
+def lookup(db, sha256, plan_version):
+    """Stored verdict for content with this digest, or None (works on read-only connections)."""
+    row = db.execute('SELECT verdict FROM verdicts WHERE sha256=? AND plan_version=?',
+                     (sha256, plan_version)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def open_reader(path):
+    """Read-only connection for worker processes; None if the cache does not exist yet."""
+    if not os.path.exists(path):
+        return None
+    db = sqlite3.connect('file:%s?mode=ro' % path, uri=True, timeout=BUSY_TIMEOUT)
+    db.execute('PRAGMA query_only=ON')
+    return db
+
+
+class VerdictCache:
+    """Writer side of the cache; use as a context manager."""
+
+    def __init__(self, path, plan_version, max_bytes=MAX_BYTES, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.plan_version = plan_version
+        self.max_bytes = max_bytes
+        self.checkpoint_interval = checkpoint_interval
+        self.hits = 0
+        self.stored = 0
+        self.evicted = 0
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+        self._last_checkpoint = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, sha256):
+        verdict = lookup(self.db, sha256, self.plan_version)
+        if verdict is not None:
+            self.touch(sha256)
+        return verdict
+
+    def touch(self, sha256):
+        """Mark an entry as used (a worker resolved a file from it)."""
+        self.db.execute('UPDATE verdicts SET last_used=? WHERE sha256=? AND plan_version=?',
+                        (time.time(), sha256, self.plan_version))
+        self.hits += 1
+        self.checkpoint()
+
+    def store(self, verdict):
+        """Remember a freshly computed verdict under its SHA-256 (no-op without one)."""
+        sha256 = (verdict.get('digests') or {}).get('sha256')
+        if not sha256 or verdict.get('known') or verdict.get('slow'):
+            # known files need no verdict; slow ones may come from the reduced fallback mode
+            return
+        body = json.dumps(scrub(verdict))
+        self.db.execute(
+            'INSERT OR REPLACE INTO verdicts (sha256, plan_version, verdict, bytes, last_used) '
+            'VALUES (?, ?, ?, ?, ?)', (sha256, self.plan_version, body, len(body), time.time()))
+        self.stored += 1
+        self.checkpoint()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits max_bytes."""
+        total = self.db.execute('SELECT COALESCE(SUM(bytes), 0) FROM verdicts').fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return 0
+        cutoff = None
+        for last_used, size in self.db.execute('SELECT last_used, bytes FROM verdicts ORDER BY last_used'):
+            excess -= size
+            cutoff = last_used
+            if excess <= 0:
+                break
+        n = self.db.execute('DELETE FROM verdicts WHERE last_used <= ?', (cutoff,)).rowcount
+        self.evicted += n
+        return n
+
+    def checkpoint(self, force=False):
+        """Commit (and evict) if the checkpoint interval has passed (or force)."""
+        now = time.monotonic()
+        if force or now - self._last_checkpoint >= self.checkpoint_interval:
+            self.evict()
+            self.db.commit()
+            self._last_checkpoint = now
+
+    def close(self):
+        if self.db is not None:
+            self.checkpoint(force=True)
+            self.db.close()
+            self.db = None
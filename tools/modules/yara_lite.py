@@ -0,0 +1,671 @@
+#!/usr/bin/env python3
+"""
+In-process rule engine for the common YARA subset (yara_rules/*.yar).
+- Rules with meta, strings and condition sections; 'private' rules and
+  tags are accepted, imports and modules are not
+- Text strings with nocase, ascii, wide, fullword and private modifiers;
+  hex strings with ?? and nibble wildcards, jumps [n-m] and alternatives
+- Conditions: and/or/not, parentheses, $a, #a, @a[i], $a at N,
+  $a in (N..M), N/any/all/none of them or of ($a, $b*), filesize with
+  KB/MB suffixes, integer comparisons and references to earlier rules
+- Every string is reduced to atoms compiled into one Aho-Corasick
+  automaton; a combined regex over the atoms finds the spans worth
+  running the automaton on, so buffers without any atom cost one C pass
+- Hex strings are verified with a regex once one of their atoms was seen
+  (hex strings without fixed bytes are always searched)
+- RuleScan is fed buffer by buffer (whole files or overlapping windows)
+  and evaluates the conditions once the file is done
+Notes:
+- Matches are deduplicated by offset, so windows may overlap; the caller
+  makes the overlap at least max_match_len.
+- A rule whose meta has 'sensitive = true' marks its hits sensitive.
+- Uses only standard library.
+"""
+import hashlib
+import os
+import re
+from collections import namedtuple
+
+try:
+    from tools.modules.detectors import max_match_len
+except ImportError:
+    from detectors import max_match_len
+
+RULE_SUFFIXES = ('.yar', '.yara')
+MAX_MATCHES = 10000   # offsets kept per string; counts saturate here
+SNIPPET_CONTEXT = 40  # bytes kept on each side of a rule's first match
+
+RuleHit = namedtuple('RuleHit', 'name offset snippet sensitive')
+
+
+class RuleError(ValueError):
+    """Raised for rule files outside the supported subset."""
+
+
+_TOKEN = re.compile(r'''
+    (?P<ws>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<hex>=\s*\{[0-9A-Fa-f?\s\[\]\-|()]*\})
+  | (?P<text>"(?:[^"\\\n]|\\.)*")
+  | (?P<regex>/(?:[^/\\\n]|\\.)+/[is]*)
+  | (?P<num>0x[0-9A-Fa-f]+|\d+(?:KB|MB)?)
+  | (?P<sid>[$#@!][A-Za-z0-9_]*\*?)
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>\.\.|==|!=|<=|>=|[{}():=,<>\[\]+\-])
+''', re.S | re.X)
+
+Token = namedtuple('Token', 'kind value line')
+
+_ESCAPES = {'"': b'"', '\\': b'\\', 'n': b'\n', 'r': b'\r', 't': b'\t'}
+_STRING_MODIFIERS = ('nocase', 'ascii', 'wide', 'fullword', 'private')
+_WORD = frozenset(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
+
+
+def tokenize(source):
+    tokens = []
+    pos = 0
+    while pos < len(source):
+        m = _TOKEN.match(source, pos)
+        line = source.count('\n', 0, pos) + 1
+        if not m:
+            raise RuleError('line %d: unexpected %r' % (line, source[pos:pos + 10]))
+        kind = m.lastgroup
+        if kind != 'ws':
+            tokens.append(Token(kind, m.group(), line))
+        pos = m.end()
+    return tokens
+
+
+def _unescape(text, line):
+    out = bytearray()
+    i = 0
+    body = text[1:-1]
+    while i < len(body):
+        c = body[i]
+        if c != '\\':
+            out += c.encode('utf-8')
+            i += 1
+            continue
+        esc = body[i + 1]
+        if esc == 'x':
+            try:
+                out.append(int(body[i + 2:i + 4], 16))
+            except ValueError:
+                raise RuleError('line %d: bad \\x escape in %s' % (line, text))
+            i += 4
+        elif esc in _ESCAPES:
+            out += _ESCAPES[esc]
+            i += 2
+        else:
+            raise RuleError('line %d: unknown escape \\%s' % (line, esc))
+    return bytes(out)
+
+
+def _number(value):
+    if value.startswith('0x'):
+        return int(value, 16)
+    if value.endswith('KB'):
+        return int(value[:-2]) * 1024
+    if value.endswith('MB'):
+        return int(value[:-2]) * 1024 * 1024
+    return int(value)
+
+
+def _byte_class(values):
+    return b'[' + b''.join(re.escape(bytes([v])) for v in values) + b']'
+
+
+def compile_hex(body, line):
+    """(regex, longest fixed byte run at top level) for a hex string body."""
+    items = re.findall(r'\[[^\]]*\]|[0-9A-Fa-f?]{2}|[()|]|\S', body)
+    out = []
+    depth = 0
+    run, best = b'', b''
+    for item in items:
+        fixed = None
+        if item == '(':
+            depth += 1
+            out.append(b'(?:')
+        elif item == ')':
+            depth -= 1
+            out.append(b')')
+        elif item == '|':
+            out.append(b'|')
+        elif item.startswith('['):
+            m = re.match(r'\[\s*(\d*)\s*(?:(-)\s*(\d*))?\s*\]$', item)
+            if not m or (not m.group(2) and not m.group(1)):
+                raise RuleError('line %d: bad jump %s' % (line, item))
+            lo = int(m.group(1) or 0)
+            if not m.group(2):
+                out.append(b'.{%d}' % lo)
+            elif m.group(3):
+                out.append(b'.{%d,%d}' % (lo, int(m.group(3))))
+            else:
+                out.append(b'.{%d,}' % lo)
+        elif len(item) == 2 and item != '??' and '?' in item:
+            if item[0] == '?':
+                low = int(item[1], 16)
+                out.append(_byte_class([hi << 4 | low for hi in range(16)]))
+            else:
+                high = int(item[0], 16) << 4
+                out.append(_byte_class(range(high, high + 16)))
+        elif item == '??':
+            out.append(b'.')
+        elif len(item) == 2:
+            fixed = int(item, 16)
+            out.append(re.escape(bytes([fixed])))
+        else:
+            raise RuleError('line %d: bad hex token %r' % (line, item))
+        if fixed is not None and depth == 0:
+            run += bytes([fixed])
+        else:
+            run = b''
+        if len(run) > len(best):
+            best = run
+    if depth:
+        raise RuleError('line %d: unbalanced parentheses in hex string' % line)
+    try:
+        regex = re.compile(b''.join(out), re.S)
+    except re.error as e:
+        raise RuleError('line %d: bad hex string (%s)' % (line, e))
+    return regex, best
+
+
+class String:
+    """One $string of a rule: its atom variants or, for hex strings, a verifying regex."""
+
+    def __init__(self, sid, variants=(), nocase=False, fullword=False, regex=None, atom=b''):
+        self.sid = sid
+        self.variants = list(variants)  # (bytes, char width) for text strings
+        self.nocase = nocase
+        self.fullword = fullword
+        self.regex = regex
+        self.atom = atom
+        if regex is not None:
+            self.max_len = max_match_len(regex)
+        else:
+            self.max_len = max(len(v) for v, _ in self.variants)
+
+
+class Parser:
+    """Recursive-descent parser over the token list of one rule file."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset=0):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else Token('eof', '', self.tokens[-1].line if self.tokens else 0)
+
+    def next(self):
+        tok = self.peek()
+        self.pos += 1
+        return tok
+
+    def expect(self, value=None, kind=None):
+        tok = self.next()
+        if (value is not None and tok.value != value) or (kind is not None and tok.kind != kind):
+            raise RuleError('line %d: expected %s, got %r' % (tok.line, value or kind, tok.value))
+        return tok
+
+    def accept(self, value):
+        if self.peek().value == value and self.peek().kind in ('ident', 'op'):
+            self.pos += 1
+            return True
+        return False
+
+    def rules(self):
+        rules = []
+        while self.peek().kind != 'eof':
+            rules.append(self.rule())
+        return rules
+
+    def rule(self):
+        private = False
+        while self.peek().value in ('private', 'global'):
+            tok = self.next()
+            if tok.value == 'global':
+                raise RuleError('line %d: global rules are not supported' % tok.line)
+            private = True
+        tok = self.peek()
+        if tok.value in ('import', 'include'):
+            raise RuleError('line %d: %s is not supported' % (tok.line, tok.value))
+        self.expect('rule')
+        name = self.expect(kind='ident').value
+        tags = []
+        if self.accept(':'):
+            while self.peek().kind == 'ident':
+                tags.append(self.next().value)
+        self.expect('{')
+        meta, strings = {}, []
+        if self.accept('meta'):
+            self.expect(':')
+            while self.peek().kind == 'ident' and self.peek(1).value == '=':
+                key = self.next().value
+                self.next()
+                meta[key] = self.meta_value()
+        if self.accept('strings'):
+            self.expect(':')
+            anonymous = 0
+            while self.peek().kind == 'sid' and self.peek().value.startswith('$'):
+                tok = self.next()
+                sid = tok.value
+                if sid == '$':
+                    anonymous += 1
+                    sid = '$%d' % anonymous  # digits never clash with identifiers
+                if any(s.sid == sid for s in strings):
+                    raise RuleError('line %d: duplicate string %s' % (tok.line, sid))
+                strings.append(self.string(sid, tok.line))
+        self.expect('condition')
+        self.expect(':')
+        self.strings = strings
+        condition = self.expr()
+        self.expect('}')
+        return {'name': name, 'tags': tags, 'meta': meta, 'strings': strings,
+                'condition': condition, 'private': private}
+
+    def meta_value(self):
+        tok = self.next()
+        if tok.kind == 'text':
+            return _unescape(tok.value, tok.line).decode('utf-8', errors='replace')
+        if tok.kind == 'num':
+            return _number(tok.value)
+        if tok.value == '-' and self.peek().kind == 'num':
+            return -_number(self.next().value)
+        if tok.value in ('true', 'false'):
+            return tok.value == 'true'
+        raise RuleError('line %d: bad meta value %r' % (tok.line, tok.value))
+
+    def string(self, sid, line):
+        tok = self.next()
+        if tok.kind == 'hex':
+            regex, atom = compile_hex(tok.value.lstrip('=').strip()[1:-1], tok.line)
+            return String(sid, regex=regex, atom=atom)
+        if tok.value == '=':
+            tok = self.next()
+        if tok.kind == 'regex':
+            raise RuleError('line %d: regular expression strings are not supported (%s)' % (tok.line, sid))
+        if tok.kind != 'text':
+            raise RuleError('line %d: bad string %s' % (line, sid))
+        text = _unescape(tok.value, tok.line)
+        if not text:
+            raise RuleError('line %d: empty string %s' % (line, sid))
+        mods = set()
+        while self.peek().kind == 'ident' and self.peek().value != 'condition':
+            mod = self.next()
+            if mod.value not in _STRING_MODIFIERS:
+                raise RuleError('line %d: unsupported string modifier %s' % (mod.line, mod.value))
+            mods.add(mod.value)
+        variants = []
+        if 'ascii' in mods or 'wide' not in mods:
+            variants.append((text, 1))
+        if 'wide' in mods:
+            variants.append((b''.join(bytes([c, 0]) for c in text), 2))
+        return String(sid, variants, nocase='nocase' in mods, fullword='fullword' in mods)
+
+    # condition grammar: or > and > not > comparison > additive > primary
+    def expr(self):
+        node = self.and_expr()
+        while self.accept('or'):
+            node = ('or', node, self.and_expr())
+        return node
+
+    def and_expr(self):
+        node = self.not_expr()
+        while self.accept('and'):
+            node = ('and', node, self.not_expr())
+        return node
+
+    def not_expr(self):
+        if self.accept('not'):
+            return ('not', self.not_expr())
+        return self.comparison()
+
+    def comparison(self):
+        node = self.additive()
+        if self.peek().value in ('<', '<=', '>', '>=', '==', '!=') and self.peek().kind == 'op':
+            op = self.next().value
+            node = ('cmp', op, node, self.additive())
+        return node
+
+    def additive(self):
+        node = self.primary()
+        while self.peek().kind == 'op' and self.peek().value in ('+', '-'):
+            op = self.next().value
+            node = ('add', op, node, self.primary())
+        return node
+
+    def primary(self):
+        tok = self.next()
+        if tok.value == '(' and tok.kind == 'op':
+            node = self.expr()
+            self.expect(')')
+            return node
+        if tok.kind == 'num' or tok.value in ('any', 'all', 'none'):
+            if self.accept('of'):
+                quant = tok.value if tok.kind == 'ident' else _number(tok.value)
+                return ('of', quant, self.string_set(tok.line))
+            if tok.kind == 'num':
+                return ('int', _number(tok.value))
+        if tok.value in ('true', 'false'):
+            return ('bool', tok.value == 'true')
+        if tok.value == 'filesize':
+            return ('filesize',)
+        if tok.kind == 'sid':
+            return self.string_ref(tok)
+        if tok.kind == 'ident' and tok.value not in ('and', 'or', 'not', 'of', 'them', 'at', 'in'):
+            return ('rule', tok.value, tok.line)
+        raise RuleError('line %d: unexpected %r in condition' % (tok.line, tok.value))
+
+    def _sid(self, tok):
+        sid = '$' + tok.value[1:]
+        if sid == '$' or not any(s.sid == sid for s in self.strings):
+            raise RuleError('line %d: undefined string %s' % (tok.line, tok.value))
+        return sid
+
+    def string_ref(self, tok):
+        prefix = tok.value[0]
+        sid = self._sid(tok)
+        if prefix == '#':
+            return ('count', sid)
+        if prefix == '@':
+            self.expect('[')
+            index = self.additive()
+            self.expect(']')
+            return ('offset', sid, index)
+        if prefix != '$':
+            raise RuleError('line %d: %s is not supported' % (tok.line, tok.value))
+        if self.accept('at'):
+            return ('at', sid, self.additive())
+        if self.accept('in'):
+            self.expect('(')
+            lo = self.additive()
+            self.expect('..')
+            hi = self.additive()
+            self.expect(')')
+            return ('in', sid, lo, hi)
+        return ('str', sid)
+
+    def string_set(self, line):
+        if self.accept('them'):
+            sids = [s.sid for s in self.strings]
+        else:
+            self.expect('(')
+            sids = []
+            while True:
+                tok = self.expect(kind='sid')
+                if tok.value.endswith('*'):
+                    prefix = '$' + tok.value[1:-1]
+                    sids.extend(s.sid for s in self.strings if s.sid.startswith(prefix) and s.sid not in sids)
+                else:
+                    sids.append(self._sid(tok))
+                if not self.accept(','):
+                    break
+            self.expect(')')
+        if not sids:
+            raise RuleError('line %d: empty string set' % line)
+        return tuple(sids)
+
+
+def _eval(node, ctx):
+    kind = node[0]
+    if kind == 'and':
+        return bool(_eval(node[1], ctx)) and bool(_eval(node[2], ctx))
+    if kind == 'or':
+        return bool(_eval(node[1], ctx)) or bool(_eval(node[2], ctx))
+    if kind == 'not':
+        return not _eval(node[1], ctx)
+    if kind == 'str':
+        return bool(ctx.offsets(node[1]))
+    if kind == 'count':
+        return len(ctx.offsets(node[1]))
+    if kind == 'int' or kind == 'bool':
+        return node[1]
+    if kind == 'filesize':
+        return ctx.filesize
+    if kind == 'offset':
+        offsets = ctx.offsets(node[1])
+        i = _eval(node[2], ctx)
+        # YARA indexes from 1; missing matches compare false (None)
+        return offsets[i - 1] if 1 <= i <= len(offsets) else None
+    if kind == 'at':
+        return _eval(node[2], ctx) in ctx.offsets(node[1])
+    if kind == 'in':
+        lo, hi = _eval(node[2], ctx), _eval(node[3], ctx)
+        return any(lo <= o <= hi for o in ctx.offsets(node[1]))
+    if kind == 'of':
+        found = sum(1 for sid in node[2] if ctx.offsets(sid))
+        quant = node[1]
+        if quant == 'any':
+            return found >= 1
+        if quant == 'all':
+            return found == len(node[2])
+        if quant == 'none':
+            return found == 0
+        return found >= quant
+    if kind == 'rule':
+        return ctx.rules[node[1]]
+    if kind == 'cmp':
+        a, b = _eval(node[2], ctx), _eval(node[3], ctx)
+        if a is None or b is None:
+            return False
+        op = node[1]
+        return {'<': a < b, '<=': a <= b, '>': a > b, '>=': a >= b, '==': a == b, '!=': a != b}[op]
+    if kind == 'add':
+        a, b = _eval(node[2], ctx), _eval(node[3], ctx)
+        if a is None or b is None:
+            return None
+        return a + b if node[1] == '+' else a - b
+    raise RuleError('bad condition node %r' % (kind,))
+
+
+class Automaton:
+    """Aho-Corasick automaton over byte keys, flattened into a full transition table."""
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        goto = [{}]
+        out = [[]]
+        for index, key in enumerate(self.keys):
+            state = 0
+            for c in key:
+                nxt = goto[state].get(c)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][c] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(index)
+        # breadth-first: failure links and the dense table in one pass
+        delta = [None] * len(goto)
+        fail = [0] * len(goto)
+        root = [0] * 256
+        for c, nxt in goto[0].items():
+            root[c] = nxt
+        delta[0] = root
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            out[state] = out[state] + out[fail[state]]
+            row = list(delta[fail[state]])
+            for c, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]][c]
+                row[c] = nxt
+                queue.append(nxt)
+            delta[state] = row
+        self.delta = [tuple(row) for row in delta]
+        self.out = [tuple(o) for o in out]
+        self.max_len = max((len(k) for k in self.keys), default=0)
+
+    def run(self, data, start, end):
+        """Yield (start offset, key index) of every key occurrence in data[start:end]."""
+        delta, out, keys = self.delta, self.out, self.keys
+        state = 0
+        pos = start
+        for c in data[start:end]:
+            state = delta[state][c]
+            pos += 1
+            if out[state]:
+                for index in out[state]:
+                    yield pos - len(keys[index]), index
+
+
+class RuleSet:
+    """Compiled rules: one automaton over all atoms plus the rule conditions."""
+
+    def __init__(self, rules, source_id=''):
+        self.rules = rules
+        self.names = [r['name'] for r in rules]
+        self.version = hashlib.sha256(source_id.encode('utf-8')).hexdigest()[:16]
+        atoms = {}      # lowered atom -> [(rule index, String, variant bytes, width)]
+        self.always = []  # (rule index, String) hex strings without fixed bytes
+        seen = set()
+        for ri, rule in enumerate(rules):
+            for s in rule['strings']:
+                if s.regex is not None:
+                    if s.atom:
+                        atoms.setdefault(s.atom.lower(), []).append((ri, s, None, 1))
+                    else:
+                        self.always.append((ri, s))
+                    continue
+                for variant, width in s.variants:
+                    atoms.setdefault(variant.lower(), []).append((ri, s, variant, width))
+            for node in _walk(rule['condition']):
+                if node[0] == 'rule' and node[1] not in seen:
+                    raise RuleError('line %d: rule %s references unknown or later rule %s'
+                                    % (node[2], rule['name'], node[1]))
+            if rule['name'] in seen:
+                raise RuleError('duplicate rule %s' % rule['name'])
+            seen.add(rule['name'])
+        self.entries = list(atoms.values())
+        self.automaton = Automaton(atoms)
+        self.gate = re.compile(b'|'.join(re.escape(k) for k in sorted(atoms, key=len, reverse=True)),
+                               re.IGNORECASE) if atoms else None
+        lengths = [s.max_len for rule in rules for s in rule['strings']]
+        self.max_match_len = max(lengths or [0])
+
+    def scanner(self):
+        return RuleScan(self)
+
+
+def _walk(node):
+    yield node
+    for child in node[1:]:
+        if isinstance(child, tuple) and child and isinstance(child[0], str):
+            yield from _walk(child)
+
+
+class RuleScan:
+    """Per-file match state; feed() every searched buffer, then finish(filesize)."""
+
+    def __init__(self, ruleset):
+        self.ruleset = ruleset
+        self.matches = {}  # (rule index, sid) -> set of offsets
+        self.first = {}    # (rule index, sid) -> (offset, context bytes)
+        self.filesize = 0
+        self.rules = {}
+
+    def _add(self, key, offset, data, start, end):
+        found = self.matches.setdefault(key, set())
+        if len(found) >= MAX_MATCHES or offset in found:
+            return
+        found.add(offset)
+        if key not in self.first or offset < self.first[key][0]:
+            ctx = bytes(data[max(start - SNIPPET_CONTEXT, 0):end + SNIPPET_CONTEXT])
+            self.first[key] = (offset, ctx)
+
+    def feed(self, data, base=0):
+        """Collect string matches in data, which starts at file offset base."""
+        rs = self.ruleset
+        verify = set()
+        if rs.gate is not None:
+            spans = []
+            reach = rs.automaton.max_len - 1
+            for m in rs.gate.finditer(data):
+                s, e = m.start(), min(m.end() + reach, len(data))
+                if spans and s <= spans[-1][1]:
+                    spans[-1][1] = max(spans[-1][1], e)
+                else:
+                    spans.append([s, e])
+            for s, e in spans:
+                lowered = bytes(data[s:e]).lower()
+                for pos, index in rs.automaton.run(lowered, 0, len(lowered)):
+                    pos += s
+                    for ri, string, variant, width in rs.entries[index]:
+                        if variant is None:
+                            verify.add((ri, string))
+                            continue
+                        end = pos + len(variant)
+                        if not string.nocase and data[pos:end] != variant:
+                            continue
+                        if string.fullword and not _delimited(data, pos, end, width):
+                            continue
+                        self._add((ri, string.sid), base + pos, data, pos, end)
+        for ri, string in list(verify) + rs.always:
+            for m in string.regex.finditer(data):
+                self._add((ri, string.sid), base + m.start(), data, m.start(), m.end())
+
+    def offsets(self, sid):
+        return self._offsets.get(sid, ())
+
+    def finish(self, filesize):
+        """Evaluate every rule; returns a RuleHit per matching non-private rule."""
+        self.filesize = filesize
+        hits = []
+        for ri, rule in enumerate(self.ruleset.rules):
+            self._offsets = {sid: sorted(found) for (r, sid), found in self.matches.items() if r == ri}
+            matched = bool(_eval(rule['condition'], self))
+            self.rules[rule['name']] = matched
+            if not matched or rule['private']:
+                continue
+            firsts = [self.first[(ri, s.sid)] for s in rule['strings'] if (ri, s.sid) in self.first]
+            offset, snippet = min(firsts, key=lambda f: f[0]) if firsts else (None, b'')
+            hits.append(RuleHit(rule['name'], offset, snippet, rule['meta'].get('sensitive') is True))
+        return hits
+
+
+def _delimited(data, start, end, width):
+    before = data[start - width] if start >= width else None
+    after = data[end] if end < len(data) else None
+    return before not in _WORD and after not in _WORD
+
+
+def compile_rules(source, name='<rules>'):
+    """Compile rule source text into a RuleSet."""
+    try:
+        rules = Parser(tokenize(source)).rules()
+    except RuleError as e:
+        raise RuleError('%s: %s' % (name, e))
+    return RuleSet(rules, source)
+
+
+def rule_files(paths):
+    """Rule files named by paths; directories contribute their *.yar/*.yara files."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, n) for n in sorted(os.listdir(path))
+                         if n.lower().endswith(RULE_SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+def load_rules(paths):
+    """Compile all rule files under paths into one RuleSet."""
+    rules = []
+    sources = []
+    for path in rule_files(paths):
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        try:
+            rules.extend(Parser(tokenize(source)).rules())
+        except RuleError as e:
+            raise RuleError('%s: %s' % (path, e))
+        sources.append(source)
+    if not rules:
+        raise RuleError('no rules found in %s' % ', '.join(paths))
+    return RuleSet(rules, '\n'.join(sources))